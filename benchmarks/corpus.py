@@ -0,0 +1,152 @@
+# corpus.py
+"""
+This module generates synthetic job corpora and CVs for benchmarking.
+Everything is derived from a seed, so the same size and seed always produce the same
+jobs.csv; generated corpora are cached on disk and reused across runs.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+# Real skill and domain words so stop-word removal, lemmatization and TF-IDF see text
+# shaped like actual postings; seeded pseudo-words extend the vocabulary to a realistic size
+SKILL_WORDS = [
+    "python", "sql", "java", "javascript", "typescript", "react", "django", "flask", "spark",
+    "hadoop", "kafka", "airflow", "docker", "kubernetes", "terraform", "aws", "azure", "gcp",
+    "linux", "git", "pandas", "numpy", "tensorflow", "pytorch", "tableau", "excel", "powerbi",
+    "statistics", "regression", "forecasting", "modeling", "pipelines", "databases", "apis",
+    "microservices", "testing", "security", "networking", "agile", "scrum", "etl", "dashboards",
+    "reporting", "visualization", "analysis", "cloud", "automation", "architecture", "design",
+    "deployment", "monitoring", "optimization", "scalability", "integration", "migration",
+]
+ROLE_WORDS = [
+    "engineer", "analyst", "scientist", "developer", "architect", "manager", "consultant",
+    "administrator", "specialist", "lead", "director", "intern", "technician", "designer",
+]
+LEVEL_WORDS = ["junior", "senior", "staff", "principal", "associate", "lead", ""]
+DOMAIN_WORDS = ["data", "software", "cloud", "security", "machine learning", "platform", "business", "network"]
+FILLER_WORDS = [
+    "the", "and", "with", "for", "our", "you", "will", "to", "of", "in", "a", "on", "is", "are",
+    "experience", "required", "preferred", "responsibilities", "strong", "ability", "work",
+    "skills", "team", "years", "building", "supporting", "developing", "managing", "customers",
+    "projects", "systems", "solutions", "products", "stakeholders", "requirements", "processes",
+]
+SYLLABLES = ["ka", "ro", "mi", "te", "lu", "sa", "no", "vi", "ze", "pa", "di", "go", "ren", "tal", "mor", "qui"]
+
+# Part of the cached file names; bumped whenever the same size and seed generate different rows
+CORPUS_VERSION = 2
+
+
+def build_vocabulary(size=5000, seed=0):
+    """
+    Seeded vocabulary of real skill words followed by pronounceable pseudo-words.
+    Args:
+        size (int): Total number of distinct content words.
+        seed (int): Random seed.
+    Returns:
+        list: Vocabulary; earlier words are drawn more often (Zipf-like).
+    """
+    rng = np.random.default_rng(seed)
+    words = list(SKILL_WORDS)
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES, size=rng.integers(2, 5)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words[:size]
+
+
+def _zipf_weights(size, exponent=1.1):
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_jobs(n_jobs, seed=0, vocabulary=None, words_per_job=(60, 200), missing_rate=0.01):
+    """
+    Generate a DataFrame of synthetic job postings.
+    Args:
+        n_jobs (int): Number of postings.
+        seed (int or np.random.SeedSequence): Random seed.
+        vocabulary (list): Content words; defaults to build_vocabulary(seed=seed).
+        words_per_job (tuple): Inclusive range of words per description.
+        missing_rate (float): Share of postings without a description, as in real feeds.
+    Returns:
+        pd.DataFrame: Postings with the columns of the real jobs.csv.
+    """
+    vocabulary = np.asarray(vocabulary or build_vocabulary(seed=seed))
+    fillers = np.asarray(FILLER_WORDS)
+    rng = np.random.default_rng(seed)
+
+    lengths = rng.integers(words_per_job[0], words_per_job[1] + 1, size=n_jobs)
+    total = int(lengths.sum())
+    # Roughly a third of the words are stop words and filler, the rest Zipf-distributed content
+    content = vocabulary[rng.choice(len(vocabulary), size=total, p=_zipf_weights(len(vocabulary)))]
+    is_filler = rng.random(total) < 0.35
+    content[is_filler] = fillers[rng.integers(0, len(fillers), size=int(is_filler.sum()))]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    descriptions = [" ".join(content[bounds[i]:bounds[i + 1]]) for i in range(n_jobs)]
+
+    titles = [
+        " ".join(part for part in (level, domain, role) if part).title()
+        for level, domain, role in zip(
+            rng.choice(LEVEL_WORDS, size=n_jobs),
+            rng.choice(DOMAIN_WORDS, size=n_jobs),
+            rng.choice(ROLE_WORDS, size=n_jobs),
+        )
+    ]
+    jobs = pd.DataFrame({
+        "Job Title": titles,
+        "Company": [f"Company {i}" for i in rng.integers(0, max(n_jobs // 20, 1), size=n_jobs)],
+        "Location": rng.choice(["Remote", "New York, NY", "Austin, TX", "Seattle, WA", "Chicago, IL"], size=n_jobs),
+        "Job Description": descriptions,
+    })
+    jobs.loc[rng.random(n_jobs) < missing_rate, "Job Description"] = None
+    return jobs
+
+
+def generate_cv(seed=0, vocabulary=None, n_words=400):
+    """
+    Generate a synthetic CV from the same vocabulary as the jobs.
+    Args:
+        seed (int): Random seed.
+        vocabulary (list): Content words; defaults to build_vocabulary(seed=seed).
+        n_words (int): Number of words in the CV.
+    Returns:
+        str: CV text.
+    """
+    vocabulary = np.asarray(vocabulary or build_vocabulary(seed=seed))
+    rng = np.random.default_rng(seed + 1)
+    # A CV covers the head of the vocabulary well and the tail sparsely
+    words = vocabulary[rng.choice(len(vocabulary), size=n_words, p=_zipf_weights(len(vocabulary), 0.8))]
+    return " ".join(words)
+
+
+def jobs_csv(n_jobs, seed=0, corpus_dir=None, chunk_size=50_000):
+    """
+    Path of a generated jobs.csv, writing it first if it is not cached yet.
+    Large corpora are generated and appended in chunks to bound memory. Each chunk draws
+    from its own child of SeedSequence(seed), so no chunk repeats a chunk of another seed.
+    Args:
+        n_jobs (int): Number of postings.
+        seed (int): Random seed.
+        corpus_dir (str): Cache directory; defaults to benchmarks/corpora.
+        chunk_size (int): Postings generated per chunk.
+    Returns:
+        str: Path to the CSV.
+    """
+    corpus_dir = corpus_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpora")
+    path = os.path.join(corpus_dir, f"jobs_{n_jobs}_seed{seed}_v{CORPUS_VERSION}.csv")
+    if os.path.isfile(path):
+        return path
+
+    os.makedirs(corpus_dir, exist_ok=True)
+    vocabulary = build_vocabulary(seed=seed)
+    staging = f"{path}.{os.getpid()}.tmp"
+    starts = range(0, n_jobs, chunk_size)
+    chunk_seeds = np.random.SeedSequence(seed).spawn(len(starts))
+    for chunk, start in enumerate(starts):
+        jobs = generate_jobs(min(chunk_size, n_jobs - start), seed=chunk_seeds[chunk], vocabulary=vocabulary)
+        jobs.to_csv(staging, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False)
+    os.replace(staging, path)
+    return path
@@ -0,0 +1,241 @@
+# run_benchmarks.py
+"""
+This module benchmarks the pipeline stages on synthetic corpora.
+Each stage is timed with perf_counter_ns and its memory recorded: the change of the
+current RSS across the stage, and how far it raised the process's peak RSS. Results are
+saved as JSON and can be compared against an earlier run to flag regressions.
+
+Run from the repository root:
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 --baseline benchmarks/results/<run>.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from config import CONFIG
+from logs.metrics import current_rss_bytes, describe_sizes, peak_rss_bytes
+from benchmarks.corpus import build_vocabulary, generate_cv, jobs_csv
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# Slowdowns smaller than this are never flagged, whatever the ratio; timer noise dominates them
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def measure(func, *args, **kwargs):
+    """
+    Run one stage and measure it.
+    Args:
+        func (callable): Stage to run.
+        *args, **kwargs: Arguments for func.
+    Returns:
+        tuple: The stage's result and its measurements.
+    """
+    rss_before = current_rss_bytes()
+    peak_before = peak_rss_bytes()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        traced_before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter_ns()
+    result = func(*args, **kwargs)
+    elapsed_ns = time.perf_counter_ns() - start
+
+    rss_after = current_rss_bytes()
+    metrics = {
+        "seconds": elapsed_ns / 1e9,
+        # ru_maxrss is a high-water mark: it stays flat for every stage after the largest
+        # one, so the current RSS is sampled too (None where the platform has no statm)
+        "rss_growth_bytes": None if rss_before is None or rss_after is None else rss_after - rss_before,
+        "peak_rss_growth_bytes": peak_rss_bytes() - peak_before,
+        "sizes": describe_sizes((result,)),
+    }
+    if tracemalloc.is_tracing():
+        metrics["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1] - traced_before
+    return result, metrics
+
+
+def run_pipeline(csv_path, cv_content, workers=None, top_n=None):
+    """
+    Run every benchmarked stage once, in pipeline order.
+    Args:
+        csv_path (str): Jobs CSV.
+        cv_content (str): Raw CV text.
+        workers (int): Preprocessing worker processes.
+        top_n (int): Jobs to rank; defaults to CONFIG["TOP_N_JOBS"].
+    Returns:
+        dict: Stage name mapped to its measurements.
+    """
+    from data.data_loader import load_csv, preprocess_csv, preprocess_cv, featurize_text, TOKENS_COLUMN
+    from models.model import (
+        calculate_similarity, rank_jobs_by_similarity, extract_top_keywords, find_missing_keywords
+    )
+    from models.keyword_index import build_keyword_index
+
+    stages = {}
+
+    def keyword_analysis(feature_names, job_features, cv_vector):
+        keyword_index = build_keyword_index(feature_names, job_features)
+        top_keywords = extract_top_keywords(feature_names, job_features, top_n=10, keyword_index=keyword_index)
+        missing = find_missing_keywords(cv_vector, feature_names, job_features, keyword_index=keyword_index)
+        return top_keywords, missing
+
+    jobs, stages["load_csv"] = measure(load_csv, csv_path)
+    jobs, stages["preprocess_csv"] = measure(preprocess_csv, jobs, workers=workers)
+    cv_tokens, stages["preprocess_cv"] = measure(preprocess_cv, cv_content)
+    (job_features, cv_vector, feature_names), stages["featurize_text"] = measure(
+        featurize_text, jobs[TOKENS_COLUMN], cv_tokens
+    )
+    scores, stages["calculate_similarity"] = measure(
+        calculate_similarity, job_features, cv_vector
+    )
+    _, stages["rank_jobs_by_similarity"] = measure(
+        rank_jobs_by_similarity, jobs, scores, top_n=top_n or CONFIG["TOP_N_JOBS"]
+    )
+    _, stages["keyword_analysis"] = measure(
+        keyword_analysis, feature_names, job_features, cv_vector
+    )
+    return stages
+
+
+def run_benchmarks(sizes, seed=0, repeat=1, workers=None, corpus_dir=None):
+    """
+    Benchmark the pipeline on corpora of several sizes.
+    Args:
+        sizes (list): Numbers of postings, e.g. [1000, 100000, 1000000].
+        seed (int): Corpus seed.
+        repeat (int): Runs per size; the fastest run of each stage is kept.
+        workers (int): Preprocessing worker processes.
+        corpus_dir (str): Cache directory for generated corpora.
+    Returns:
+        dict: JSON-serializable results.
+    """
+    import numpy
+    import pandas
+    import sklearn
+
+    cv_content = generate_cv(seed=seed, vocabulary=build_vocabulary(seed=seed))
+    runs = {}
+    for size in sizes:
+        csv_path = jobs_csv(size, seed=seed, corpus_dir=corpus_dir)
+        best = {}
+        for _ in range(repeat):
+            for stage, metrics in run_pipeline(csv_path, cv_content, workers).items():
+                if stage not in best or metrics["seconds"] < best[stage]["seconds"]:
+                    best[stage] = metrics
+        runs[str(size)] = {
+            "stages": best,
+            "total_seconds": sum(metrics["seconds"] for metrics in best.values()),
+        }
+        print(format_run(size, runs[str(size)]))
+
+    return {
+        "created_at": time.time(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "numpy": numpy.__version__,
+            "pandas": pandas.__version__,
+            "scikit-learn": sklearn.__version__,
+        },
+        "params": {
+            "seed": seed,
+            "repeat": repeat,
+            "workers": workers,
+            "trace_memory": tracemalloc.is_tracing(),
+        },
+        "runs": runs,
+    }
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    Flag stages that got slower than the baseline by more than the tolerance.
+    Args:
+        results (dict): Output of run_benchmarks.
+        baseline (dict): Earlier output of run_benchmarks.
+        tolerance (float): Allowed slowdown, e.g. 0.2 for 20%.
+    Returns:
+        list: One dict per regression with size, stage, both timings and the ratio.
+    """
+    regressions = []
+    for size, run in results["runs"].items():
+        base_run = baseline.get("runs", {}).get(size)
+        if base_run is None:
+            continue
+        for stage, metrics in run["stages"].items():
+            base = base_run["stages"].get(stage)
+            if base is None or base["seconds"] <= 0:
+                continue
+            ratio = metrics["seconds"] / base["seconds"]
+            if ratio > 1 + tolerance and metrics["seconds"] - base["seconds"] > MIN_REGRESSION_SECONDS:
+                regressions.append({
+                    "size": int(size),
+                    "stage": stage,
+                    "baseline_seconds": base["seconds"],
+                    "seconds": metrics["seconds"],
+                    "ratio": ratio,
+                })
+    return regressions
+
+
+def format_run(size, run):
+    lines = [f"\n{size} postings ({run['total_seconds']:.3f} s total)"]
+    for stage, metrics in run["stages"].items():
+        growth = metrics["rss_growth_bytes"]
+        rss = "     n/a" if growth is None else f"{growth / 2**20:+8.1f}"
+        lines.append(
+            f"  {stage:<26} {metrics['seconds']:10.4f} s"
+            f"  rss {rss} MiB  peak +{metrics['peak_rss_growth_bytes'] / 2**20:8.1f} MiB  {metrics['sizes']}"
+        )
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the JATS pipeline on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="postings per corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=1, help="runs per size; the fastest is kept")
+    parser.add_argument("--workers", type=int, default=None, help="preprocessing worker processes")
+    parser.add_argument("--trace-memory", action="store_true", help="record tracemalloc peaks (slower)")
+    parser.add_argument("--corpus-dir", default=None, help="where generated corpora are cached")
+    parser.add_argument("--output", default=None, help="results file; defaults to benchmarks/results/<time>.json")
+    parser.add_argument("--baseline", default=None, help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace_memory:
+        tracemalloc.start()
+
+    results = run_benchmarks(args.sizes, args.seed, args.repeat, args.workers, args.corpus_dir)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        results["baseline"] = {"path": args.baseline, "tolerance": args.tolerance, "regressions": regressions}
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['stage']} @ {regression['size']}: "
+                f"{regression['baseline_seconds']:.4f} s -> {regression['seconds']:.4f} s "
+                f"(x{regression['ratio']:.2f})"
+            )
+        if not regressions:
+            print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results saved to {output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
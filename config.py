@@ -9,9 +9,64 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CONFIG = {
     "CSV_PATH": os.path.join(BASE_DIR, "data/jobs.csv"),
     "CV_PATH": os.path.join(BASE_DIR, "data/cv.txt"),
+    "ARTIFACT_DIR": os.path.join(BASE_DIR, "data/artifacts"),
+    "ARTIFACT_KEEP": 3,  # newest artifacts kept besides the published one; older ones are pruned
+    "INCREMENTAL_INGEST": True,
+    "JOB_KEY_COLUMN": None,  # e.g. "Job ID"; rows are keyed by content hash when unset
+    "REFIT_DRIFT_THRESHOLD": 0.2,  # share of rows added/changed/removed since the last full IDF fit
+    "DEDUP_POSTINGS": True,  # keep one posting per cluster of exact and near-duplicate descriptions
+    "DEDUP_THRESHOLD": 0.9,  # estimated Jaccard similarity of description shingles; 1.0 merges exact copies only
+    "DEDUP_NUM_PERM": 64,  # MinHash signature length
+    "DEDUP_BANDS": 16,  # LSH bands; more bands find less similar candidates
+    "DEDUP_SHINGLE_SIZE": 3,  # words per shingle
+    "STREAMING_INGEST": False,  # stream the CSV in chunks for feeds larger than memory
+    "STREAM_CHUNK_SIZE": 50_000,  # rows per streamed chunk
+    "RETRIEVAL_INDEX": "exact",  # "exact" brute-force cosine, "ann" (SVD + LSH index) or "sharded" (exact, multi-process)
+    "ANN_COMPONENTS": 128,  # truncated-SVD dimensions
+    "ANN_TABLES": 8,  # LSH hash tables
+    "ANN_BITS": 12,  # hyperplanes per table
+    "SHARD_ROWS": 1_000_000,  # job rows per persisted shard for sharded scoring
+    "SHARD_WORKERS": 0,  # sharded scoring processes; 0 means one per CPU
+    "QUERY_INDEX_COLUMNS": None,  # columns searchable besides the title; None detects location/company/date
+    "MODEL_RELOAD_INTERVAL": 30,  # seconds between checks for a newly published artifact
+    "RESULT_CACHE": True,  # memoize /score results per normalized CV and artifact version
+    "RESULT_CACHE_SIZE": 1024,  # results kept in memory
+    "RESULT_CACHE_PATH": os.path.join(BASE_DIR, "data/result_cache.sqlite3"),  # on-disk level; None keeps memory only
+    "RESULT_CACHE_DISK_SIZE": 100_000,  # results kept on disk, least recently used dropped first
+    "TASK_DB_PATH": os.path.join(BASE_DIR, "data/tasks.sqlite3"),  # queued /analyze runs and their results
+    "TASK_WORKERS": 2,  # worker processes running queued pipeline runs
+    "TASK_POLL_INTERVAL": 0.5,  # seconds between checks for new tasks and new progress events
+    "RENDER_WORKERS": 2,  # background chart rendering threads
+    "RENDER_CACHE_SIZE": 256,  # rendered charts kept in memory
+    "RENDER_TIMEOUT": 30,  # seconds a request waits for a chart still being rendered
+    "DASHBOARD_RESULTS_SIZE": 256,  # recent /score results whose /results pages stay available
+    "PLOT_MODE": "show",  # "show" opens each chart, "export" writes files, "none" skips plotting
+    "PLOT_DIR": os.path.join(BASE_DIR, "plots"),  # export target directory
+    "PLOT_FORMAT": "png",  # "png" or "svg"; the interactive chart is exported as HTML
+    "FEATURE_DTYPE": "float32",  # TF-IDF weight dtype; "float64" keeps full precision
+    "PRUNE_THRESHOLD": 0.0,  # drop TF-IDF weights below this from each row; 0 disables pruning
+    "COMPACTION_REPORT": False,  # after each full fit, score sampled rows at both precisions and log the drift
+    "TFIDF_MAX_FEATURES": 500,  # vocabulary size; None keeps every term that passes min_df/max_df
+    "TFIDF_NGRAM_RANGE": (1, 2),  # unigrams and bigrams
+    "TFIDF_MIN_DF": 1,  # drop terms in fewer documents (int) or a smaller share of them (float)
+    "TFIDF_MAX_DF": 1.0,  # drop terms in more documents (int) or a larger share of them (float)
+    "VOCABULARY_MODE": "exact",  # "exact" counts every n-gram; "two_pass" prunes hashed counts first
+    "VOCABULARY_HASH_BUCKETS": 2 ** 20,  # hash buckets of the two-pass mode's first pass
+    "VOCABULARY_OVERSAMPLE": 4,  # candidate buckets kept per vocabulary slot in the two-pass mode
     "TOP_N_KEYWORDS": 10,
     "TOP_N_JOBS": 5,
     "LOG_LEVEL": "INFO",
+    "LOG_FORMAT": "text",  # "text" or "json" (one JSON object per line)
+    "LOG_BATCH_SIZE": 256,  # records written between flushes by the background log writer
+    "LOG_FLUSH_INTERVAL": 0.5,  # seconds a partial batch waits before it is flushed
+    "LOG_SAMPLE_RATES": {},  # fraction of records kept per level, e.g. {"INFO": 0.1}
+    "TRACE_MEMORY": False,  # record tracemalloc growth per stage (slows allocation-heavy code)
+    "PROFILE_STAGES": [],  # stage names (e.g. "fit_vectorizer") to run under cProfile; "*" for all
+    "PROFILE_DIR": os.path.join(BASE_DIR, "logs/profiles"),  # where cProfile .prof files are written
+    # lemmatization processes; 0 uses one per CPU, 1 stays serial
+    "PREPROCESS_WORKERS": int(os.environ.get("JATS_PREPROCESS_WORKERS", 0)),
+    "PREPROCESS_CHUNK_SIZE": 1000,  # documents per worker task
+    "LEMMA_CACHE_SIZE": 100_000,  # distinct tokens memoized per process
     "CUSTOM_STOP_WORDS": {
         "experience", "required", "preferred", "responsibilities",
         "strong", "ability", "work", "skills",
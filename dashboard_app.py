@@ -1,10 +1,19 @@
+import json
 import os
-from flask import Flask, render_template, send_from_directory
-import matplotlib
-import matplotlib.pyplot as plt
-
-# Force Matplotlib to use the non-interactive Agg backend
-matplotlib.use("Agg")
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import TimeoutError as RenderTimeout
+from flask import (
+    Flask, Response, abort, jsonify, render_template, request, send_from_directory, stream_with_context, url_for
+)
+from config import CONFIG
+from health_check.health_check import health_check
+from logs.metrics import registry
+from models.serving import model_holder, score_cv, search_jobs
+from models.task_queue import FINISHED, TaskStore, TaskWorkers
+from visualizations.render_cache import render_cache, MIME_TYPES
 
 app = Flask(__name__)
 
@@ -12,92 +21,359 @@ app = Flask(__name__)
 STATIC_DIR = "static"
 os.makedirs(STATIC_DIR, exist_ok=True)
 
+# Full pipeline runs requested through /analyze are queued here and run by worker processes
+task_store = TaskStore()
+task_workers = TaskWorkers(task_store)
+
+_services_lock = threading.Lock()
+_services_started = threading.Event()
+
+
+def start_services():
+    """
+    Load the fitted model (and keep watching for newly published artifacts) and start the
+    task workers, once per serving process. Nothing starts at import time, so the debug
+    reloader's watcher process never runs a second model watcher or worker pool.
+    """
+    with _services_lock:
+        if _services_started.is_set():
+            return
+        model_holder.start()
+        task_workers.start()
+        _services_started.set()
+
+# Recent /score results by id; each response links to the /results page of its own ranking
+recent_results = OrderedDict()
+_recent_results_lock = threading.Lock()
+
+# Placeholder data shown until a CV has been scored
+PLACEHOLDER_RESULT = {
+    "jobs": [
+        {"title": "Job 1", "score": 0.8},
+        {"title": "Job 2", "score": 0.75},
+        {"title": "Job 3", "score": 0.7},
+    ],
+    "missing_keywords": [
+        {"keyword": "Keyword 4", "score": 6},
+        {"keyword": "Keyword 3", "score": 7},
+        {"keyword": "Keyword 2", "score": 8},
+        {"keyword": "Keyword 1", "score": 10},
+    ],
+    "keyword_comparison": [
+        {"keyword": "Keyword 1", "job_score": 10, "cv_score": 5},
+        {"keyword": "Keyword 2", "job_score": 8, "cv_score": 4},
+        {"keyword": "Keyword 3", "job_score": 7, "cv_score": 3},
+        {"keyword": "Keyword 4", "job_score": 6, "cv_score": 2},
+    ],
+}
+
+def remember_result(result):
+    """
+    Keep a scoring result for its /results page, evicting the oldest beyond the budget.
+    Args:
+        result (dict): Output of score_cv.
+    Returns:
+        str: Result id for the results URL.
+    """
+    result_id = uuid.uuid4().hex
+    with _recent_results_lock:
+        recent_results[result_id] = result
+        while len(recent_results) > CONFIG["DASHBOARD_RESULTS_SIZE"]:
+            recent_results.popitem(last=False)
+    return result_id
+
+def submit_charts(result):
+    """
+    Queue the five dashboard charts for a scoring result on the render pool.
+    Args:
+        result (dict): Output of score_cv (or the placeholder data).
+    Returns:
+        list: (title, cache key) pairs in display order.
+    """
+    titles = [job["title"] for job in result["jobs"]]
+    scores = [job["score"] for job in result["jobs"]]
+    comparison = result["keyword_comparison"]
+    charts = [
+        ("Keyword Frequency", "keyword_frequency", {
+            "keywords": [item["keyword"] for item in comparison],
+            "scores": [item["job_score"] for item in comparison],
+        }),
+        ("Missing Keywords", "missing_keywords", {
+            "keywords": [item["keyword"] for item in result["missing_keywords"]],
+            "scores": [item["score"] for item in result["missing_keywords"]],
+        }),
+        ("Similarity Heatmap", "similarity_heatmap", {"titles": titles, "scores": scores}),
+        ("Top Matches", "top_matches", {"titles": titles, "scores": scores}),
+        ("Keyword Comparison", "keyword_comparison", {
+            "keywords": [item["keyword"] for item in comparison],
+            "job_scores": [item["job_score"] for item in comparison],
+            "cv_scores": [item["cv_score"] for item in comparison],
+        }),
+    ]
+    return [(title, render_cache.submit(chart, data)) for title, chart, data in charts]
+
+@app.before_request
+def ensure_services():
+    # Covers WSGI servers, which import the app without running __main__
+    start_services()
+
 @app.route("/")
 def home():
     return render_template("index.html")
 
 @app.route("/results")
 def results():
-    # Placeholder data
-    top_jobs = ["Job 1", "Job 2", "Job 3"]
-    similarity_scores = [0.8, 0.75, 0.7]
-    keywords = ["Keyword 1", "Keyword 2", "Keyword 3", "Keyword 4"]
-    keyword_scores = [10, 8, 7, 6]
-
-    # Generate static images
-    plots = []
-
-    # 1. Keyword Frequency
-    keyword_img_path = os.path.join(STATIC_DIR, "keyword_frequency.png")
-    plt.figure(figsize=(8, 6))
-    plt.barh(keywords, keyword_scores, color="skyblue")
-    plt.title("Keyword Frequency")
-    plt.xlabel("Frequency")
-    plt.tight_layout()
-    plt.savefig(keyword_img_path)
-    plt.close()
-    plots.append("keyword_frequency.png")
-
-    # 2. Missing Keywords
-    missing_img_path = os.path.join(STATIC_DIR, "missing_keywords.png")
-    plt.figure(figsize=(8, 6))
-    plt.barh(keywords[::-1], keyword_scores[::-1], color="orange")
-    plt.title("Missing Keywords")
-    plt.xlabel("Importance Score")
-    plt.tight_layout()
-    plt.savefig(missing_img_path)
-    plt.close()
-    plots.append("missing_keywords.png")
-
-    # 3. Similarity Heatmap
-    heatmap_img_path = os.path.join(STATIC_DIR, "similarity_heatmap.png")
-    plt.figure(figsize=(8, 6))
-    plt.imshow([[0.8, 0.75, 0.7]], cmap="coolwarm", aspect="auto")
-    plt.colorbar(label="Similarity Score")
-    plt.xticks(range(len(top_jobs)), top_jobs, rotation=45, ha="right")
-    plt.yticks([])
-    plt.title("Similarity Heatmap")
-    plt.tight_layout()
-    plt.savefig(heatmap_img_path)
-    plt.close()
-    plots.append("similarity_heatmap.png")
-
-    # 4. Top Matches
-    matches_img_path = os.path.join(STATIC_DIR, "top_matches.png")
-    plt.figure(figsize=(8, 6))
-    plt.bar(top_jobs, similarity_scores, color="green")
-    plt.title("Top Job Matches")
-    plt.ylabel("Similarity Score")
-    plt.tight_layout()
-    plt.savefig(matches_img_path)
-    plt.close()
-    plots.append("top_matches.png")
-
-    # 5. Keyword Comparison
-    comparison_img_path = os.path.join(STATIC_DIR, "keyword_comparison.png")
-    plt.figure(figsize=(8, 6))
-    plt.bar(keywords, keyword_scores, color="purple", label="Job")
-    plt.bar(keywords, [5, 4, 3, 2], color="pink", label="CV", alpha=0.7)
-    plt.title("Keyword Comparison: CV vs Job")
-    plt.ylabel("TF-IDF Score")
-    plt.xlabel("Keywords")
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig(comparison_img_path)
-    plt.close()
-    plots.append("keyword_comparison.png")
-
+    """
+    Charts of the result named by ?result=<id> (as linked from /score), or of the
+    placeholder data without one.
+    """
+    result = PLACEHOLDER_RESULT
+    result_id = request.args.get("result")
+    if result_id:
+        with _recent_results_lock:
+            result = recent_results.get(result_id)
+        if result is None:
+            abort(404)
+    # Charts are rendered in the background and served from the render cache
+    charts = submit_charts(result)
+    plots = [
+        {"title": title, "url": url_for("plot_image", key=key, fmt="png")}
+        for title, key in charts
+    ]
     return render_template("results.html", plots=plots)
 
+@app.route("/plots/<key>.<fmt>")
+def plot_image(key, fmt):
+    """
+    Serve rendered chart bytes; the content-addressed key doubles as the ETag.
+    """
+    if fmt not in MIME_TYPES:
+        abort(404)
+    try:
+        entry = render_cache.get(key, timeout=CONFIG["RENDER_TIMEOUT"])
+    except RenderTimeout:
+        response = jsonify({"error": "Chart is still rendering"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "5"
+        return response
+    if entry is None or entry[0] != fmt:
+        abort(404)
+
+    response = app.response_class(entry[1], mimetype=MIME_TYPES[fmt])
+    response.set_etag(key)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response.make_conditional(request)
+
 @app.route("/maintenance")
 def maintenance():
-    # Placeholder data for maintenance
-    checks = {"CSV File Loaded": True, "CV File Loaded": True, "Logging Active": True}
+    # Liveness checks are cheap enough for every request; ?deep=1 also verifies artifact checksums
+    checks, _ = health_check(deep=request.args.get("deep", type=int) == 1)
     return render_template("maintenance.html", checks=checks)
 
+@app.route("/metrics")
+def metrics():
+    # Per-stage timings, memory growth and data sizes in the Prometheus text format
+    return Response(registry.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/metrics.json")
+def metrics_json():
+    return Response(registry.to_json(), mimetype="application/json")
+
+def posted_cv(payload):
+    """
+    CV text from a JSON body, a "cv" form field or a "cv" file upload.
+    """
+    cv_content = payload.get("cv") or request.form.get("cv")
+    if not cv_content and "cv" in request.files:
+        cv_content = request.files["cv"].read().decode("utf-8", errors="ignore")
+    return cv_content
+
+def requested_top_k(payload):
+    """
+    top_k from a JSON body or the query string.
+    Returns:
+        int: Number of results to return, or None for the configured default.
+    Raises:
+        ValueError: If top_k is not a positive integer.
+    """
+    value = payload.get("top_k")
+    if value is None:
+        value = request.args.get("top_k")
+    if value is None:
+        return None
+    # int() would silently truncate 2.5 and accept True
+    if isinstance(value, (bool, float)):
+        raise ValueError(f"top_k must be a positive integer, got {value!r}")
+    try:
+        top_k = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"top_k must be a positive integer, got {value!r}") from None
+    if top_k <= 0:
+        raise ValueError(f"top_k must be a positive integer, got {value!r}")
+    return top_k
+
+@app.route("/score", methods=["POST"])
+def score():
+    """
+    Rank jobs for a posted CV against the warm in-memory model.
+    Accepts JSON {"cv": "...", "top_k": 5}, a "cv" form field or a "cv" file upload.
+    The response's results_url shows the dashboard charts of this ranking.
+    """
+    payload = request.get_json(silent=True) or {}
+    cv_content = posted_cv(payload)
+    if not cv_content:
+        return jsonify({"error": "No CV text provided"}), 400
+
+    try:
+        top_k = requested_top_k(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    snapshot = model_holder.current
+    if snapshot is None:
+        return jsonify({"error": "Model is still loading"}), 503
+
+    result = score_cv(snapshot, cv_content, top_k=top_k)
+
+    # Render this ranking's dashboard charts in the background
+    submit_charts(result)
+    results_url = url_for("results", result=remember_result(result))
+    return jsonify({**result, "results_url": results_url})
+
+@app.route("/analyze", methods=["POST"])
+def analyze():
+    """
+    Queue a full pipeline run (featurize the configured CSV, score the CV) and return at once.
+    Accepts the same CV inputs as /score. Poll the status URL or follow the events URL.
+    """
+    payload = request.get_json(silent=True) or {}
+    cv_content = posted_cv(payload)
+    if not cv_content:
+        return jsonify({"error": "No CV text provided"}), 400
+
+    try:
+        top_k = requested_top_k(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    task_id = task_store.submit("analyze", {"cv": cv_content, "top_k": top_k})
+    return jsonify({
+        "task_id": task_id,
+        "status_url": url_for("analysis_status", task_id=task_id),
+        "events_url": url_for("analysis_events", task_id=task_id),
+    }), 202
+
+@app.route("/analyze/<task_id>")
+def analysis_status(task_id):
+    """
+    Status of a queued run; includes the stages completed so far and, once done, the result.
+    """
+    task = task_store.get(task_id)
+    if task is None:
+        abort(404)
+    events = task_store.events(task_id)
+    task["completed_stages"] = [
+        {"stage": event["stage"], "seconds": event["elapsed_ns"] / 1e9}
+        for event in events if event["event"] == "end" and event["depth"] == 0
+    ]
+    running = [event for event in events if event["event"] == "start"]
+    task["current_stage"] = running[-1]["stage"] if running and task["status"] not in FINISHED else None
+    return jsonify(task)
+
+@app.route("/analyze/<task_id>/events")
+def analysis_events(task_id):
+    """
+    Server-sent events: one "stage" event per stage boundary, then a final "status" event.
+    Reconnecting clients resume after the Last-Event-ID they received.
+    """
+    if task_store.get(task_id) is None:
+        abort(404)
+    last_seq = request.headers.get("Last-Event-ID", type=int) or 0
+
+    def stream():
+        seq = last_seq
+        while True:
+            # Status is read before the events, so no event written before it finished is missed
+            task = task_store.get(task_id)
+            for event in task_store.events(task_id, after=seq):
+                seq = event["seq"]
+                yield f"id: {seq}\nevent: stage\ndata: {json.dumps(event)}\n\n"
+            if task["status"] in FINISHED:
+                yield f"event: status\ndata: {json.dumps(task)}\n\n"
+                return
+            time.sleep(CONFIG["TASK_POLL_INTERVAL"])
+
+    response = Response(stream_with_context(stream()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route("/search", methods=["GET", "POST"])
+def search():
+    """
+    Filtered job search over the warm model, answered from the query indexes.
+    Query arguments (or a JSON body with the same names):
+        title: words that must all appear in the job title
+        keyword: TF-IDF keyword that must appear in the description (repeatable)
+        <field>: value of an indexed column, e.g. location=Remote (repeatable, any matches)
+        <field>_from / <field>_to: bounds of an indexed date column
+        cv: CV text to rank the matches by similarity
+        top_k: number of jobs to return
+    e.g. /search?title=data&keyword=python&top_k=20
+    """
+    snapshot = model_holder.current
+    if snapshot is None:
+        return jsonify({"error": "Model is still loading"}), 503
+
+    payload = request.get_json(silent=True) or {}
+
+    def values(name):
+        value = payload.get(name)
+        if value is None:
+            return request.args.getlist(name)
+        return value if isinstance(value, list) else [value]
+
+    query_index = snapshot.query_index
+    known = {"title", "keyword", "keywords", "cv", "top_k", *query_index.value_indexes}
+    known.update(f"{field}_{bound}" for field in query_index.date_indexes for bound in ("from", "to"))
+    unknown = sorted((set(request.args) | set(payload)) - known)
+    if unknown:
+        # A filter on a field that is not indexed would otherwise be ignored silently
+        return jsonify({
+            "error": f"Unknown search parameters: {', '.join(unknown)}",
+            "fields": query_index.describe(),
+        }), 400
+
+    criteria = {
+        "title": payload.get("title") or request.args.get("title"),
+        "keywords": values("keyword") + values("keywords"),
+        "filters": {field: values(field) for field in query_index.value_indexes if values(field)},
+        "date_ranges": {
+            field: ((values(f"{field}_from") or [None])[0], (values(f"{field}_to") or [None])[0])
+            for field in query_index.date_indexes
+            if values(f"{field}_from") or values(f"{field}_to")
+        },
+    }
+    cv_content = payload.get("cv") or request.form.get("cv")
+    try:
+        top_k = requested_top_k(payload)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        result = search_jobs(snapshot, cv_content, top_k=top_k, **criteria)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {e}"}), 400
+    except KeyError as e:
+        # e.g. a title query against jobs stored without titles
+        return jsonify({"error": f"Field is not indexed: {e.args[0]}"}), 400
+    result["fields"] = query_index.describe()
+    return jsonify(result)
+
 @app.route("/static/<path:filename>")
 def static_files(filename):
     return send_from_directory(STATIC_DIR, filename)
 
 if __name__ == "__main__":
+    # With the reloader, only the child process that serves requests warms up eagerly
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_services()
     app.run(debug=True)
@@ -0,0 +1,370 @@
+# artifact_store.py
+"""
+This module persists fitted TF-IDF artifacts so warm starts skip refitting.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+import numpy as np
+from config import CONFIG
+from data.compaction import compaction_params
+from data.dedup import dedup_params
+from data.job_store import load_csr, matrix_fingerprint, open_job_store, save_csr, save_job_store
+from data.text_engine import build_vectorizer
+from logs.log_config import log_event, log_execution_time
+
+MANIFEST_FILE = "manifest.json"
+IDF_FILE = "idf.npy"
+ROW_KEYS_FILE = "row_keys.npy"
+ROW_HASHES_FILE = "row_hashes.npy"
+DUPLICATES_FILE = "duplicates.npy"
+CURRENT_FILE = "CURRENT"
+
+# Indexes built next to the artifacts for one job matrix, named <prefix><matrix fingerprint>...
+DERIVED_PREFIXES = ("ann_", "shards_")
+
+# Bump whenever preprocessing changes the tokens fed to the vectorizer
+PIPELINE_VERSION = 2
+
+
+def file_digest(file_path, chunk_size=1 << 20):
+    """
+    Compute the SHA-256 digest of a file without reading it into memory at once.
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Number of bytes read per iteration.
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def params_fingerprint(stop_words, vectorizer_params):
+    """
+    Fingerprint the preprocessing and vectorizer settings independently of the data.
+    Args:
+        stop_words (iterable): Custom stop words applied during preprocessing.
+        vectorizer_params (dict): Keyword arguments passed to TfidfVectorizer.
+    Returns:
+        str: Hex digest of the settings.
+    """
+    payload = {
+        "pipeline": PIPELINE_VERSION,
+        "compaction": compaction_params(),
+        "dedup": dedup_params(),
+        "stop_words": sorted(stop_words or []),
+        "params": vectorizer_params,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def artifact_key(csv_path, stop_words, vectorizer_params):
+    """
+    Build the cache key identifying a fitted vectorizer and its job matrix.
+    Args:
+        csv_path (str): Path to the jobs CSV.
+        stop_words (iterable): Custom stop words applied during preprocessing.
+        vectorizer_params (dict): Keyword arguments passed to TfidfVectorizer.
+    Returns:
+        str: Hex key combining the CSV content hash, stop words and parameters.
+    """
+    fingerprint = params_fingerprint(stop_words, vectorizer_params)
+    return hashlib.sha256(f"{file_digest(csv_path)}:{fingerprint}".encode("utf-8")).hexdigest()
+
+
+def _artifact_path(cache_key, artifact_dir=None):
+    return os.path.join(artifact_dir or CONFIG["ARTIFACT_DIR"], cache_key)
+
+
+def _move_into_place(staging, target):
+    """
+    Swap a staged artifact directory in without deleting the old one first.
+    An existing directory is renamed aside and removed only after the swap. If another
+    writer (the CLI and a dashboard task, say) stores the same key in between, its copy
+    is kept: the key covers the CSV and every setting, so both copies hold the same data.
+    """
+    aside = f"{target}.{uuid.uuid4().hex}.old"
+    try:
+        os.rename(target, aside)
+    except FileNotFoundError:
+        aside = None
+    try:
+        # Fails if a concurrent writer put its copy in place meanwhile
+        os.rename(staging, target)
+    except OSError:
+        if not os.path.isfile(os.path.join(target, MANIFEST_FILE)):
+            raise
+        shutil.rmtree(staging, ignore_errors=True)
+    if aside is not None:
+        shutil.rmtree(aside, ignore_errors=True)
+
+
+@log_execution_time
+def save_artifacts(cache_key, vectorizer, job_features, row_index=None, metadata=None,
+                   jobs_data=None, artifact_dir=None, duplicates=None):
+    """
+    Persist the fitted vocabulary, IDF weights and job matrix under the cache key.
+    Files are written to a temporary directory first and moved into place, so a
+    crash never leaves a half-written artifact behind, and an artifact being replaced
+    is renamed aside rather than deleted first.
+    Args:
+        cache_key (str): Key returned by artifact_key.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        row_index (tuple): Per-row job keys and content hashes aligned with the matrix.
+        metadata (dict): Extra fields recorded in the manifest.
+        jobs_data (pd.DataFrame): Job data aligned with the matrix rows, stored column by
+            column so warm starts and serving never re-parse the CSV.
+        artifact_dir (str): Root directory of the artifact store.
+        duplicates (np.ndarray): Keys, content hashes and representative keys (3 x n)
+            of the rows dropped as duplicates, so incremental ingest keeps them out.
+    Returns:
+        str: Path of the stored artifact, or None if saving failed.
+    """
+    target = _artifact_path(cache_key, artifact_dir)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(target))
+        shape = save_csr(staging, job_features)
+        np.save(os.path.join(staging, IDF_FILE), vectorizer.idf_)
+        if row_index is not None:
+            row_keys, row_hashes = row_index
+            np.save(os.path.join(staging, ROW_KEYS_FILE), row_keys)
+            np.save(os.path.join(staging, ROW_HASHES_FILE), row_hashes)
+        if duplicates is not None:
+            np.save(os.path.join(staging, DUPLICATES_FILE), duplicates)
+        if jobs_data is not None:
+            save_job_store(staging, jobs_data)
+        manifest = {
+            **(metadata or {}),
+            "key": cache_key,
+            "created_at": time.time(),
+            "n_jobs": job_features.shape[0],
+            "shape": shape,
+            # Names the ANN index and score shards built for this matrix (see prune_artifacts)
+            "matrix_fingerprint": matrix_fingerprint(job_features.tocsr()),
+            "vocabulary": vectorizer.get_feature_names_out().tolist(),
+            # Lets verify_artifact detect truncated or corrupted files
+            "checksums": {name: file_digest(os.path.join(staging, name)) for name in sorted(os.listdir(staging))},
+        }
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as file:
+            json.dump(manifest, file)
+
+        _move_into_place(staging, target)
+        log_event(f"TF-IDF artifacts saved to {target}")
+        return target
+    except Exception as e:
+        log_event(f"Error saving TF-IDF artifacts: {e}", level="error")
+        return None
+
+
+@log_execution_time
+def load_artifacts(cache_key, vectorizer_params, artifact_dir=None):
+    """
+    Load a previously fitted vectorizer and job matrix.
+    The matrix and the job columns are memory-mapped rather than read.
+    Args:
+        cache_key (str): Key returned by artifact_key.
+        vectorizer_params (dict): Keyword arguments the vectorizer was fitted with.
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        dict: Vectorizer, job features, manifest, row index, dropped duplicates, job store
+            and job titles, or None on a cache miss.
+    """
+    source = _artifact_path(cache_key, artifact_dir)
+    if not os.path.isfile(os.path.join(source, MANIFEST_FILE)):
+        return None
+    try:
+        with open(os.path.join(source, MANIFEST_FILE)) as file:
+            manifest = json.load(file)
+        if "shape" not in manifest:
+            log_event(f"Artifact {cache_key} predates the memory-mapped layout, ignoring it", level="warning")
+            return None
+        job_features = load_csr(source, manifest["shape"])
+
+        # Rebuild the vectorizer from its vocabulary; only transform() is needed on a warm start
+        vectorizer = build_vectorizer(vectorizer_params, vocabulary=manifest["vocabulary"])
+        vectorizer.idf_ = np.load(os.path.join(source, IDF_FILE))
+        if "vocabulary_stats" in manifest:
+            vectorizer.vocabulary_stats_ = manifest["vocabulary_stats"]
+
+        row_index = None
+        if os.path.isfile(os.path.join(source, ROW_KEYS_FILE)):
+            row_index = (
+                np.load(os.path.join(source, ROW_KEYS_FILE)),
+                np.load(os.path.join(source, ROW_HASHES_FILE)),
+            )
+        duplicates_path = os.path.join(source, DUPLICATES_FILE)
+        duplicates = np.load(duplicates_path) if os.path.isfile(duplicates_path) else None
+        jobs = open_job_store(source)
+        job_titles = jobs.column("Job Title") if jobs is not None and "Job Title" in jobs else None
+        log_event(f"TF-IDF artifacts loaded from {source}")
+        return {
+            "vectorizer": vectorizer,
+            "job_features": job_features,
+            "manifest": manifest,
+            "row_index": row_index,
+            "duplicates": duplicates,
+            "jobs": jobs,
+            "job_titles": job_titles,
+        }
+    except Exception as e:
+        log_event(f"Error loading TF-IDF artifacts: {e}", level="error")
+        return None
+
+
+def find_latest_artifact(fingerprint, artifact_dir=None):
+    """
+    Find the most recent artifact fitted with the given settings, whatever its CSV.
+    Args:
+        fingerprint (str): Value returned by params_fingerprint.
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        str: Cache key of the newest matching artifact, or None if there is none.
+    """
+    root = artifact_dir or CONFIG["ARTIFACT_DIR"]
+    if not os.path.isdir(root):
+        return None
+
+    latest_key, latest_time = None, -1.0
+    for entry in os.listdir(root):
+        manifest_path = os.path.join(root, entry, MANIFEST_FILE)
+        if not os.path.isfile(manifest_path):
+            continue
+        try:
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            continue
+        if manifest.get("fingerprint") == fingerprint and manifest["created_at"] > latest_time:
+            latest_key, latest_time = manifest["key"], manifest["created_at"]
+    return latest_key
+
+
+def publish_artifact(cache_key, artifact_dir=None):
+    """
+    Mark an artifact as the one long-lived scoring processes should serve.
+    The pointer file is replaced atomically, so readers see the old or the new key.
+    Args:
+        cache_key (str): Key of a saved artifact.
+        artifact_dir (str): Root directory of the artifact store.
+    """
+    root = artifact_dir or CONFIG["ARTIFACT_DIR"]
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".{CURRENT_FILE}.{os.getpid()}")
+    with open(staging, "w") as file:
+        json.dump({"key": cache_key, "published_at": time.time()}, file)
+    os.replace(staging, os.path.join(root, CURRENT_FILE))
+    log_event(f"Published TF-IDF artifact {cache_key}")
+
+
+def prune_artifacts(keep=None, artifact_dir=None):
+    """
+    Delete superseded artifacts: everything but the published one and the `keep` newest,
+    together with the ANN indexes and score shards built for their matrices.
+    Files that cannot be removed (for example still mapped on Windows) are left for the
+    next run.
+    Args:
+        keep (int): Newest artifacts to keep besides the published one; defaults to
+            CONFIG["ARTIFACT_KEEP"].
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        int: Number of artifacts and derived indexes removed.
+    """
+    root = artifact_dir or CONFIG["ARTIFACT_DIR"]
+    keep = CONFIG["ARTIFACT_KEEP"] if keep is None else keep
+    if not os.path.isdir(root):
+        return 0
+
+    manifests = {}
+    for entry in os.listdir(root):
+        try:
+            with open(os.path.join(root, entry, MANIFEST_FILE)) as file:
+                manifests[entry] = json.load(file)
+        except (OSError, ValueError):
+            continue
+    newest = sorted(manifests, key=lambda key: manifests[key].get("created_at", 0), reverse=True)
+    kept = set(newest[:keep]) | {current_artifact(root)}
+    stale = [key for key in manifests if key not in kept]
+
+    # Derived indexes are named by matrix; older manifests lack the fingerprint, so while
+    # one of those is kept no derived index can be attributed safely
+    live = {manifests[key].get("matrix_fingerprint") for key in kept if key in manifests}
+    if None not in live:
+        prefixes = {fingerprint[:16] for fingerprint in live}
+        stale.extend(
+            entry for entry in os.listdir(root)
+            if entry.startswith(DERIVED_PREFIXES) and entry.split("_")[1][:16] not in prefixes
+        )
+
+    removed = 0
+    for entry in stale:
+        path = os.path.join(root, entry)
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            removed += 1
+        except OSError as e:
+            log_event(f"Could not remove superseded artifact {entry}: {e}", level="warning")
+    if removed:
+        log_event(f"Pruned {removed} superseded artifacts and indexes from {root}")
+    return removed
+
+
+def current_artifact(artifact_dir=None):
+    """
+    Read the published artifact pointer.
+    Args:
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        str: Key of the published artifact, or None if nothing was published.
+    """
+    try:
+        with open(os.path.join(artifact_dir or CONFIG["ARTIFACT_DIR"], CURRENT_FILE)) as file:
+            return json.load(file)["key"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+@log_execution_time
+def verify_artifact(cache_key, artifact_dir=None):
+    """
+    Check the files of a stored artifact against the checksums in its manifest.
+    Args:
+        cache_key (str): Key of a saved artifact.
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        list: Problems found (missing or mismatching files); empty if the artifact is intact.
+    """
+    source = _artifact_path(cache_key, artifact_dir)
+    try:
+        with open(os.path.join(source, MANIFEST_FILE)) as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        return [f"{MANIFEST_FILE}: {e}"]
+
+    checksums = manifest.get("checksums")
+    if checksums is None:
+        # Saved before checksums were recorded; only the manifest can be checked
+        log_event(f"Artifact {cache_key} has no checksums to verify", level="warning")
+        return []
+
+    problems = []
+    for name, expected in checksums.items():
+        path = os.path.join(source, name)
+        if not os.path.isfile(path):
+            problems.append(f"{name}: missing")
+        elif file_digest(path) != expected:
+            problems.append(f"{name}: checksum mismatch")
+    return problems
@@ -0,0 +1,166 @@
+# compaction.py
+"""
+This module shrinks the TF-IDF job matrix: float32 weights, int32 indices and optional
+pruning of near-zero weights in each row. A report compares the memory saved against
+how far similarity scores drift from the full-precision matrix.
+"""
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from config import CONFIG
+from logs.log_config import log_event, log_execution_time
+
+REPORT_BLOCK_ROWS = 10_000  # job rows scored at a time by compaction_report
+
+
+def compaction_params():
+    """
+    The compaction settings, for fingerprinting artifacts built with them.
+    Returns:
+        dict: Weight dtype and prune threshold.
+    """
+    return {
+        "dtype": CONFIG.get("FEATURE_DTYPE", "float64"),
+        "prune_threshold": CONFIG.get("PRUNE_THRESHOLD", 0.0),
+    }
+
+
+def matrix_nbytes(matrix):
+    """
+    Memory held by a CSR/CSC matrix's arrays.
+    Args:
+        matrix (sparse matrix): Compressed sparse matrix.
+    Returns:
+        int: Bytes of data, indices and indptr.
+    """
+    return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+
+@log_execution_time
+def compact_features(job_features, dtype=None, prune_threshold=None):
+    """
+    Convert a TF-IDF matrix to the compact representation.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        dtype (str): Weight dtype; defaults to CONFIG["FEATURE_DTYPE"].
+        prune_threshold (float): Weights below this are dropped from each L2-normalized
+            row; defaults to CONFIG["PRUNE_THRESHOLD"]. 0 keeps every weight.
+    Returns:
+        sparse.csr_matrix: Compact matrix (the input itself when nothing changes).
+    """
+    params = compaction_params()
+    dtype = np.dtype(dtype or params["dtype"])
+    prune_threshold = params["prune_threshold"] if prune_threshold is None else prune_threshold
+
+    matrix = job_features.tocsr()
+    if prune_threshold > 0:
+        keep = np.abs(matrix.data) >= prune_threshold
+        if not keep.all():
+            # Rebuild the row pointers from the per-row count of surviving weights
+            rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+            row_counts = np.bincount(rows[keep], minlength=matrix.shape[0])
+            indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+            np.cumsum(row_counts, out=indptr[1:])
+            matrix = sparse.csr_matrix(
+                (matrix.data[keep], matrix.indices[keep], indptr), shape=matrix.shape
+            )
+
+    index_dtype = np.int32 if matrix.nnz < np.iinfo(np.int32).max else np.int64
+    if matrix.dtype == dtype and matrix.indices.dtype == index_dtype and matrix.indptr.dtype == index_dtype:
+        return matrix
+    return sparse.csr_matrix(
+        (
+            matrix.data.astype(dtype, copy=False),
+            matrix.indices.astype(index_dtype, copy=False),
+            matrix.indptr.astype(index_dtype, copy=False),
+        ),
+        shape=matrix.shape,
+    )
+
+
+def _merge_top_k(best, block_scores, offset, top_k):
+    """
+    Fold one block of scores into the running top K of every query.
+    Args:
+        best (tuple): Scores and job rows (queries x K) kept so far, or None.
+        block_scores (np.ndarray): Jobs x queries scores of the block; zeros never rank.
+        offset (int): Job row of the block's first row.
+        top_k (int): K.
+    Returns:
+        tuple: Updated scores and job rows, -inf where a query has fewer than K matches.
+    """
+    scores = np.where(block_scores > 0, block_scores, -np.inf).T
+    rows = np.broadcast_to(offset + np.arange(scores.shape[1]), scores.shape)
+    if best is not None:
+        scores, rows = np.hstack([best[0], scores]), np.hstack([best[1], rows])
+    if scores.shape[1] > top_k:
+        keep = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+        scores, rows = np.take_along_axis(scores, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+    return scores, rows
+
+
+@log_execution_time
+def compaction_report(job_features, compact, n_queries=100, top_k=None):
+    """
+    Compare a compact matrix against the full-precision one it was built from.
+    Sampled job rows serve as queries, so no CV is needed. Job rows are scored in blocks
+    of REPORT_BLOCK_ROWS keeping only the running top K, so the report never holds a
+    jobs x queries score matrix.
+    Args:
+        job_features (sparse matrix): Original TF-IDF matrix.
+        compact (sparse matrix): Output of compact_features.
+        n_queries (int): Number of job rows sampled as queries.
+        top_k (int): K for the top-K overlap; defaults to CONFIG["TOP_N_JOBS"].
+    Returns:
+        dict: Memory before and after, saving, score drift and top-K overlap.
+    """
+    top_k = top_k or CONFIG["TOP_N_JOBS"]
+    original_bytes, compact_bytes = matrix_nbytes(job_features), matrix_nbytes(compact)
+    job_features, compact = job_features.tocsr(), compact.tocsr()
+    rows = np.unique(np.linspace(0, job_features.shape[0] - 1, min(n_queries, job_features.shape[0])).astype(int))
+    exact_queries, approx_queries = normalize(job_features[rows]).T, normalize(compact[rows]).T
+
+    drift = np.zeros(len(rows))
+    best_exact = best_approx = None
+    for start in range(0, job_features.shape[0], REPORT_BLOCK_ROWS):
+        block = slice(start, start + REPORT_BLOCK_ROWS)
+        exact = (normalize(job_features[block]) @ exact_queries).toarray()
+        approx = (normalize(compact[block]) @ approx_queries).toarray().astype(exact.dtype)
+        drift = np.maximum(drift, np.abs(exact - approx).max(axis=0, initial=0))
+        best_exact = _merge_top_k(best_exact, exact, start, top_k)
+        best_approx = _merge_top_k(best_approx, approx, start, top_k)
+
+    overlaps = []
+    if best_exact is not None:
+        for exact_scores, exact_rows, approx_scores, approx_rows in zip(*best_exact, *best_approx):
+            best = set(exact_rows[np.isfinite(exact_scores)].tolist())
+            found = set(approx_rows[np.isfinite(approx_scores)].tolist())
+            overlaps.append(len(best & found) / max(len(best), 1))
+
+    report = {
+        "original_bytes": int(original_bytes),
+        "compact_bytes": int(compact_bytes),
+        "saved_fraction": 1 - compact_bytes / max(original_bytes, 1),
+        "original_nnz": int(job_features.nnz),
+        "compact_nnz": int(compact.nnz),
+        "max_score_drift": float(drift.max()) if len(drift) else 0.0,
+        "mean_score_drift": float(drift.mean()) if len(drift) else 0.0,
+        f"top{top_k}_overlap": float(np.mean(overlaps)) if overlaps else 1.0,
+    }
+    log_event(f"Feature compaction: {report}")
+    return report
+
+
+def compact_with_report(job_features):
+    """
+    Compact a freshly built matrix and, with CONFIG["COMPACTION_REPORT"], measure what
+    the compaction cost.
+    Args:
+        job_features (sparse matrix): Full-precision TF-IDF matrix.
+    Returns:
+        tuple: Compact matrix and the report (None when disabled or nothing changed).
+    """
+    compact = compact_features(job_features)
+    if compact is job_features or not CONFIG.get("COMPACTION_REPORT", False):
+        return compact, None
+    return compact, compaction_report(job_features, compact)
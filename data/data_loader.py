@@ -2,13 +2,31 @@
 """
 This module handles loading and preprocessing of datasets.
 """
+import os
 import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer, ENGLISH_STOP_WORDS
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-import config
+from config import CONFIG
+from data.text_engine import (
+    all_stop_words, build_vectorizer,
+    lemmatize_documents, normalize_document, normalize_documents
+)
+from data.vocabulary import VocabularyBuild, fit_vectorizer_two_pass
 from logs.log_config import log_event, log_execution_time
 
+# converts text into numerical values based on term frequency and inverse document frequency
+TFIDF_PARAMS = {
+    "stop_words": "english",
+    "max_features": CONFIG["TFIDF_MAX_FEATURES"],
+    "ngram_range": tuple(CONFIG["TFIDF_NGRAM_RANGE"]),
+    "min_df": CONFIG["TFIDF_MIN_DF"],
+    "max_df": CONFIG["TFIDF_MAX_DF"],
+}
+
+# Normalized token lists produced by preprocess_csv
+TOKENS_COLUMN = 'Job Tokens'
+
+# The only columns the pipeline needs, read with explicit dtypes when streaming
+JOB_COLUMNS = {'Job Title': 'string', 'Job Description': 'string'}
+
 @log_execution_time
 def load_csv(file_path):
     """
@@ -27,6 +45,21 @@ def load_csv(file_path):
         log_event(f"Error loading CSV: {e}", level="error")
         return None
 
+def iter_csv_chunks(file_path, chunk_size, columns=None):
+    """
+    Stream the job listings CSV in fixed-size chunks, reading only the needed columns.
+    Args:
+        file_path (str): Path to the CSV file.
+        chunk_size (int): Rows per chunk.
+        columns (dict): Column names mapped to dtypes; defaults to JOB_COLUMNS.
+    Yields:
+        pd.DataFrame: Chunk of job data without missing descriptions.
+    """
+    columns = columns or JOB_COLUMNS
+    reader = pd.read_csv(file_path, usecols=list(columns), dtype=columns, chunksize=chunk_size)
+    for chunk in reader:
+        yield drop_missing_descriptions(chunk)
+
 @log_execution_time
 def load_cv(file_path):
     """
@@ -47,26 +80,58 @@ def load_cv(file_path):
         return None
 
 @log_execution_time
-def preprocess_csv(data):
+def load_cvs(sources):
+    """
+    Load several CV text files at once.
+    Args:
+        sources (str or list): Directory containing .txt CVs, or a list of CV file paths.
+    Returns:
+        dict: CV name (file name without extension) mapped to its content, in sorted path order.
+    """
+    if isinstance(sources, str) and os.path.isdir(sources):
+        sources = [
+            os.path.join(sources, name) for name in os.listdir(sources)
+            if name.lower().endswith(".txt")
+        ]
+    cvs = {}
+    for path in sorted(sources):
+        cv_content = load_cv(path)
+        if cv_content:
+            cvs[os.path.splitext(os.path.basename(path))[0]] = cv_content
+    return cvs
+
+@log_execution_time
+def preprocess_csv(data, workers=None):
     """
     Preprocess job listings data.
     Args:
         data (pd.DataFrame): Raw job data.
+        workers (int): Lemmatization worker processes; defaults to CONFIG["PREPROCESS_WORKERS"].
     Returns:
-        pd.DataFrame: Processed job data.
+        pd.DataFrame: Job data with normalized tokens in the 'Job Tokens' column.
     """
     # Drop rows with missing job descriptions
-    data = data.dropna(subset=['Job Description'])
-    data.reset_index(drop=True, inplace=True)
+    data = drop_missing_descriptions(data)
 
-    # Remove stop words and lemmatize job descriptions
-    data['Job Description'] = remove_stop_words(data['Job Description'])
-    data['Job Description'] = lemmatize_text(data['Job Description'])
+    # Tokenize, remove stop words and lemmatize job descriptions in a single pass
+    data[TOKENS_COLUMN] = normalize_documents(data['Job Description'].tolist(), workers=workers)
 
     log_event("CSV preprocessed successfully!")
     print("CSV preprocessed successfully!")
     return data
 
+def drop_missing_descriptions(data):
+    """
+    Drop job listings without a description, keeping rows aligned with the TF-IDF matrix.
+    Args:
+        data (pd.DataFrame): Raw job data.
+    Returns:
+        pd.DataFrame: Job data with a fresh index.
+    """
+    data = data.dropna(subset=['Job Description'])
+    data.reset_index(drop=True, inplace=True)
+    return data
+
 @log_execution_time
 def preprocess_cv(cv_content):
     """
@@ -74,34 +139,73 @@ def preprocess_cv(cv_content):
     Args:
         cv_content (str): Raw CV content.
     Returns:
-        str: Processed CV content.
+        list: Normalized CV tokens.
     """
-    # Remove stop words and lemmatize CV content
-    cv_content = remove_stop_words(pd.Series([cv_content])).iloc[0]
-    cv_content = lemmatize_text(pd.Series([cv_content])).iloc[0]
+    # Tokenize, remove stop words and lemmatize CV content in a single pass
+    cv_content = normalize_document(cv_content)
 
     log_event("CV preprocessed successfully!")
     print("CV preprocessed successfully!")
     return cv_content
 
+@log_execution_time
+def preprocess_cvs(cvs, workers=None):
+    """
+    Preprocess several CVs in one batch.
+    Args:
+        cvs (dict): CV names mapped to raw content.
+        workers (int): Normalization worker processes.
+    Returns:
+        dict: CV names mapped to normalized tokens.
+    """
+    tokens = normalize_documents(list(cvs.values()), workers=workers)
+    return dict(zip(cvs.keys(), tokens))
+
 @log_execution_time
 def featurize_text(job_descriptions, cv_content):
     """
     Convert job descriptions and CV into numerical features using TF-IDF.
     Args:
-        job_descriptions (pd.Series): List of job descriptions.
-        cv_content (str): The user's CV content.
+        job_descriptions (pd.Series): Normalized job description tokens.
+        cv_content (list): Normalized CV tokens.
     Returns:
         tuple: TF-IDF matrix for job descriptions, and CV vector.
     """
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=500, ngram_range=(1,2)) # converts text into numerical values based on term frequency and inverse document frequency
-    job_features = vectorizer.fit_transform(job_descriptions)
+    vectorizer, job_features = fit_vectorizer(job_descriptions)
     cv_vector = vectorizer.transform([cv_content])
 
     log_event("Text featurized successfully!")
     print("Text featurized successfully!")
     return job_features, cv_vector, vectorizer.get_feature_names_out()
 
+@log_execution_time
+def fit_vectorizer(job_descriptions):
+    """
+    Fit the TF-IDF vectorizer on the job descriptions.
+    CONFIG["VOCABULARY_MODE"] selects how the vocabulary is built; build time, peak memory
+    and pruning figures are logged and kept as the vectorizer's vocabulary_stats_.
+    Args:
+        job_descriptions (pd.Series): Normalized job description tokens.
+    Returns:
+        tuple: Fitted vectorizer and TF-IDF matrix for job descriptions.
+    """
+    mode = CONFIG.get("VOCABULARY_MODE", "exact")
+    with VocabularyBuild(mode) as build:
+        if mode == "two_pass":
+            vectorizer, job_features, candidate_terms = fit_vectorizer_two_pass(job_descriptions, TFIDF_PARAMS)
+        else:
+            vectorizer = build_vectorizer(TFIDF_PARAMS)
+            job_features = vectorizer.fit_transform(job_descriptions)
+            # Older scikit-learn keeps every pruned term; only its size is worth keeping
+            pruned = getattr(vectorizer, "stop_words_", None)
+            candidate_terms = len(vectorizer.vocabulary_) + len(pruned) if pruned is not None else None
+            if pruned is not None:
+                del vectorizer.stop_words_
+    vectorizer.vocabulary_stats_ = build.finish(
+        len(vectorizer.vocabulary_), candidate_terms, job_features.shape[0]
+    )
+    return vectorizer, job_features
+
 @log_execution_time
 def remove_stop_words(text_series):
     """
@@ -111,11 +215,9 @@ def remove_stop_words(text_series):
     Returns:
         pd.Series: Text series with stop words removed.
     """
-    # create custom list based off of results
+    # custom list is appended from config.py (built once, not on every call)
     # user should iterate a couple of times to ensure only relevant words are present, make edits on config.py if necessary.
-    CUSTOM_STOP_WORDS = config.CONFIG.get("CUSTOM_STOP_WORDS")
-    # append custom list
-    ALL_STOP_WORDS = ENGLISH_STOP_WORDS.union(CUSTOM_STOP_WORDS)
+    ALL_STOP_WORDS = all_stop_words()
 
     def clean_text(text):
         words = text.split()
@@ -124,18 +226,14 @@ def remove_stop_words(text_series):
     return text_series.apply(clean_text)
 
 @log_execution_time
-def lemmatize_text(text_series):
+def lemmatize_text(text_series, workers=None):
     """
     Lemmatize words in a series of text data.
     Args:
         text_series (pd.Series): Series of text (job descriptions or CV).
+        workers (int): Worker processes; defaults to CONFIG["PREPROCESS_WORKERS"].
     Returns:
         pd.Series: Text series with words lemmatized.
     """
-    lemmatizer = WordNetLemmatizer()
-
-    def lemmatize_words(text):
-        words = word_tokenize(text)
-        return " ".join([lemmatizer.lemmatize(word) for word in words])
-
-    return text_series.apply(lemmatize_words)
\ No newline at end of file
+    lemmatized = lemmatize_documents(text_series.tolist(), workers=workers)
+    return pd.Series(lemmatized, index=text_series.index, dtype=object)
@@ -0,0 +1,271 @@
+# dedup.py
+"""
+This module finds duplicate and near-duplicate job postings in normalized descriptions.
+Exact duplicates share a hash of their tokens. Near-duplicates are found with MinHash
+signatures of word shingles and LSH banding: postings that share a band bucket become
+candidates, and a candidate is merged into the bucket's first posting when their
+signatures agree on at least the configured share of positions. Every step is a
+vectorized pass over the corpus, so the cost grows linearly with the number of postings.
+"""
+import time
+from itertools import chain
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from config import CONFIG
+from logs.log_config import log_event, log_execution_time
+
+DUPLICATE_COUNT_COLUMN = "Duplicate Count"
+
+# Odd 64-bit multiplier for combining hashes (wrapping arithmetic)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def dedup_params():
+    """
+    The deduplication settings, for fingerprinting artifacts built with them.
+    Returns:
+        dict: Whether deduplication runs and how near-duplicates are matched.
+    """
+    if not CONFIG.get("DEDUP_POSTINGS", False):
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "threshold": CONFIG["DEDUP_THRESHOLD"],
+        "num_perm": CONFIG["DEDUP_NUM_PERM"],
+        "bands": CONFIG["DEDUP_BANDS"],
+        "shingle_size": CONFIG["DEDUP_SHINGLE_SIZE"],
+    }
+
+
+def _combine(columns):
+    # Order-sensitive hash of several uint64 columns
+    combined = np.zeros(len(columns[0]), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for column in columns:
+            combined = combined * _MIX + column.astype(np.uint64, copy=False)
+    return combined
+
+
+def _token_hashes(token_lists):
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+    flat = np.empty(int(lengths.sum()), dtype=object)
+    flat[:] = list(chain.from_iterable(token_lists))
+    return pd.util.hash_array(flat), lengths
+
+
+def content_hashes(token_lists):
+    """
+    Hash of each posting's token sequence; equal hashes mark exact duplicates.
+    Args:
+        token_lists (list): Normalized tokens of each posting.
+    Returns:
+        np.ndarray: uint64 hash per posting.
+    """
+    joined = np.empty(len(token_lists), dtype=object)
+    joined[:] = [" ".join(tokens) for tokens in token_lists]
+    return pd.util.hash_array(joined)
+
+
+def shingle_hashes(token_lists, shingle_size=3):
+    """
+    Hashes of the overlapping word n-grams of every posting.
+    Postings shorter than the shingle size get one shingle of all their words.
+    Args:
+        token_lists (list): Normalized tokens of each posting.
+        shingle_size (int): Words per shingle.
+    Returns:
+        tuple: uint64 shingle hashes grouped by posting, and the index of each
+            posting's first shingle (postings without tokens have none).
+    """
+    token_hashes, lengths = _token_hashes(token_lists)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    position = np.arange(len(token_hashes)) - offsets[owner]
+
+    starts = np.flatnonzero((position + shingle_size <= lengths[owner]) | ((position == 0) & (lengths[owner] < shingle_size)))
+    parts = []
+    for offset in range(shingle_size):
+        inside = position[starts] + offset < lengths[owner[starts]]
+        index = np.minimum(starts + offset, max(len(token_hashes) - 1, 0))
+        parts.append(np.where(inside, token_hashes[index] if len(token_hashes) else 0, 0))
+    shingles = _combine(parts) if len(starts) else np.zeros(0, dtype=np.uint64)
+
+    counts = np.bincount(owner[starts], minlength=len(lengths))
+    first = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(counts, out=first[1:])
+    return shingles, first
+
+
+def minhash_signatures(token_lists, num_perm=64, shingle_size=3, seed=0, block_size=10_000):
+    """
+    MinHash signature of every posting's shingle set.
+    Shingles are hashed in blocks of postings to bound memory.
+    Args:
+        token_lists (list): Normalized tokens of each posting.
+        num_perm (int): Signature length.
+        shingle_size (int): Words per shingle.
+        seed (int): Seed of the hash permutations.
+        block_size (int): Postings hashed at a time.
+    Returns:
+        tuple: (n_postings, num_perm) uint32 signatures and a mask of postings that have
+            at least one shingle.
+    """
+    rng = np.random.default_rng(seed)
+    multipliers = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    offsets = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(token_lists), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has_shingles = np.zeros(len(token_lists), dtype=bool)
+    for block in range(0, len(token_lists), block_size):
+        shingles, first = shingle_hashes(token_lists[block:block + block_size], shingle_size)
+        present = np.flatnonzero(np.diff(first) > 0)
+        if not len(present):
+            continue
+        has_shingles[block + present] = True
+        with np.errstate(over="ignore"):
+            for perm in range(num_perm):
+                # Multiply-shift hashing: the high 32 bits of a*x + b
+                values = ((shingles * multipliers[perm] + offsets[perm]) >> np.uint64(32)).astype(np.uint32)
+                signatures[block + present, perm] = np.minimum.reduceat(values, first[present])
+    return signatures, has_shingles
+
+
+def first_of_group(keys):
+    """
+    Args:
+        keys (np.ndarray): Hash or key per row.
+    Returns:
+        np.ndarray: Position of the first row sharing each row's key.
+    """
+    codes, _ = pd.factorize(keys)
+    _, first = np.unique(codes, return_index=True)
+    return first[codes]
+
+
+def near_duplicate_edges(signatures, candidates, bands=8, threshold=0.9):
+    """
+    LSH banding: link each posting to the first posting of a shared band bucket when
+    their signatures agree on at least `threshold` of the positions.
+    Args:
+        signatures (np.ndarray): MinHash signatures.
+        candidates (np.ndarray): Mask of postings to consider.
+        bands (int): Number of bands; each band covers signature length // bands positions.
+        threshold (float): Minimum estimated Jaccard similarity.
+    Returns:
+        tuple: Arrays of linked posting pairs.
+    """
+    rows_per_band = signatures.shape[1] // bands
+    positions = np.flatnonzero(candidates)
+    sources, targets = [], []
+    for band in range(bands):
+        columns = signatures[positions, band * rows_per_band:(band + 1) * rows_per_band]
+        first = positions[first_of_group(_combine(list(columns.T)))]
+        linked = np.flatnonzero(first != positions)
+        if not len(linked):
+            continue
+        agreement = (signatures[positions[linked]] == signatures[first[linked]]).mean(axis=1)
+        similar = linked[agreement >= threshold]
+        sources.append(positions[similar])
+        targets.append(first[similar])
+    if not sources:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def cluster_representatives(n_postings, sources, targets):
+    """
+    Group linked postings and pick the earliest posting of each group.
+    Args:
+        n_postings (int): Number of postings.
+        sources (np.ndarray): Linked posting pairs, first half.
+        targets (np.ndarray): Linked posting pairs, second half.
+    Returns:
+        np.ndarray: Position of each posting's representative (itself when unique).
+    """
+    if not n_postings:
+        return np.zeros(0, dtype=np.int64)
+    graph = sparse.coo_matrix(
+        (np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_postings, n_postings)
+    )
+    _, labels = connected_components(graph, directed=False)
+    earliest = np.full(labels.max() + 1, n_postings, dtype=np.int64)
+    np.minimum.at(earliest, labels, np.arange(n_postings))
+    return earliest[labels]
+
+
+@log_execution_time
+def find_duplicates(token_lists, threshold=None, num_perm=None, bands=None, shingle_size=None):
+    """
+    Cluster exact and near-duplicate postings.
+    Args:
+        token_lists (list): Normalized tokens of each posting.
+        threshold (float): Estimated Jaccard similarity for near-duplicates; 1.0 only
+            merges exact duplicates. Defaults to CONFIG["DEDUP_THRESHOLD"].
+        num_perm (int): Defaults to CONFIG["DEDUP_NUM_PERM"].
+        bands (int): Defaults to CONFIG["DEDUP_BANDS"].
+        shingle_size (int): Defaults to CONFIG["DEDUP_SHINGLE_SIZE"].
+    Returns:
+        tuple: Representative position of every posting, and the number of postings
+            that are exact duplicates of an earlier one.
+    """
+    threshold = CONFIG["DEDUP_THRESHOLD"] if threshold is None else threshold
+    num_perm = num_perm or CONFIG["DEDUP_NUM_PERM"]
+    bands = bands or CONFIG["DEDUP_BANDS"]
+    shingle_size = shingle_size or CONFIG["DEDUP_SHINGLE_SIZE"]
+
+    n_postings = len(token_lists)
+    exact_first = first_of_group(content_hashes(token_lists))
+    exact = np.flatnonzero(exact_first != np.arange(n_postings))
+    sources, targets = [exact], [exact_first[exact]]
+
+    if threshold < 1.0:
+        # Exact duplicates are already linked; sign only one posting per content
+        unique = exact_first == np.arange(n_postings)
+        signatures, has_shingles = minhash_signatures(
+            [token_lists[i] for i in np.flatnonzero(unique)], num_perm, shingle_size
+        )
+        full = np.zeros((n_postings, num_perm), dtype=np.uint32)
+        full[unique] = signatures
+        candidates = np.zeros(n_postings, dtype=bool)
+        candidates[unique] = has_shingles
+        near_sources, near_targets = near_duplicate_edges(full, candidates, bands, threshold)
+        sources.append(near_sources)
+        targets.append(near_targets)
+
+    representatives = cluster_representatives(n_postings, np.concatenate(sources), np.concatenate(targets))
+    return representatives, len(exact)
+
+
+@log_execution_time
+def deduplicate_jobs(jobs_data, tokens_column):
+    """
+    Keep one posting per duplicate cluster, recording how many postings it stands for.
+    Args:
+        jobs_data (pd.DataFrame): Preprocessed job data.
+        tokens_column (str): Column of normalized description tokens.
+    Returns:
+        tuple: Deduplicated job data (with a DUPLICATE_COUNT_COLUMN of removed copies and
+            a fresh index), the representative position of every input row, and a report.
+    """
+    start = time.perf_counter_ns()
+    representatives, exact_removed = find_duplicates(jobs_data[tokens_column].tolist())
+    keep = np.flatnonzero(representatives == np.arange(len(jobs_data)))
+
+    # A fresh index keeps labels equal to TF-IDF row positions, as drop_missing_descriptions does
+    deduplicated = jobs_data.iloc[keep].reset_index(drop=True)
+    deduplicated[DUPLICATE_COUNT_COLUMN] = np.bincount(representatives, minlength=len(jobs_data))[keep] - 1
+    removed = len(jobs_data) - len(keep)
+    report = {
+        "rows_in": len(jobs_data),
+        "rows_out": len(keep),
+        "removed": removed,
+        "exact_duplicates": exact_removed,
+        "near_duplicates": removed - exact_removed,
+        "seconds": (time.perf_counter_ns() - start) / 1e9,
+    }
+    log_event(f"Deduplication: {report}")
+    print(f"Removed {removed} duplicate postings ({exact_removed} exact)")
+    return deduplicated, representatives, report
@@ -0,0 +1,280 @@
+# ingest.py
+"""
+This module builds the job feature matrix, reusing stored artifacts where possible.
+"""
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import config
+from data.artifact_store import (
+    artifact_key, params_fingerprint, load_artifacts,
+    save_artifacts, find_latest_artifact, publish_artifact, prune_artifacts
+)
+from data.compaction import compact_features, compact_with_report
+from data.dedup import DUPLICATE_COUNT_COLUMN, cluster_representatives, deduplicate_jobs, first_of_group
+from data.data_loader import (
+    load_csv, preprocess_csv, drop_missing_descriptions,
+    fit_vectorizer, TFIDF_PARAMS, TOKENS_COLUMN
+)
+from logs.log_config import log_event, log_execution_time
+
+
+def row_fingerprints(jobs_data):
+    """
+    Compute a stable key and a content hash for every job listing.
+    The key comes from CONFIG["JOB_KEY_COLUMN"] when that column exists, so an edited
+    posting is detected as changed; otherwise the content hash doubles as the key.
+    Args:
+        jobs_data (pd.DataFrame): Raw job data without missing descriptions.
+    Returns:
+        tuple: Arrays of uint64 row keys and row hashes.
+    """
+    content_columns = [column for column in ('Job Title', 'Job Description') if column in jobs_data]
+    row_hashes = pd.util.hash_pandas_object(jobs_data[content_columns], index=False).to_numpy()
+
+    key_column = config.CONFIG.get("JOB_KEY_COLUMN")
+    if key_column and key_column in jobs_data:
+        row_keys = pd.util.hash_pandas_object(jobs_data[key_column], index=False).to_numpy()
+    else:
+        row_keys = row_hashes
+    return row_keys, row_hashes
+
+
+def drop_duplicate_postings(processed, row_index):
+    """
+    Deduplicate preprocessed job data together with its row index.
+    Args:
+        processed (pd.DataFrame): Preprocessed job data.
+        row_index (tuple): Row keys and row hashes aligned with processed.
+    Returns:
+        tuple: Deduplicated job data, its row index, and the keys, content hashes and
+            representative keys (3 x n) of the dropped rows.
+    """
+    deduplicated, representatives, report = deduplicate_jobs(processed, TOKENS_COLUMN)
+    row_keys, row_hashes = row_index
+    kept = representatives == np.arange(len(representatives))
+    dropped = np.flatnonzero(~kept)
+    duplicates = np.vstack([row_keys[dropped], row_hashes[dropped], row_keys[representatives[dropped]]])
+    return deduplicated, (row_keys[kept], row_hashes[kept]), duplicates, report
+
+
+def skip_known_duplicates(jobs_data, row_index, known):
+    """
+    Drop exact copies within the CSV and rows an earlier ingest found to duplicate
+    another row, before incremental diffing. A dropped row whose representative left
+    the feed is kept again. Near-duplicates among new rows are found by the next full fit.
+    Args:
+        jobs_data (pd.DataFrame): Raw job data without missing descriptions.
+        row_index (tuple): Row keys and row hashes of jobs_data.
+        known (np.ndarray): Dropped duplicates stored with the base artifact, or None.
+    Returns:
+        tuple: Remaining job data (with duplicate counts), its row index and the dropped
+            duplicates (3 x n), as returned by drop_duplicate_postings.
+    """
+    row_keys, row_hashes = row_index
+    positions = np.arange(len(row_keys))
+    representatives = first_of_group(row_hashes)
+
+    if known is not None and known.shape[1]:
+        known_pairs = pd.MultiIndex.from_arrays([known[0], known[1]])
+        unique_pairs = ~known_pairs.duplicated()
+        hit = known_pairs[unique_pairs].get_indexer(pd.MultiIndex.from_arrays([row_keys, row_hashes]))
+        first_seen = ~pd.Index(row_keys).duplicated()
+        lookup = pd.Index(row_keys[first_seen]).get_indexer(known[2][unique_pairs][np.maximum(hit, 0)])
+        found = (hit >= 0) & (lookup >= 0)
+        representatives[found] = np.flatnonzero(first_seen)[lookup[found]]
+
+    # Resolve chains (a copy of a known duplicate) to one representative per group
+    representatives = cluster_representatives(len(positions), positions, representatives)
+    kept = representatives == positions
+    dropped = np.flatnonzero(~kept)
+    if len(dropped):
+        log_event(f"Incremental ingest: skipped {len(dropped)} duplicate postings")
+
+    remaining = jobs_data.iloc[np.flatnonzero(kept)].reset_index(drop=True)
+    remaining[DUPLICATE_COUNT_COLUMN] = np.bincount(representatives, minlength=len(positions))[kept] - 1
+    duplicates = np.vstack([row_keys[dropped], row_hashes[dropped], row_keys[representatives[dropped]]])
+    return remaining, (row_keys[kept], row_hashes[kept]), duplicates
+
+
+def measure_drift(base, row_index):
+    """
+    Match the current rows against a stored artifact and add the new, changed and
+    removed rows to the drift accumulated since its last full IDF fit.
+    Args:
+        base (dict): Stored artifacts returned by load_artifacts, with a row index.
+        row_index (tuple): Row keys and row hashes of the current job data.
+    Returns:
+        tuple: Stored position of each current row (-1 when new), a mask of the rows
+            reused unchanged, and the updated rows_since_fit, which is None when the
+            drift exceeds CONFIG["REFIT_DRIFT_THRESHOLD"] and a refit is due.
+    """
+    row_keys, row_hashes = row_index
+    base_keys, base_hashes = base["row_index"]
+    manifest = base["manifest"]
+
+    # Map each current row to its stored position (first occurrence wins for duplicate keys)
+    first_seen = ~pd.Index(base_keys).duplicated()
+    base_positions = np.flatnonzero(first_seen)
+    lookup = pd.Index(base_keys[first_seen]).get_indexer(row_keys)
+    positions = np.where(lookup >= 0, base_positions[np.maximum(lookup, 0)], -1)
+    reused = (positions >= 0) & (base_hashes[np.maximum(positions, 0)] == row_hashes)
+
+    changed = int(len(reused) - np.count_nonzero(reused))
+    removed = len(base_keys) - np.unique(positions[reused]).size
+    rows_since_fit = manifest.get("rows_since_fit", 0) + changed + removed
+    drift = rows_since_fit / max(manifest.get("fit_rows", 1), 1)
+    log_event(f"Incremental ingest: {changed} new or changed rows, {removed} removed, drift {drift:.2%}")
+    print(f"Incremental ingest: {changed} new or changed rows, {removed} removed")
+
+    if drift > config.CONFIG["REFIT_DRIFT_THRESHOLD"]:
+        log_event("Drift threshold exceeded, running a full IDF refit", level="warning")
+        return positions, reused, None
+    return positions, reused, rows_since_fit
+
+
+@log_execution_time
+def update_job_features(jobs_data, base, row_index):
+    """
+    Append new or changed job listings to a stored TF-IDF matrix with a fixed vocabulary.
+    Unchanged rows are copied from the stored matrix, and their tokens from the stored
+    job data; only the delta is preprocessed and transformed. Returns None when the
+    accumulated drift since the last full IDF fit exceeds CONFIG["REFIT_DRIFT_THRESHOLD"],
+    signalling that a refit is due.
+    Args:
+        jobs_data (pd.DataFrame): Raw job data without missing descriptions.
+        base (dict): Stored artifacts returned by load_artifacts.
+        row_index (tuple): Row keys and row hashes of jobs_data.
+    Returns:
+        tuple: Job data with the 'Job Tokens' column, as preprocess_csv returns it, the
+            TF-IDF matrix aligned with it and the updated manifest fields, or None.
+    """
+    base_features = base["job_features"]
+    manifest = base["manifest"]
+    positions, reused, rows_since_fit = measure_drift(base, row_index)
+    if rows_since_fit is None:
+        return None
+    changed = np.flatnonzero(~reused)
+
+    tokens = np.empty(len(jobs_data), dtype=object)
+    kept = np.flatnonzero(reused)
+    stored = base["jobs"]
+    if stored is not None and TOKENS_COLUMN in stored:
+        stored_tokens = stored.column(TOKENS_COLUMN).take(positions[kept])
+        tokens[kept] = [value.split(" ") if value else [] for value in stored_tokens]
+    elif len(kept):
+        # Stores written without tokens (streamed feeds): the reused rows are normalized
+        # again, but still not transformed
+        tokens[kept] = preprocess_csv(jobs_data.iloc[kept].copy())[TOKENS_COLUMN].tolist()
+
+    if len(changed):
+        delta = preprocess_csv(jobs_data.iloc[changed].copy())
+        tokens[changed] = delta[TOKENS_COLUMN].tolist()
+        delta_features = compact_features(base["vectorizer"].transform(delta[TOKENS_COLUMN]))
+    else:
+        delta_features = sparse.csr_matrix((0, base_features.shape[1]), dtype=base_features.dtype)
+    processed = jobs_data.copy()
+    processed[TOKENS_COLUMN] = tokens.tolist()
+
+    # Stack stored and new rows, then reorder them to follow the CSV
+    order = positions.copy()
+    order[changed] = base_features.shape[0] + np.arange(len(changed))
+    job_features = sparse.vstack([base_features, delta_features], format="csr")[order]
+
+    metadata = {
+        "fingerprint": manifest["fingerprint"],
+        "fit_rows": manifest.get("fit_rows", base_features.shape[0]),
+        "rows_since_fit": rows_since_fit,
+    }
+    # The vocabulary is reused unchanged, and so are the figures of the build that chose it
+    if "vocabulary_stats" in manifest:
+        metadata["vocabulary_stats"] = manifest["vocabulary_stats"]
+    return processed, job_features, metadata
+
+
+@log_execution_time
+def prepare_job_features(csv_path, incremental=None, return_key=False):
+    """
+    Load, preprocess and featurize the job listings, reusing cached artifacts.
+    The cache is keyed by the CSV content, the custom stop words and the vectorizer
+    parameters. On an exact hit the descriptions are neither preprocessed nor refitted.
+    In incremental mode a changed CSV is diffed against the newest stored artifact and
+    only the new or changed rows are processed. With CONFIG["DEDUP_POSTINGS"] duplicate
+    postings are collapsed before featurizing, each kept posting counting its copies.
+    Args:
+        csv_path (str): Path to the CSV file.
+        incremental (bool): Override for CONFIG["INCREMENTAL_INGEST"].
+        return_key (bool): Also return the key of the artifact built or loaded, so callers
+            serve exactly these features rather than whatever is published by then.
+    Returns:
+        tuple: Job data (a JobStore on a cache hit, else a DataFrame), fitted vectorizer
+            and TF-IDF matrix (and the artifact key with return_key), or None if loading failed.
+    """
+    if incremental is None:
+        incremental = config.CONFIG.get("INCREMENTAL_INGEST", False)
+
+    if not os.path.isfile(csv_path):
+        log_event(f"Error loading CSV: {csv_path} does not exist", level="error")
+        return None
+
+    stop_words = config.CONFIG.get("CUSTOM_STOP_WORDS")
+    fingerprint = params_fingerprint(stop_words, TFIDF_PARAMS)
+    cache_key = artifact_key(csv_path, stop_words, TFIDF_PARAMS)
+
+    def result(*values):
+        return (*values, cache_key) if return_key else values
+
+    artifacts = load_artifacts(cache_key, TFIDF_PARAMS)
+    if artifacts is not None and artifacts["jobs"] is not None:
+        # The job store already holds this exact CSV, so it is not parsed again; it is
+        # handed out as is, so columns stay memory-mapped until rows are actually ranked
+        log_event("Using cached TF-IDF artifacts")
+        print("Using cached TF-IDF artifacts")
+        publish_artifact(cache_key)
+        return result(artifacts["jobs"], artifacts["vectorizer"], artifacts["job_features"])
+
+    jobs_data = load_csv(csv_path)
+    if jobs_data is None:
+        return None
+    jobs_data = drop_missing_descriptions(jobs_data)
+
+    row_index = row_fingerprints(jobs_data)
+    dedup = config.CONFIG.get("DEDUP_POSTINGS", False)
+    if incremental:
+        base_key = find_latest_artifact(fingerprint)
+        base = load_artifacts(base_key, TFIDF_PARAMS) if base_key else None
+        if base is not None and base["row_index"] is not None:
+            current, current_index, duplicates = jobs_data, row_index, None
+            if dedup:
+                current, current_index, duplicates = skip_known_duplicates(jobs_data, row_index, base["duplicates"])
+            update = update_job_features(current, base, current_index)
+            if update is not None:
+                processed, job_features, metadata = update
+                save_artifacts(
+                    cache_key, base["vectorizer"], job_features, current_index, metadata, processed,
+                    duplicates=duplicates
+                )
+                publish_artifact(cache_key)
+                prune_artifacts()
+                return result(processed, base["vectorizer"], job_features)
+
+    processed = preprocess_csv(jobs_data.copy())
+    duplicates = dedup_report = None
+    if dedup:
+        processed, row_index, duplicates, dedup_report = drop_duplicate_postings(processed, row_index)
+    vectorizer, job_features = fit_vectorizer(processed[TOKENS_COLUMN])
+    # float32 weights, int32 indices and optional pruning (CONFIG["FEATURE_DTYPE"], CONFIG["PRUNE_THRESHOLD"]);
+    # the drift report only runs with CONFIG["COMPACTION_REPORT"]
+    job_features, compaction = compact_with_report(job_features)
+    metadata = {"fingerprint": fingerprint, "fit_rows": job_features.shape[0], "rows_since_fit": 0}
+    if hasattr(vectorizer, "vocabulary_stats_"):
+        metadata["vocabulary_stats"] = vectorizer.vocabulary_stats_
+    if compaction is not None:
+        metadata["compaction"] = compaction
+    if dedup_report is not None:
+        metadata["dedup"] = dedup_report
+    save_artifacts(cache_key, vectorizer, job_features, row_index, metadata, processed, duplicates=duplicates)
+    publish_artifact(cache_key)
+    prune_artifacts()
+    return result(processed, vectorizer, job_features)
@@ -0,0 +1,329 @@
+# job_store.py
+"""
+This module stores job listings column by column in flat files that load by memory-mapping.
+Text columns live in a string heap (all values UTF-8 encoded back to back plus an offsets
+array), other columns are plain .npy arrays, and the sparse TF-IDF matrix is kept as its
+data/indices/indptr arrays. Loading maps the files instead of parsing them, so several
+processes serving the same store share one page-cached copy.
+"""
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+STORE_FILE = "jobs.json"
+CSR_FILES = {"data": "csr_data.npy", "indices": "csr_indices.npy", "indptr": "csr_indptr.npy"}
+
+
+class StringHeap:
+    """
+    Read-only sequence of strings backed by a byte heap and an offsets array.
+    Strings are decoded on access, so an unused column costs no memory.
+    """
+
+    def __init__(self, heap, offsets, nulls=None):
+        self.heap = heap        # uint8 array of concatenated UTF-8 values
+        self.offsets = offsets  # int64 array; value i is heap[offsets[i]:offsets[i + 1]]
+        self.nulls = nulls      # bool array marking missing values, or None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if self.nulls is not None and self.nulls[position]:
+            return None
+        return self.heap[self.offsets[position]:self.offsets[position + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
+
+    def take(self, positions):
+        """
+        Args:
+            positions (array-like): Row positions.
+        Returns:
+            list: The strings at those positions.
+        """
+        return [self[position] for position in np.asarray(positions).tolist()]
+
+    def tolist(self):
+        return list(self)
+
+
+def write_string_heap(directory, name, values):
+    """
+    Write a sequence of strings (None for missing) as a string heap.
+    Args:
+        directory (str): Target directory.
+        name (str): File name prefix.
+        values (iterable): Strings or None.
+    """
+    encoded, nulls = [], []
+    for value in values:
+        nulls.append(value is None)
+        encoded.append(b"" if value is None else str(value).encode("utf-8"))
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    with open(os.path.join(directory, f"{name}.heap"), "wb") as file:
+        file.write(b"".join(encoded))
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    if any(nulls):
+        np.save(os.path.join(directory, f"{name}.nulls.npy"), np.array(nulls))
+
+
+def open_string_heap(directory, name, mmap=True):
+    """
+    Open a string heap written by write_string_heap.
+    Args:
+        directory (str): Store directory.
+        name (str): File name prefix.
+        mmap (bool): Memory-map the files instead of reading them.
+    Returns:
+        StringHeap: The column.
+    """
+    mode = "r" if mmap else None
+    heap_path = os.path.join(directory, f"{name}.heap")
+    # np.memmap refuses empty files
+    if mmap and os.path.getsize(heap_path) > 0:
+        heap = np.memmap(heap_path, dtype=np.uint8, mode="r")
+    else:
+        heap = np.fromfile(heap_path, dtype=np.uint8)
+    offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode=mode)
+    nulls_path = os.path.join(directory, f"{name}.nulls.npy")
+    nulls = np.load(nulls_path) if os.path.isfile(nulls_path) else None
+    return StringHeap(heap, offsets, nulls)
+
+
+def save_csr(directory, matrix):
+    """
+    Write a sparse matrix as separate data/indices/indptr arrays that can be memory-mapped.
+    Args:
+        directory (str): Target directory.
+        matrix (sparse matrix): Matrix to store (converted to CSR).
+    Returns:
+        list: Shape of the matrix, to record in a manifest.
+    """
+    matrix = matrix.tocsr()
+    # Loaded arrays are read-only, so store the canonical form scipy would otherwise fix in place
+    matrix.sum_duplicates()
+    for part, file_name in CSR_FILES.items():
+        np.save(os.path.join(directory, file_name), getattr(matrix, part))
+    return list(matrix.shape)
+
+
+class CsrFileWriter:
+    """
+    Build a CSR matrix on disk one block of rows at a time.
+    The data and indices of each block are appended to flat files, so only the current
+    block and the row pointers are ever held in memory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {part: open(os.path.join(directory, f"{part}.bin"), "wb") for part in ("data", "indices")}
+        self.row_ends = []  # int64 arrays of cumulative row ends, one per block
+        self.nnz = 0
+        self.n_columns = None
+        self.dtype = None
+
+    def append(self, block):
+        """
+        Args:
+            block (sparse matrix): Rows to add, with the same columns as earlier blocks.
+        """
+        block = block.tocsr()
+        block.sum_duplicates()
+        self.n_columns, self.dtype = block.shape[1], block.dtype
+        self.files["data"].write(np.ascontiguousarray(block.data).tobytes())
+        self.files["indices"].write(block.indices.astype(np.int32).tobytes())
+        self.row_ends.append(self.nnz + block.indptr[1:].astype(np.int64))
+        self.nnz += block.nnz
+
+    def finish(self, n_columns=None, dtype=np.float64):
+        """
+        Close the files and map them as one matrix.
+        Args:
+            n_columns (int): Column count, needed when no block was appended.
+            dtype: Weight dtype, likewise.
+        Returns:
+            sparse.csr_matrix: Matrix whose data and indices are views of the files.
+        """
+        for file in self.files.values():
+            file.close()
+        n_columns = self.n_columns if self.n_columns is not None else n_columns
+        dtype = self.dtype if self.dtype is not None else np.dtype(dtype)
+        indptr = np.concatenate([np.zeros(1, dtype=np.int64), *self.row_ends])
+
+        def mapped(part, part_dtype):
+            # np.memmap refuses empty files
+            if not self.nnz:
+                return np.zeros(0, dtype=part_dtype)
+            return np.memmap(os.path.join(self.directory, f"{part}.bin"), dtype=part_dtype, mode="r")
+
+        data, indices = mapped("data", dtype), mapped("indices", np.int32)
+        if self.nnz < np.iinfo(np.int32).max:
+            indptr = indptr.astype(np.int32)
+        else:
+            # Row pointers no longer fit int32 and scipy needs both index arrays alike
+            indices = indices.astype(np.int64)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, n_columns), copy=False)
+
+
+def matrix_fingerprint(job_features):
+    """
+    Fingerprint a sparse job matrix so indexes derived from it (ANN tables, score shards)
+    are never reused for other data.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix in CSR format.
+    Returns:
+        str: Hex digest of the matrix shape and contents.
+    """
+    digest = hashlib.sha1(str(job_features.shape).encode("utf-8"))
+    for array in (job_features.indptr, job_features.indices, job_features.data):
+        digest.update(np.ascontiguousarray(array).view(np.uint8))
+    return digest.hexdigest()
+
+
+def load_csr(directory, shape, mmap=True):
+    """
+    Rebuild a CSR matrix from arrays written by save_csr without copying them.
+    Args:
+        directory (str): Store directory.
+        shape (list): Matrix shape returned by save_csr.
+        mmap (bool): Memory-map the arrays instead of reading them.
+    Returns:
+        sparse.csr_matrix: Matrix whose arrays are views of the mapped files.
+    """
+    parts = {
+        part: np.load(os.path.join(directory, file_name), mmap_mode="r" if mmap else None)
+        for part, file_name in CSR_FILES.items()
+    }
+    return sparse.csr_matrix((parts["data"], parts["indices"], parts["indptr"]), shape=tuple(shape), copy=False)
+
+
+class JobStore:
+    """
+    Columns of a stored job listing table, opened lazily from memory-mapped files.
+    """
+
+    def __init__(self, directory, columns, n_rows, mmap=True):
+        self.directory = directory
+        self.columns = columns  # column name -> {"file": ..., "kind": "string" | "tokens" | "array"}
+        self.n_rows = n_rows
+        self.mmap = mmap
+        self._opened = {}
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def column(self, name):
+        """
+        Args:
+            name (str): Column name, e.g. "Job Title".
+        Returns:
+            StringHeap or np.ndarray: The column; token columns are heaps of space-joined tokens.
+        """
+        if name not in self._opened:
+            spec = self.columns[name]
+            if spec["kind"] == "array":
+                self._opened[name] = np.load(
+                    os.path.join(self.directory, f"{spec['file']}.npy"), mmap_mode="r" if self.mmap else None
+                )
+            else:
+                self._opened[name] = open_string_heap(self.directory, spec["file"], self.mmap)
+        return self._opened[name]
+
+    def __getitem__(self, name):
+        return self.column(name)
+
+    def _materialize(self, name, positions=None):
+        values = self.column(name)
+        kind = self.columns[name]["kind"]
+        if kind == "array":
+            return np.asarray(values if positions is None else values[positions])
+        values = values.tolist() if positions is None else values.take(positions)
+        if kind == "tokens":
+            return [value.split(" ") if value else [] for value in values]
+        return values
+
+    def _default_columns(self, columns):
+        if columns is None:
+            return [name for name, spec in self.columns.items() if spec["kind"] != "tokens"]
+        return columns
+
+    def to_frame(self, columns=None):
+        """
+        Materialize columns as a DataFrame, e.g. for code that expects the parsed CSV.
+        Args:
+            columns (list): Columns to include; defaults to every stored column except
+                token lists, which are only needed for refitting.
+        Returns:
+            pd.DataFrame: The job data; token columns come back as token lists.
+        """
+        return pd.DataFrame({name: self._materialize(name) for name in self._default_columns(columns)})
+
+    def take(self, positions, columns=None):
+        """
+        Materialize only some rows, like DataFrame.take, so that ranking a few jobs never
+        decodes the whole store.
+        Args:
+            positions (array-like): Row positions.
+            columns (list): Columns to include; same default as to_frame.
+        Returns:
+            pd.DataFrame: The rows, indexed by their positions.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        frame = {name: self._materialize(name, positions) for name in self._default_columns(columns)}
+        return pd.DataFrame(frame, index=positions)
+
+
+def save_job_store(directory, jobs_data):
+    """
+    Write every column of the job data to the store layout.
+    Numeric and boolean columns are saved as arrays, token-list columns as space-joined
+    strings and everything else as string heaps.
+    Args:
+        directory (str): Target directory (an artifact's staging directory).
+        jobs_data (pd.DataFrame): Job data aligned with the TF-IDF matrix rows.
+    """
+    columns = {}
+    for position, name in enumerate(jobs_data.columns):
+        file_name = f"col{position}"
+        series = jobs_data[name]
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            np.save(os.path.join(directory, f"{file_name}.npy"), series.to_numpy())
+            kind = "array"
+        elif len(series) and isinstance(series.iloc[0], (list, tuple)):
+            write_string_heap(directory, file_name, (" ".join(tokens) for tokens in series))
+            kind = "tokens"
+        else:
+            write_string_heap(directory, file_name, (None if pd.isna(value) else value for value in series))
+            kind = "string"
+        columns[name] = {"file": file_name, "kind": kind}
+    with open(os.path.join(directory, STORE_FILE), "w") as file:
+        json.dump({"n_rows": len(jobs_data), "columns": columns}, file)
+
+
+def open_job_store(directory, mmap=True):
+    """
+    Open a job store written by save_job_store.
+    Args:
+        directory (str): Store directory.
+        mmap (bool): Memory-map the columns instead of reading them.
+    Returns:
+        JobStore: The store, or None if the directory holds none.
+    """
+    path = os.path.join(directory, STORE_FILE)
+    if not os.path.isfile(path):
+        return None
+    with open(path) as file:
+        layout = json.load(file)
+    return JobStore(directory, layout["columns"], layout["n_rows"], mmap)
@@ -0,0 +1,206 @@
+# streaming.py
+"""
+This module featurizes job feeds larger than memory by streaming the CSV in chunks.
+Only the job titles and the sparse TF-IDF rows are kept; raw descriptions and tokens
+live for one chunk at a time.
+"""
+from collections import Counter
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import config
+from data.artifact_store import (
+    artifact_key, params_fingerprint, load_artifacts,
+    save_artifacts, find_latest_artifact, publish_artifact, prune_artifacts
+)
+from data.compaction import compact_features
+from data.job_store import CsrFileWriter
+from data.data_loader import iter_csv_chunks, JOB_COLUMNS, TFIDF_PARAMS
+from data.ingest import measure_drift, row_fingerprints
+from data.text_engine import build_vectorizer, normalize_stream
+from data.vocabulary import VocabularyBuild, select_terms, select_vocabulary_two_pass
+from logs.log_config import log_event, log_execution_time
+
+
+def _stream_columns():
+    columns = dict(JOB_COLUMNS)
+    key_column = config.CONFIG.get("JOB_KEY_COLUMN")
+    if key_column:
+        columns[key_column] = 'string'
+    return columns
+
+
+def iter_token_chunks(csv_path, chunk_size=None, workers=None):
+    """
+    Stream normalized job descriptions chunk by chunk.
+    Args:
+        csv_path (str): Path to the CSV file.
+        chunk_size (int): Rows per chunk; defaults to CONFIG["STREAM_CHUNK_SIZE"].
+        workers (int): Normalization worker processes.
+    Yields:
+        tuple: (chunk of job data, list of token lists).
+    """
+    chunk_size = chunk_size or config.CONFIG["STREAM_CHUNK_SIZE"]
+    chunks = (
+        (chunk, chunk['Job Description'].tolist())
+        for chunk in iter_csv_chunks(csv_path, chunk_size, _stream_columns())
+    )
+    return normalize_stream(chunks, workers)
+
+
+def stream_job_features(csv_path, vectorizer, chunk_size=None, workers=None):
+    """
+    Featurize the job listings chunk by chunk with a fitted or stateless vectorizer.
+    Args:
+        csv_path (str): Path to the CSV file.
+        vectorizer: Fitted TfidfVectorizer, or a HashingVectorizer from build_hashing_vectorizer.
+        chunk_size (int): Rows per chunk; defaults to CONFIG["STREAM_CHUNK_SIZE"].
+        workers (int): Normalization worker processes.
+    Yields:
+        tuple: (chunk of job data, sparse feature rows for the chunk).
+    """
+    for chunk, tokens in iter_token_chunks(csv_path, chunk_size, workers):
+        yield chunk, vectorizer.transform(tokens)
+
+
+@log_execution_time
+def fit_vectorizer_streaming(csv_path, chunk_size=None, workers=None):
+    """
+    Fit the TF-IDF vocabulary and IDF weights by streaming the CSV.
+    Applies min_df/max_df and then keeps the max_features most frequent terms, like
+    TfidfVectorizer.fit; ties at the cut-off are broken alphabetically. In the "two_pass"
+    vocabulary mode the feed is read twice (hashed counts, then exact counts of the
+    surviving candidates) instead of counting every distinct n-gram in one pass.
+    Args:
+        csv_path (str): Path to the CSV file.
+        chunk_size (int): Rows per chunk; defaults to CONFIG["STREAM_CHUNK_SIZE"].
+        workers (int): Normalization worker processes.
+    Returns:
+        TfidfVectorizer: Vectorizer with a fixed vocabulary and IDF weights.
+    """
+    def batches():
+        return (tokens for _, tokens in iter_token_chunks(csv_path, chunk_size, workers))
+
+    mode = config.CONFIG.get("VOCABULARY_MODE", "exact")
+    with VocabularyBuild(mode) as build:
+        if mode == "two_pass":
+            vocabulary, df, n_docs, candidate_terms = select_vocabulary_two_pass(batches, TFIDF_PARAMS)
+        else:
+            analyzer = build_vectorizer(TFIDF_PARAMS).build_analyzer()
+            term_counts, doc_counts, n_docs = Counter(), Counter(), 0
+            for tokens in batches():
+                for document in tokens:
+                    features = analyzer(document)
+                    term_counts.update(features)
+                    doc_counts.update(set(features))
+                n_docs += len(tokens)
+            vocabulary = select_terms(term_counts, doc_counts, n_docs, TFIDF_PARAMS)
+            df = np.array([doc_counts[term] for term in vocabulary], dtype=np.float64)
+            candidate_terms = len(doc_counts)
+
+    # Smoothed IDF, as computed by TfidfTransformer
+    vectorizer = build_vectorizer(TFIDF_PARAMS, vocabulary=vocabulary)
+    vectorizer.idf_ = np.log((1 + n_docs) / (1 + df)) + 1
+    vectorizer.vocabulary_stats_ = build.finish(len(vocabulary), candidate_terms, n_docs)
+    return vectorizer
+
+
+def _stream_row_index(csv_path, chunk_size):
+    index = [row_fingerprints(chunk) for chunk in iter_csv_chunks(csv_path, chunk_size, _stream_columns())]
+    return tuple(np.concatenate(part) for part in zip(*index))
+
+
+def _stream_titles(csv_path, chunk_size):
+    titles = [
+        chunk[['Job Title']]
+        for chunk in iter_csv_chunks(csv_path, chunk_size, _stream_columns())
+    ]
+    return pd.concat(titles, ignore_index=True)
+
+
+@log_execution_time
+def prepare_job_features_streaming(csv_path, chunk_size=None, workers=None, return_key=False):
+    """
+    Streaming counterpart of prepare_job_features for feeds larger than memory.
+    Reuses the cached artifact for this exact CSV when present. Otherwise the vocabulary
+    of the newest compatible artifact is reused as a pre-fitted featurizer while the feed
+    has drifted less than CONFIG["REFIT_DRIFT_THRESHOLD"] from it, as in incremental
+    ingest; else it is fitted in a first streaming pass. The matrix is built in a second
+    pass, written to disk block by block.
+    Args:
+        csv_path (str): Path to the CSV file.
+        chunk_size (int): Rows per chunk; defaults to CONFIG["STREAM_CHUNK_SIZE"].
+        workers (int): Normalization worker processes.
+        return_key (bool): Also return the key of the artifact built or loaded.
+    Returns:
+        tuple: Job titles (the memory-mapped JobStore on a cache hit), fitted vectorizer and
+            TF-IDF matrix (and the artifact key with return_key).
+    """
+    chunk_size = chunk_size or config.CONFIG["STREAM_CHUNK_SIZE"]
+    stop_words = config.CONFIG.get("CUSTOM_STOP_WORDS")
+    fingerprint = params_fingerprint(stop_words, TFIDF_PARAMS)
+    cache_key = artifact_key(csv_path, stop_words, TFIDF_PARAMS)
+
+    def result(*values):
+        return (*values, cache_key) if return_key else values
+
+    artifacts = load_artifacts(cache_key, TFIDF_PARAMS)
+    if artifacts is not None:
+        log_event("Using cached TF-IDF artifacts")
+        print("Using cached TF-IDF artifacts")
+        publish_artifact(cache_key)
+        jobs = artifacts["jobs"]
+        titles = jobs if jobs is not None else _stream_titles(csv_path, chunk_size)
+        return result(titles, artifacts["vectorizer"], artifacts["job_features"])
+
+    base_key = find_latest_artifact(fingerprint)
+    base = load_artifacts(base_key, TFIDF_PARAMS) if base_key else None
+    row_index, vectorizer = None, None
+    if base is not None and base["row_index"] is not None:
+        # The base vocabulary and IDF weights only stand in for a refit while the feed
+        # has drifted less than CONFIG["REFIT_DRIFT_THRESHOLD"] from the rows they were fitted on
+        row_index = _stream_row_index(csv_path, chunk_size)
+        _, _, rows_since_fit = measure_drift(base, row_index)
+        if rows_since_fit is not None:
+            vectorizer = base["vectorizer"]
+            manifest = base["manifest"]
+            metadata = {
+                "fit_rows": manifest.get("fit_rows", base["job_features"].shape[0]),
+                "rows_since_fit": rows_since_fit,
+            }
+            if "vocabulary_stats" in manifest:
+                metadata["vocabulary_stats"] = manifest["vocabulary_stats"]
+    if vectorizer is None:
+        vectorizer = fit_vectorizer_streaming(csv_path, chunk_size, workers)
+        metadata = {"rows_since_fit": 0, "vocabulary_stats": vectorizer.vocabulary_stats_}
+
+    os.makedirs(config.CONFIG["ARTIFACT_DIR"], exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=config.CONFIG["ARTIFACT_DIR"]) as scratch:
+        # Rows go straight to disk, so the matrix is never held in memory, let alone twice
+        writer = CsrFileWriter(scratch)
+        titles, row_keys, row_hashes = [], [], []
+        for chunk, features in stream_job_features(csv_path, vectorizer, chunk_size, workers):
+            titles.append(chunk[['Job Title']])
+            writer.append(compact_features(features))
+            if row_index is None:
+                keys, hashes = row_fingerprints(chunk)
+                row_keys.append(keys)
+                row_hashes.append(hashes)
+        job_features = writer.finish(len(vectorizer.idf_), config.CONFIG.get("FEATURE_DTYPE", "float64"))
+        if row_index is None:
+            row_index = (np.concatenate(row_keys), np.concatenate(row_hashes))
+
+        jobs_data = pd.concat(titles, ignore_index=True)
+        metadata = {"fingerprint": fingerprint, "fit_rows": job_features.shape[0], **metadata}
+        stored = None
+        if save_artifacts(cache_key, vectorizer, job_features, row_index, metadata, jobs_data):
+            stored = load_artifacts(cache_key, TFIDF_PARAMS)
+        # Serve the saved copy; the scratch files go away with the directory
+        job_features = stored["job_features"] if stored is not None else job_features.copy()
+
+    publish_artifact(cache_key)
+    prune_artifacts()
+    log_event(f"Streamed {len(jobs_data)} job listings in chunks of {chunk_size}")
+    print(f"Streamed {len(jobs_data)} job listings")
+    return result(jobs_data, vectorizer, job_features)
@@ -0,0 +1,252 @@
+# text_engine.py
+"""
+This module normalizes text in a single pass (tokenize, drop stop words, lemmatize)
+with a per-token lemma cache, optionally across processes.
+"""
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer, ENGLISH_STOP_WORDS
+from config import CONFIG
+from logs.log_config import log_event
+
+# Same pattern TfidfVectorizer applies to raw strings
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")
+
+
+@lru_cache(maxsize=1)
+def _nltk():
+    # NLTK takes over a second to import; only load it once text is actually normalized
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+    return WordNetLemmatizer(), word_tokenize
+
+
+@lru_cache(maxsize=CONFIG["LEMMA_CACHE_SIZE"])
+def lemmatize_token(token):
+    """
+    Lemmatize a single token, memoized because job vocabularies repeat heavily.
+    Args:
+        token (str): Token to lemmatize.
+    Returns:
+        str: Lemma of the token.
+    """
+    return _nltk()[0].lemmatize(token)
+
+
+@lru_cache(maxsize=8)
+def _stop_words(custom_stop_words):
+    return ENGLISH_STOP_WORDS.union(custom_stop_words)
+
+
+def all_stop_words():
+    """
+    English stop words plus CONFIG["CUSTOM_STOP_WORDS"], built once per distinct config.
+    Returns:
+        frozenset: Stop words compared against lowercased tokens.
+    """
+    return _stop_words(frozenset(CONFIG.get("CUSTOM_STOP_WORDS") or ()))
+
+
+def lemmatize_document(text):
+    """
+    Tokenize and lemmatize one document.
+    Args:
+        text (str): Document text.
+    Returns:
+        str: Document with every token replaced by its lemma.
+    """
+    word_tokenize = _nltk()[1]
+    return " ".join([lemmatize_token(word) for word in word_tokenize(text)])
+
+
+def normalize_document(text):
+    """
+    Tokenize once, drop stop words and lemmatize the remaining tokens.
+    Args:
+        text (str): Document text.
+    Returns:
+        list: Normalized tokens, ready for a vectorizer built by build_vectorizer.
+    """
+    stop_words = all_stop_words()
+    word_tokenize = _nltk()[1]
+    return [lemmatize_token(token) for token in word_tokenize(text) if token.lower() not in stop_words]
+
+
+def _lemmatize_chunk(texts):
+    return [lemmatize_document(text) for text in texts]
+
+
+def _normalize_chunk(texts):
+    return [normalize_document(text) for text in texts]
+
+
+def resolve_workers(workers=None):
+    """
+    Resolve the number of preprocessing worker processes.
+    Args:
+        workers (int): Requested worker count; falls back to CONFIG["PREPROCESS_WORKERS"].
+    Returns:
+        int: Worker count, where 0 or None in the config means one per CPU.
+    """
+    if workers is None:
+        workers = CONFIG.get("PREPROCESS_WORKERS")
+    return workers or os.cpu_count() or 1
+
+
+def _worker_context():
+    # The dashboard calls in from a threaded process (log writer, render pool, request
+    # threads); a forked child would inherit whatever locks those threads held
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _init_worker(config):
+    # Workers import config afresh, so carry over settings changed at runtime
+    CONFIG.update(config)
+
+
+def _worker_pool(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=_worker_context(), initializer=_init_worker, initargs=(dict(CONFIG),)
+    )
+
+
+def _map_chunked(chunk_func, texts, workers=None, chunk_size=None):
+    workers = resolve_workers(workers)
+    chunk_size = chunk_size or CONFIG["PREPROCESS_CHUNK_SIZE"]
+
+    # Small inputs are not worth the cost of starting processes
+    if workers <= 1 or len(texts) <= chunk_size:
+        return chunk_func(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    log_event(f"Processing {len(texts)} documents in {len(chunks)} chunks across {workers} workers")
+    with _worker_pool(workers) as executor:
+        results = executor.map(chunk_func, chunks)
+        return [item for chunk in results for item in chunk]
+
+
+def lemmatize_documents(texts, workers=None, chunk_size=None):
+    """
+    Lemmatize a list of documents, splitting them across worker processes in chunks.
+    The output is identical to lemmatizing each document serially and in order.
+    Args:
+        texts (list): Documents to lemmatize.
+        workers (int): Number of worker processes (1 runs in-process).
+        chunk_size (int): Documents per task; defaults to CONFIG["PREPROCESS_CHUNK_SIZE"].
+    Returns:
+        list: Lemmatized documents in input order.
+    """
+    return _map_chunked(_lemmatize_chunk, texts, workers, chunk_size)
+
+
+def normalize_documents(texts, workers=None, chunk_size=None):
+    """
+    Normalize a list of documents into token lists, in chunks across worker processes.
+    Args:
+        texts (list): Documents to normalize.
+        workers (int): Number of worker processes (1 runs in-process).
+        chunk_size (int): Documents per task; defaults to CONFIG["PREPROCESS_CHUNK_SIZE"].
+    Returns:
+        list: Token lists in input order.
+    """
+    return _map_chunked(_normalize_chunk, texts, workers, chunk_size)
+
+
+def normalize_stream(chunks, workers=None):
+    """
+    Lazily normalize a stream of document batches, keeping memory bounded.
+    At most two batches per worker are in flight at once, so a long input is never
+    queued up in full the way executor.map would.
+    Args:
+        chunks (iterable): Pairs of (context, list of documents); the context is passed through.
+        workers (int): Number of worker processes (1 runs in-process).
+    Yields:
+        tuple: (context, token lists) in input order.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1:
+        for context, texts in chunks:
+            yield context, _normalize_chunk(texts)
+        return
+
+    with _worker_pool(workers) as executor:
+        pending = deque()
+        for context, texts in chunks:
+            pending.append((context, executor.submit(_normalize_chunk, texts)))
+            if len(pending) >= 2 * workers:
+                context, future = pending.popleft()
+                yield context, future.result()
+        while pending:
+            context, future = pending.popleft()
+            yield context, future.result()
+
+
+def analyze_tokens(tokens, stop_words=None, ngram_range=(1, 1)):
+    """
+    Vectorizer analyzer for pre-tokenized documents.
+    Produces the same features TfidfVectorizer's word analyzer would produce from the
+    tokens joined with spaces, without building and re-splitting that string.
+    Args:
+        tokens (list): Normalized tokens of one document.
+        stop_words (frozenset): Stop words removed before building n-grams.
+        ngram_range (tuple): Minimum and maximum n-gram size.
+    Returns:
+        list: Unigram and n-gram features.
+    """
+    words = [word for token in tokens for word in TOKEN_PATTERN.findall(token.lower())]
+    if stop_words:
+        words = [word for word in words if word not in stop_words]
+
+    min_n, max_n = ngram_range
+    features = list(words) if min_n == 1 else []
+    for n in range(max(min_n, 2), max_n + 1):
+        features.extend(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+    return features
+
+
+def _token_analyzer(vectorizer_params):
+    params = dict(vectorizer_params)
+    stop_words = params.pop("stop_words", None)
+    if stop_words == "english":
+        stop_words = ENGLISH_STOP_WORDS
+    analyzer = partial(
+        analyze_tokens,
+        stop_words=frozenset(stop_words) if stop_words else None,
+        ngram_range=tuple(params.pop("ngram_range", (1, 1))),
+    )
+    return analyzer, params
+
+
+def build_vectorizer(vectorizer_params, vocabulary=None):
+    """
+    Create a TfidfVectorizer that consumes token lists from normalize_documents.
+    Args:
+        vectorizer_params (dict): TfidfVectorizer arguments; stop_words and ngram_range
+            are applied by the token analyzer.
+        vocabulary (list): Fixed vocabulary, when restoring a fitted vectorizer.
+    Returns:
+        TfidfVectorizer: Unfitted vectorizer.
+    """
+    analyzer, params = _token_analyzer(vectorizer_params)
+    return TfidfVectorizer(analyzer=analyzer, vocabulary=vocabulary, **params)
+
+
+def build_hashing_vectorizer(vectorizer_params, n_features=2 ** 20):
+    """
+    Create a stateless HashingVectorizer with the same token analyzer.
+    It needs no fitting, so it can featurize a stream without a first pass, but it has
+    no IDF weighting and no feature names.
+    Args:
+        vectorizer_params (dict): TfidfVectorizer arguments; only stop_words and
+            ngram_range are used.
+        n_features (int): Number of hash buckets.
+    Returns:
+        HashingVectorizer: Vectorizer producing L2-normalized term frequencies.
+    """
+    analyzer, _ = _token_analyzer(vectorizer_params)
+    return HashingVectorizer(analyzer=analyzer, n_features=n_features, alternate_sign=False, norm="l2")
@@ -0,0 +1,231 @@
+# vocabulary.py
+"""
+This module selects the TF-IDF vocabulary without materializing every candidate n-gram.
+The two-pass mode first counts features in a fixed number of hash buckets, which bounds
+memory regardless of how many distinct bigrams the corpus has. Buckets that cannot hold
+a selectable term are discarded, and a second pass counts exactly only the terms that
+fall into the surviving buckets.
+"""
+import time
+import tracemalloc
+from collections import Counter
+import numpy as np
+from sklearn.utils import murmurhash3_32
+from config import CONFIG
+from data.text_engine import build_hashing_vectorizer, build_vectorizer
+from logs.log_config import log_event, log_execution_time
+from logs.metrics import peak_rss_bytes
+
+
+def document_frequency_bounds(params, n_docs):
+    """
+    Translate min_df/max_df into document counts, as TfidfVectorizer does.
+    Args:
+        params (dict): TfidfVectorizer arguments.
+        n_docs (int): Number of documents.
+    Returns:
+        tuple: Minimum and maximum document count of a kept term.
+    """
+    min_df = params.get("min_df", 1)
+    max_df = params.get("max_df", 1.0)
+    min_count = min_df if isinstance(min_df, int) else min_df * n_docs
+    max_count = max_df if isinstance(max_df, int) else max_df * n_docs
+    return min_count, max_count
+
+
+def select_terms(term_counts, doc_counts, n_docs, params):
+    """
+    Apply min_df/max_df and keep the max_features most frequent terms.
+    Ties at the cut-off are broken alphabetically.
+    Args:
+        term_counts (Counter): Corpus frequency of each candidate term.
+        doc_counts (Counter): Document frequency of each candidate term.
+        n_docs (int): Number of documents.
+        params (dict): TfidfVectorizer arguments.
+    Returns:
+        list: Sorted vocabulary.
+    """
+    min_count, max_count = document_frequency_bounds(params, n_docs)
+    terms = [term for term, count in doc_counts.items() if min_count <= count <= max_count]
+
+    max_features = params.get("max_features")
+    if max_features and len(terms) > max_features:
+        terms = sorted(terms, key=lambda term: (-term_counts[term], term))[:max_features]
+    return sorted(terms)
+
+
+def _bucket(feature, n_features):
+    # Same bucket HashingVectorizer assigns (signed MurmurHash3, absolute value modulo n)
+    return abs(murmurhash3_32(feature, positive=False)) % n_features
+
+
+@log_execution_time
+def count_hashed_features(batches, params, n_features):
+    """
+    First pass: corpus and document frequency of every hash bucket.
+    Args:
+        batches (iterable): Lists of token lists.
+        params (dict): TfidfVectorizer arguments.
+        n_features (int): Number of hash buckets.
+    Returns:
+        tuple: Bucket corpus frequencies, bucket document frequencies, document count.
+    """
+    hasher = build_hashing_vectorizer(params, n_features)
+    hasher.set_params(norm=None)
+    bucket_counts = np.zeros(n_features, dtype=np.int64)
+    bucket_docs = np.zeros(n_features, dtype=np.int64)
+    n_docs = 0
+    for tokens in batches:
+        # Each row's bucket indices are unique, so counting indices counts documents
+        counts = hasher.transform(tokens)
+        bucket_counts += np.bincount(counts.indices, weights=counts.data, minlength=n_features).astype(np.int64)
+        bucket_docs += np.bincount(counts.indices, minlength=n_features)
+        n_docs += len(tokens)
+    return bucket_counts, bucket_docs, n_docs
+
+
+def candidate_buckets(bucket_counts, bucket_docs, n_docs, params, oversample):
+    """
+    Buckets that may hold a term of the final vocabulary.
+    A bucket's frequencies are upper bounds of each term hashed into it, so buckets below
+    min_df cannot hold a kept term. max_df is only applied to exact counts, because a rare
+    term may share a bucket with a frequent one.
+    Args:
+        bucket_counts (np.ndarray): Bucket corpus frequencies.
+        bucket_docs (np.ndarray): Bucket document frequencies.
+        n_docs (int): Number of documents.
+        params (dict): TfidfVectorizer arguments.
+        oversample (float): Buckets kept per vocabulary slot, to absorb collisions.
+    Returns:
+        np.ndarray: Boolean mask over the buckets.
+    """
+    min_count, _ = document_frequency_bounds(params, n_docs)
+    keep = (bucket_docs >= max(min_count, 1))
+
+    max_features = params.get("max_features")
+    limit = int(max_features * oversample) if max_features else 0
+    if limit and np.count_nonzero(keep) > limit:
+        eligible = np.flatnonzero(keep)
+        best = eligible[np.argpartition(-bucket_counts[eligible], limit - 1)[:limit]]
+        # Buckets tied with the weakest kept bucket stay, so the cut-off is deterministic
+        floor = bucket_counts[best].min()
+        keep &= bucket_counts >= floor
+    return keep
+
+
+@log_execution_time
+def count_candidate_terms(batches, params, candidates):
+    """
+    Second pass: exact frequencies of the terms that hash into candidate buckets.
+    Args:
+        batches (iterable): Lists of token lists.
+        params (dict): TfidfVectorizer arguments.
+        candidates (np.ndarray): Boolean mask over the buckets.
+    Returns:
+        tuple: Term corpus frequencies and term document frequencies (Counters).
+    """
+    analyzer = build_vectorizer(params).build_analyzer()
+    n_features = len(candidates)
+    term_counts, doc_counts = Counter(), Counter()
+    for tokens in batches:
+        for document in tokens:
+            features = [feature for feature in analyzer(document) if candidates[_bucket(feature, n_features)]]
+            term_counts.update(features)
+            doc_counts.update(set(features))
+    return term_counts, doc_counts
+
+
+def select_vocabulary_two_pass(batches, params, n_features=None, oversample=None):
+    """
+    Select the vocabulary with a hashed counting pass followed by an exact pass over the
+    surviving candidates.
+    Args:
+        batches (callable): Returns a fresh iterable of token-list batches; called twice.
+        params (dict): TfidfVectorizer arguments.
+        n_features (int): Hash buckets; defaults to CONFIG["VOCABULARY_HASH_BUCKETS"].
+        oversample (float): Defaults to CONFIG["VOCABULARY_OVERSAMPLE"].
+    Returns:
+        tuple: Sorted vocabulary, document frequency of each term, document count and
+            the number of candidate terms counted exactly.
+    """
+    n_features = n_features or CONFIG["VOCABULARY_HASH_BUCKETS"]
+    oversample = oversample or CONFIG["VOCABULARY_OVERSAMPLE"]
+
+    bucket_counts, bucket_docs, n_docs = count_hashed_features(batches(), params, n_features)
+    candidates = candidate_buckets(bucket_counts, bucket_docs, n_docs, params, oversample)
+    del bucket_counts, bucket_docs
+
+    term_counts, doc_counts = count_candidate_terms(batches(), params, candidates)
+    vocabulary = select_terms(term_counts, doc_counts, n_docs, params)
+    df = np.array([doc_counts[term] for term in vocabulary], dtype=np.float64)
+    return vocabulary, df, n_docs, len(doc_counts)
+
+
+def fit_vectorizer_two_pass(job_descriptions, params):
+    """
+    Fit a TF-IDF vectorizer whose vocabulary is chosen by select_vocabulary_two_pass.
+    Args:
+        job_descriptions (pd.Series): Normalized job description tokens.
+        params (dict): TfidfVectorizer arguments.
+    Returns:
+        tuple: Fitted vectorizer, TF-IDF matrix and the number of candidate terms.
+    """
+    documents = list(job_descriptions)
+    batch_size = CONFIG["PREPROCESS_CHUNK_SIZE"]
+
+    def batches():
+        return (documents[start:start + batch_size] for start in range(0, len(documents), batch_size))
+
+    vocabulary, _, _, candidate_terms = select_vocabulary_two_pass(batches, params)
+    vectorizer = build_vectorizer(params, vocabulary=vocabulary)
+    job_features = vectorizer.fit_transform(documents)
+    return vectorizer, job_features, candidate_terms
+
+
+class VocabularyBuild:
+    """
+    Measures one vocabulary build: wall time and peak memory.
+    Peak memory is the tracemalloc peak when tracing (CONFIG["TRACE_MEMORY"]), and the
+    growth of the process's peak RSS otherwise.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.stats = {}
+
+    def __enter__(self):
+        self._rss = peak_rss_bytes()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stats = {
+            "mode": self.mode,
+            "build_seconds": (time.perf_counter_ns() - self._start) / 1e9,
+            "peak_rss_growth_bytes": peak_rss_bytes() - self._rss,
+        }
+        if tracemalloc.is_tracing():
+            self.stats["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1] - self._traced
+        return False
+
+    def finish(self, vocabulary_size, candidate_terms=None, n_docs=None):
+        """
+        Add the pruning figures and log the build.
+        Args:
+            vocabulary_size (int): Terms kept.
+            candidate_terms (int): Distinct terms counted before pruning, when known.
+            n_docs (int): Documents the vocabulary was built from.
+        Returns:
+            dict: The vocabulary statistics.
+        """
+        self.stats["vocabulary_size"] = int(vocabulary_size)
+        if candidate_terms is not None:
+            self.stats["candidate_terms"] = int(candidate_terms)
+            self.stats["pruned_terms"] = int(candidate_terms - vocabulary_size)
+        if n_docs is not None:
+            self.stats["documents"] = int(n_docs)
+        log_event(f"Vocabulary build: {self.stats}")
+        return self.stats
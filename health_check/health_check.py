@@ -1,33 +1,107 @@
+import csv
+import os
 from logs.log_config import log_event
-from data.data_loader import load_csv, load_cv
 from config import CONFIG
 
-def health_check():
+# Columns the pipeline reads from the jobs CSV (see data_loader.JOB_COLUMNS)
+EXPECTED_COLUMNS = ("Job Title", "Job Description")
+
+# Upper bound on the bytes read to find the CSV header
+HEADER_READ_BYTES = 64 * 1024
+
+def check_csv(file_path, expected_columns=EXPECTED_COLUMNS):
+    """
+    Liveness check of the jobs CSV: stat it and parse the header from a bounded read.
+    Args:
+        file_path (str): Path to the CSV file.
+        expected_columns (tuple): Columns that must be present in the header.
+    Returns:
+        tuple: (readable, columns present).
+    """
+    try:
+        size = os.stat(file_path).st_size
+        if size == 0:
+            log_event(f"Health check failed: CSV {file_path} is empty", level="error")
+            return False, False
+        with open(file_path, "r", newline="", encoding="utf-8-sig", errors="replace") as file:
+            head = file.read(HEADER_READ_BYTES)
+    except OSError as e:
+        log_event(f"Health check failed: Unable to read CSV - {e}", level="error")
+        return False, False
+
+    # A quoted header may contain newlines, so let the csv module find where it ends
+    header = next(csv.reader(head.splitlines(keepends=True)), [])
+    missing = [column for column in expected_columns if column not in header]
+    if missing:
+        log_event(f"Health check failed: CSV is missing columns {missing}", level="error")
+    return True, not missing
+
+def check_cv(file_path):
+    """
+    Liveness check of the CV; the CV is small, so it is read in full and kept.
+    Args:
+        file_path (str): Path to the CV text file.
+    Returns:
+        str: The CV content, or None if it is missing, empty or unreadable.
+    """
+    try:
+        with open(file_path, "r") as file:
+            cv_content = file.read()
+    except (OSError, UnicodeDecodeError) as e:
+        log_event(f"Health check failed: Unable to load CV - {e}", level="error")
+        return None
+    if not cv_content.strip():
+        log_event(f"Health check failed: CV {file_path} is empty", level="error")
+        return None
+    return cv_content
+
+def check_artifacts(artifact_dir=None):
+    """
+    Deep check: verify the published TF-IDF artifact against its checksums.
+    Args:
+        artifact_dir (str): Root directory of the artifact store.
+    Returns:
+        bool: False if the published artifact is damaged; True if it is intact or
+            nothing has been published yet.
+    """
+    # Imported here because the artifact store pulls in scikit-learn
+    from data.artifact_store import current_artifact, verify_artifact
+
+    key = current_artifact(artifact_dir)
+    if key is None:
+        log_event("Health check: no published artifacts to verify")
+        return True
+    problems = verify_artifact(key, artifact_dir)
+    if problems:
+        log_event(f"Health check failed: artifact {key} is damaged - {problems}", level="error")
+    return not problems
+
+def health_check(deep=False):
     """
     Perform a health check of the application.
+    The liveness tier only stats the inputs and reads the CSV header; the deep tier also
+    verifies the cached artifacts by checksum.
+    Args:
+        deep (bool): Run the deep tier as well.
     Returns:
-        dict: Status of critical components.
+        tuple: Status of critical components (dict), and the data loaded while checking
+            (dict with the "cv" content) for the pipeline to reuse.
     """
     checks = {
-        "CSV File Loaded": False,
+        "CSV File Readable": False,
+        "CSV Columns Present": False,
         "CV File Loaded": False,
         "Logging Active": False,
     }
+    loaded = {}
 
-    # Check if the CSV and CV files can be loaded
-    try:
-        jobs_data = load_csv(CONFIG["CSV_PATH"])
-        if jobs_data is not None:
-            checks["CSV File Loaded"] = True
-    except Exception as e:
-        log_event(f"Health check failed: Unable to load CSV - {e}", level="error")
+    # Check the CSV without parsing it
+    checks["CSV File Readable"], checks["CSV Columns Present"] = check_csv(CONFIG["CSV_PATH"])
 
-    try:
-        cv_data = load_cv(CONFIG["CV_PATH"])
-        if cv_data:
-            checks["CV File Loaded"] = True
-    except Exception as e:
-        log_event(f"Health check failed: Unable to load CV - {e}", level="error")
+    cv_content = check_cv(CONFIG["CV_PATH"])
+    if cv_content is not None:
+        checks["CV File Loaded"] = True
+        loaded["cv"] = cv_content
 
     # Check if logging is active
     try:
@@ -37,4 +111,7 @@ def health_check():
     except Exception as e:
         log_event(f"Health check failed: Logging error - {e}", level="error")
 
-    return checks
+    if deep:
+        checks["Artifacts Intact"] = check_artifacts()
+
+    return checks, loaded
@@ -1,19 +1,206 @@
 # log_config.py
 """
 This module generates log files for monitoring.
+Callers only put records on an in-memory queue; a background listener thread writes
+them to the log files in batches, so log I/O never blocks scoring or request threads.
 """
+import atexit
+import io
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
 import os
+import queue
+import random
+import threading
 import time
+import tracemalloc
+from contextlib import contextmanager
 from functools import wraps
+from config import CONFIG
+from logs.metrics import describe_sizes, peak_rss_bytes, registry, traced_bytes
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Formats each record as one JSON object per line, including any `extra` fields.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS})
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records at each configured level, e.g. {"INFO": 0.1}.
+    Levels without a rate are always kept.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = {logging.getLevelName(level.upper()): rate for level, rate in rates.items()}
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        return rate is None or random.random() < rate
+
+
+class _DeferredFlushMixin:
+    # emit() no longer flushes on every record; the listener flushes once per batch
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+
+class BatchFileHandler(_DeferredFlushMixin, logging.FileHandler):
+    pass
+
+
+class BatchRotatingFileHandler(_DeferredFlushMixin, RotatingFileHandler):
+    pass
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that drains up to `batch_size` records, or whatever arrives within
+    `flush_interval` seconds, before flushing its handlers once. Errors are flushed
+    immediately.
+    """
+
+    def __init__(self, log_queue, *handlers, batch_size=256, flush_interval=0.5):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def _monitor(self):
+        while True:
+            record = self.queue.get()
+            stop = record is self._sentinel
+            batch = 0
+            deadline = time.monotonic() + self.flush_interval
+            while not stop:
+                self.handle(record)
+                batch += 1
+                if batch >= self.batch_size or record.levelno >= logging.ERROR:
+                    break
+                try:
+                    record = self.queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                stop = record is self._sentinel
+            for handler in self.handlers:
+                handler.flush_batch()
+            if stop:
+                return
+
+
+def _file_handlers(batched=True):
+    formatter = JsonLinesFormatter() if CONFIG.get("LOG_FORMAT") == "json" else None
+    if batched:
+        app_log = BatchFileHandler("logs/app.log")
+        # Use RotatingFileHandler to limit log file size
+        jats_log = BatchRotatingFileHandler(
+            "logs/jats.log", maxBytes=5_000_000, backupCount=5  # 5 MB max size, 5 backups
+        )
+    else:
+        # Only the parent's listener rotates; worker processes append and reopen the
+        # files once it has, so rotations never race and no record goes to a stale file
+        app_log = WatchedFileHandler("logs/app.log")
+        jats_log = WatchedFileHandler("logs/jats.log")
+    app_log.setFormatter(formatter or logging.Formatter(TEXT_FORMAT))
+    if formatter is not None:
+        jats_log.setFormatter(formatter)
+    return app_log, jats_log
+
+
+def _start_listener():
+    log_queue = queue.Queue()  # unbounded, so put_nowait never blocks or drops
+    listener = BatchingQueueListener(
+        log_queue, *_file_handlers(),
+        batch_size=CONFIG.get("LOG_BATCH_SIZE", 256),
+        flush_interval=CONFIG.get("LOG_FLUSH_INTERVAL", 0.5),
+    )
+    queue_handler.queue = log_queue
+    listener.start()
+    return listener
+
+
+def stop_logging():
+    """
+    Write out every queued record and stop the listener thread.
+    """
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+
+
+def _log_synchronously():
+    # Pool workers leave through os._exit, which skips atexit and would lose queued
+    # records, so worker processes write their (rare) records directly instead
+    global _listener, _worker_handlers
+    _listener = None
+    logger.removeHandler(queue_handler)
+    # A worker's own children replace its handlers rather than adding a second set
+    for handler in _worker_handlers:
+        logger.removeHandler(handler)
+    _worker_handlers = _file_handlers(batched=False)
+    for handler in _worker_handlers:
+        logger.addHandler(handler)
+
+
+def _in_worker_process():
+    import multiprocessing
+
+    return multiprocessing.parent_process() is not None
+
 
-logging.basicConfig(
-    filename="logs/app.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
 logger = logging.getLogger()
+logger.setLevel(CONFIG.get("LOG_LEVEL", "INFO"))
+
+queue_handler = QueueHandler(queue.Queue())
+if CONFIG.get("LOG_SAMPLE_RATES"):
+    # Sampled-out records are dropped before they are even queued
+    queue_handler.addFilter(SamplingFilter(CONFIG["LOG_SAMPLE_RATES"]))
+logger.addHandler(queue_handler)
+
+_listener = None
+_worker_handlers = ()
+if _in_worker_process():
+    _log_synchronously()
+else:
+    _listener = _start_listener()
+    atexit.register(stop_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_log_synchronously)
+
+# Per-thread flag marking that a cProfile capture is running
+_profiling = threading.local()
+
+# Per-thread callbacks told about every stage boundary (see observe_stages)
+_stage_observers = threading.local()
+
+if CONFIG.get("TRACE_MEMORY") and not tracemalloc.is_tracing():
+    tracemalloc.start()
 
 def log_event(message, level="info"):
     """
@@ -31,26 +218,103 @@ def log_event(message, level="info"):
     elif level == "critical":
         logger.critical(message)
 
+def _profile_requested(stage):
+    stages = CONFIG.get("PROFILE_STAGES") or ()
+    return stages == "*" or "*" in stages or stage in stages or stage.rsplit(".", 1)[-1] in stages
+
+def _dump_profile(profiler, stage):
+    import pstats
+
+    os.makedirs(CONFIG["PROFILE_DIR"], exist_ok=True)
+    path = os.path.join(CONFIG["PROFILE_DIR"], f"{stage}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(15)
+    logger.info(f"cProfile of '{stage}' saved to {path}\n{summary.getvalue()}")
+
+@contextmanager
+def observe_stages(callback):
+    """
+    Report every log_execution_time stage this thread runs inside the block.
+    The callback receives (event, stage, depth, elapsed_ns) with event "start", "end" or
+    "failed"; elapsed_ns is None on "start". Errors raised by the callback are logged
+    and never interrupt the stage.
+    Args:
+        callback (callable): Observer to call at each stage boundary.
+    """
+    observers = getattr(_stage_observers, "callbacks", ())
+    _stage_observers.callbacks = (*observers, callback)
+    try:
+        yield
+    finally:
+        _stage_observers.callbacks = observers
+
+def _notify_stage(event, stage, depth, elapsed_ns=None):
+    for callback in getattr(_stage_observers, "callbacks", ()):
+        try:
+            callback(event, stage, depth, elapsed_ns)
+        except Exception as e:
+            logger.warning(f"Stage observer failed on {event} of '{stage}': {e}")
+
 def log_execution_time(func):
     """
     Decorator to log the execution time of a function.
+    Each call is also recorded in logs.metrics.registry with its nanosecond wall time,
+    memory growth and input/output sizes, stages listed in CONFIG["PROFILE_STAGES"]
+    are run under cProfile, and start/end boundaries reach observe_stages callbacks.
     Args:
         func (function): Function to be wrapped.
     Returns:
         function: Wrapped function.
     """
+    stage = func.__qualname__
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        elapsed_time = time.time() - start_time
-        logger.info(f"Function '{func.__name__}' executed in {elapsed_time:.2f} seconds.")
-        return result
+        profiler = None
+        # cProfile cannot nest, so only the outermost profiled stage of a thread is captured
+        if _profile_requested(stage) and not getattr(_profiling, "active", False):
+            import cProfile
 
-    return wrapper
+            profiler = cProfile.Profile()
+            _profiling.active = True
+
+        depth = getattr(_stage_observers, "depth", 0)
+        _stage_observers.depth = depth + 1
+        _notify_stage("start", stage, depth)
 
-# Use RotatingFileHandler to limit log file size
-handler = RotatingFileHandler(
-    "logs/jats.log", maxBytes=5_000_000, backupCount=5  # 5 MB max size, 5 backups
-)
-logger.addHandler(handler)
\ No newline at end of file
+        rss_before = peak_rss_bytes()
+        traced_before = traced_bytes()
+        failed = True
+        start_time = time.perf_counter_ns()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            result = func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed_ns = time.perf_counter_ns() - start_time
+            _stage_observers.depth = depth
+            _notify_stage("failed" if failed else "end", stage, depth, elapsed_ns)
+            if profiler is not None:
+                profiler.disable()
+                _profiling.active = False
+                _dump_profile(profiler, stage)
+
+            traced_after = traced_bytes()
+            registry.record(
+                stage, elapsed_ns,
+                rss_growth=peak_rss_bytes() - rss_before,
+                traced_growth=None if traced_before is None or traced_after is None else traced_after - traced_before,
+                input_sizes=describe_sizes((*args, *kwargs.values())),
+                output_sizes={} if failed else describe_sizes((result,)),
+                failed=failed,
+            )
+            if not failed:
+                logger.info(
+                    f"Function '{func.__name__}' executed in {elapsed_ns / 1e9:.6f} seconds.",
+                    extra={"stage": stage, "elapsed_ns": elapsed_ns},
+                )
+
+    return wrapper
@@ -0,0 +1,266 @@
+# metrics.py
+"""
+This module keeps an in-process registry of per-stage metrics.
+log_execution_time records every decorated stage here: wall time in nanoseconds, peak
+RSS and traced-memory growth, and the sizes (rows, nnz, vocabulary) of its inputs and
+outputs. Plain event counters (cache hits and misses, for example) live next to the
+stages. The registry can be exported as JSON or as Prometheus text.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Label values are escaped as the Prometheus text format requires
+_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process.
+    Returns:
+        int: Bytes, or 0 where the platform does not report it.
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes():
+    """
+    Resident set size of this process right now, unlike peak_rss_bytes, so that the
+    difference of two samples can also be negative.
+    Returns:
+        int: Bytes, or None where /proc/self/statm is unavailable.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            resident_pages = int(file.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def traced_bytes():
+    """
+    Memory currently allocated by Python, when tracemalloc is tracing.
+    Returns:
+        int: Bytes, or None if tracemalloc is off.
+    """
+    if not tracemalloc.is_tracing():
+        return None
+    return tracemalloc.get_traced_memory()[0]
+
+
+def describe_sizes(values):
+    """
+    Measure the data a stage worked on.
+    DataFrames and lists count rows, sparse matrices count rows and stored values, and
+    fitted vectorizers count their vocabulary. Tuples and dicts are searched one level deep.
+    Args:
+        values (iterable): Arguments or results of a stage.
+    Returns:
+        dict: Largest "rows", "nnz" and "vocabulary" seen, for the keys that apply.
+    """
+    sizes = {}
+
+    def note(key, size):
+        if size > sizes.get(key, -1):
+            sizes[key] = int(size)
+
+    def visit(value, depth):
+        if hasattr(value, "nnz") and hasattr(value, "shape"):
+            note("nnz", value.nnz)
+            note("rows", value.shape[0])
+        elif getattr(value, "vocabulary_", None) is not None:
+            note("vocabulary", len(value.vocabulary_))
+        elif hasattr(value, "shape") and getattr(value, "ndim", 0) >= 1:
+            note("rows", value.shape[0])
+        elif isinstance(value, list):
+            note("rows", len(value))
+        elif depth == 0 and isinstance(value, (tuple, dict)):
+            for item in (value.values() if isinstance(value, dict) else value):
+                visit(item, 1)
+
+    for value in values:
+        visit(value, 0)
+    return sizes
+
+
+class StageMetrics:
+    """
+    Aggregated measurements of one decorated stage.
+    """
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.last_ns = 0
+        self.max_rss_growth = 0      # bytes the peak RSS grew during one call
+        self.max_traced_growth = None  # bytes allocated and kept, when tracemalloc is on
+        self.input_sizes = {}
+        self.output_sizes = {}
+
+    def record(self, elapsed_ns, rss_growth, traced_growth, input_sizes, output_sizes, failed):
+        self.calls += 1
+        self.errors += int(failed)
+        self.total_ns += elapsed_ns
+        self.max_ns = max(self.max_ns, elapsed_ns)
+        self.last_ns = elapsed_ns
+        self.max_rss_growth = max(self.max_rss_growth, rss_growth)
+        if traced_growth is not None:
+            self.max_traced_growth = max(self.max_traced_growth or 0, traced_growth)
+        self.input_sizes = input_sizes
+        self.output_sizes = output_sizes
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_seconds": self.total_ns / 1e9,
+            "mean_seconds": self.total_ns / 1e9 / max(self.calls, 1),
+            "max_seconds": self.max_ns / 1e9,
+            "last_seconds": self.last_ns / 1e9,
+            "max_rss_growth_bytes": self.max_rss_growth,
+            "max_traced_growth_bytes": self.max_traced_growth,
+            "input_sizes": dict(self.input_sizes),
+            "output_sizes": dict(self.output_sizes),
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe collection of StageMetrics keyed by stage name.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, elapsed_ns, rss_growth=0, traced_growth=None,
+               input_sizes=None, output_sizes=None, failed=False):
+        """
+        Add one call of a stage.
+        Args:
+            stage (str): Stage name (the decorated function's qualified name).
+            elapsed_ns (int): Wall time from perf_counter_ns.
+            rss_growth (int): Growth of the peak RSS during the call, in bytes.
+            traced_growth (int): tracemalloc growth during the call, or None.
+            input_sizes (dict): Sizes from describe_sizes for the arguments.
+            output_sizes (dict): Sizes from describe_sizes for the result.
+            failed (bool): The call raised.
+        """
+        with self._lock:
+            metrics = self._stages.get(stage)
+            if metrics is None:
+                metrics = self._stages[stage] = StageMetrics(stage)
+            metrics.record(
+                elapsed_ns, rss_growth, traced_growth,
+                input_sizes or {}, output_sizes or {}, failed
+            )
+
+    def increment(self, counter, amount=1):
+        """
+        Add to an event counter.
+        Args:
+            counter (str): Counter name, e.g. "result_cache_misses".
+            amount (int): Value to add.
+        """
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def counters(self):
+        """
+        Returns:
+            dict: Counter name mapped to its value.
+        """
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: Stage name mapped to its aggregated metrics.
+        """
+        with self._lock:
+            return {stage: metrics.as_dict() for stage, metrics in sorted(self._stages.items())}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+
+    def to_json(self):
+        """
+        Returns:
+            str: The registry as a JSON document, including process-wide memory figures.
+        """
+        return json.dumps({
+            "process": {"peak_rss_bytes": peak_rss_bytes(), "traced_bytes": traced_bytes()},
+            "stages": self.snapshot(),
+            "counters": self.counters(),
+        }, indent=2)
+
+    def to_prometheus(self):
+        """
+        Returns:
+            str: The registry in the Prometheus text exposition format.
+        """
+        stages = self.snapshot()
+        lines = [
+            "# HELP jats_process_peak_rss_bytes Peak resident set size of the process.",
+            "# TYPE jats_process_peak_rss_bytes gauge",
+            f"jats_process_peak_rss_bytes {peak_rss_bytes()}",
+        ]
+        series = [
+            ("jats_stage_calls_total", "counter", "Calls of the stage.", "calls"),
+            ("jats_stage_errors_total", "counter", "Calls of the stage that raised.", "errors"),
+            ("jats_stage_seconds_total", "counter", "Wall time spent in the stage.", "total_seconds"),
+            ("jats_stage_seconds_max", "gauge", "Slowest call of the stage.", "max_seconds"),
+            ("jats_stage_seconds_last", "gauge", "Most recent call of the stage.", "last_seconds"),
+            ("jats_stage_rss_growth_bytes_max", "gauge", "Largest peak-RSS growth during one call.",
+             "max_rss_growth_bytes"),
+            ("jats_stage_traced_growth_bytes_max", "gauge", "Largest tracemalloc growth during one call.",
+             "max_traced_growth_bytes"),
+        ]
+        for name, kind, help_text, field in series:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for stage, metrics in stages.items():
+                if metrics[field] is not None:
+                    lines.append(f'{name}{{stage="{_label(stage)}"}} {metrics[field]}')
+
+        lines.append("# HELP jats_stage_size Rows, nnz or vocabulary size seen by the latest call.")
+        lines.append("# TYPE jats_stage_size gauge")
+        for stage, metrics in stages.items():
+            for direction in ("input", "output"):
+                for kind, size in metrics[f"{direction}_sizes"].items():
+                    lines.append(
+                        f'jats_stage_size{{stage="{_label(stage)}",direction="{direction}",kind="{kind}"}} {size}'
+                    )
+
+        for counter, value in self.counters().items():
+            name = f"jats_{re.sub(r'[^a-zA-Z0-9_]', '_', counter)}_total"
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return re.sub(r"[^\x20-\x7e]", "_", value).translate(_LABEL_ESCAPES)
+
+
+registry = MetricsRegistry()
@@ -1,27 +1,26 @@
-from data.data_loader import (
-    load_csv, load_cv,
-    preprocess_csv, preprocess_cv,
-    featurize_text
-)
-from models.model import (
-    calculate_similarity, rank_jobs_by_similarity,
-    extract_top_keywords, find_missing_keywords,
-    evaluate_similarity, evaluate_keyword_recommendations
-)
-from visualizations.plotter import (
-    plot_keyword_frequency, plot_top_matches,
-    plot_missing_keywords, plot_similarity_heatmap,
-    plot_interactive_keyword_comparison, plot_evaluation_metrics
-)
+import argparse
+import os
+import subprocess
+import sys
 from logs.log_config import log_event
 from config import CONFIG
-from health_check.health_check import health_check
 import traceback
 
-def main():
-    # Perform health check
+# Heavy libraries (pandas, scikit-learn, NLTK, matplotlib, seaborn, plotly) are imported
+# inside the stage that needs them, so each subcommand only pays for its own imports.
+
+def run_health(deep=False):
+    """
+    Run the health check.
+    Args:
+        deep (bool): Also verify the cached artifacts by checksum.
+    Returns:
+        tuple: True if every check passed, and the data the check loaded.
+    """
+    from health_check.health_check import health_check
+
     log_event("Starting health check...")
-    checks = health_check()
+    checks, loaded = health_check(deep=deep)
     log_event(f"Health Check Results: {checks}")
     print("Health Check Results:", checks)
 
@@ -29,94 +28,284 @@ def main():
     if not all(checks.values()):
         print("Critical issues detected during health check. Exiting.")
         log_event("Critical issues detected. Exiting application.", level="error")
-        return
+        return False, loaded
 
     # Log successful health check
     log_event("Health check passed. Proceeding with application.")
+    return True, loaded
 
-    try:
-        # config variables
-        csv_path = CONFIG["CSV_PATH"]
-        cv_path = CONFIG["CV_PATH"]
-        top_n_keywords = CONFIG["TOP_N_KEYWORDS"]
-        top_n_jobs = CONFIG["TOP_N_JOBS"]
+def run_featurize(return_key=False):
+    """
+    Load, preprocess and featurize the job listings.
+    Args:
+        return_key (bool): Also return the key of the artifact the features came from.
+    Returns:
+        tuple: Jobs data (a memory-mapped JobStore when cached), fitted vectorizer and
+            TF-IDF job matrix (and the artifact key with return_key).
+    """
+    csv_path = CONFIG["CSV_PATH"]
 
-        log_event("Starting JATS application")
+    # Load, preprocess and featurize jobs (cached TF-IDF artifacts are reused when the CSV is unchanged)
+    if CONFIG["STREAMING_INGEST"]:
+        from data.streaming import prepare_job_features_streaming
+        featurized = prepare_job_features_streaming(csv_path, return_key=return_key)
+    else:
+        from data.ingest import prepare_job_features
+        featurized = prepare_job_features(csv_path, return_key=return_key)
+
+    job_features = featurized[2]
+    print(f"Featurized {job_features.shape[0]} jobs over {job_features.shape[1]} features")
+    return featurized
+
+def run_score(cv_content=None):
+    """
+    Score the configured CV against the job listings and print the results.
+    Args:
+        cv_content (str): CV text already loaded by the health check; read from
+            CONFIG["CV_PATH"] when omitted.
+    Returns:
+        list: Plot tasks for render_plots, in display order.
+    """
+    from data.data_loader import load_cv, preprocess_cv
+    from models.model import (
+        calculate_similarity, rank_jobs_by_similarity,
+        extract_top_keywords, find_missing_keywords,
+        evaluate_similarity, evaluate_keyword_recommendations
+    )
+    from models.keyword_index import build_keyword_index
+
+    # config variables
+    cv_path = CONFIG["CV_PATH"]
+    top_n_jobs = CONFIG["TOP_N_JOBS"]
 
-        # Load data
-        jobs_data = load_csv(csv_path)
-        cv_data = load_cv(cv_path)
+    jobs_data, vectorizer, job_features = run_featurize()
 
-        # Preprocess data
-        jobs_data = preprocess_csv(jobs_data)
-        cv_data = preprocess_cv(cv_data)
+    # Load and preprocess the CV
+    cv_data = cv_content if cv_content is not None else load_cv(cv_path)
+    cv_data = preprocess_cv(cv_data)
 
-        # Featurize text
-        job_features, cv_vector, feature_names = featurize_text(
-            jobs_data['Job Description'], cv_data
-        )
+    # Featurize the CV with the fitted vocabulary
+    cv_vector = vectorizer.transform([cv_data])
+    feature_names = vectorizer.get_feature_names_out()
 
-        # Visualize keyword frequency
-        plot_keyword_frequency(feature_names, job_features)
+    # Precompute keyword statistics once for every keyword query and plot
+    keyword_index = build_keyword_index(feature_names, job_features)
 
-        # Calculate similarity scores
-        similarity_scores = calculate_similarity(job_features, cv_vector)
+    # Plots are collected here and rendered together by run_plot
+    plot_tasks = []
 
-        # Rank jobs by similarity
-        ranked_jobs = rank_jobs_by_similarity(jobs_data, similarity_scores)
-        print(ranked_jobs[['Job Title', 'Similarity Score']].head())
+    # Visualize keyword frequency
+    plot_tasks.append((
+        "plot_keyword_frequency", (feature_names, None),
+        {"keyword_sums": keyword_index.column_sums}
+    ))
 
-        # Visualize top matches
-        plot_top_matches(ranked_jobs)
+    # Calculate similarity scores
+    similarity_scores = calculate_similarity(job_features, cv_vector)
 
-        # Extract top keywords from job descriptions
-        top_keywords = extract_top_keywords(feature_names, job_features, top_n=10)
-        print("Top Keywords in Job Descriptions:", top_keywords)
+    # Rank jobs by similarity (only the top jobs are selected and copied)
+    ranked_jobs = rank_jobs_by_similarity(jobs_data, similarity_scores, top_n=top_n_jobs)
+    print(ranked_jobs[['Job Title', 'Similarity Score']].head())
 
-        # Find missing keywords in the CV
-        missing_keywords = find_missing_keywords(cv_vector, feature_names, job_features)
-        print("Missing Keywords in CV:", missing_keywords[:10])  # Show top 10 missing keywords
+    # Visualize top matches
+    plot_tasks.append(("plot_top_matches", (ranked_jobs,), {}))
 
-        # Visualize missing keywords
-        plot_missing_keywords(missing_keywords, top_n=10)
+    # Extract top keywords from job descriptions
+    top_keywords = extract_top_keywords(feature_names, job_features, top_n=10, keyword_index=keyword_index)
+    print("Top Keywords in Job Descriptions:", top_keywords)
 
-        # Visualize similarity heatmap
-        plot_similarity_heatmap(ranked_jobs, top_n=5)
+    # Find missing keywords in the CV
+    missing_keywords = find_missing_keywords(
+        cv_vector, feature_names, job_features, keyword_index=keyword_index
+    )
+    print("Missing Keywords in CV:", missing_keywords[:10])  # Show top 10 missing keywords
 
-        # Visualize keyword comparison
-        plot_interactive_keyword_comparison(
-            feature_names, cv_vector,
-            job_features, top_n=10
-        )
+    # Visualize missing keywords
+    plot_tasks.append(("plot_missing_keywords", (missing_keywords,), {"top_n": 10}))
 
-        # Evaluate similarity scores
-        similarity_metrics = evaluate_similarity(ranked_jobs, threshold=0.5)
-        print("Similarity Metrics:", similarity_metrics)
+    # Visualize similarity heatmap
+    plot_tasks.append(("plot_similarity_heatmap", (ranked_jobs,), {"top_n": 5}))
 
-        # Evaluate keyword recommendations
-        recommendation_metrics = evaluate_keyword_recommendations(
-            missing_keywords, top_n=10
-        )
-        print("Keyword Recommendation Metrics:", recommendation_metrics)
+    # Visualize keyword comparison
+    plot_tasks.append((
+        "plot_interactive_keyword_comparison", (feature_names, cv_vector, None),
+        {"top_n": 10, "keyword_sums": keyword_index.column_sums}
+    ))
 
-        # Combine metrics and visualize
-        all_metrics = {**similarity_metrics, **recommendation_metrics}
+    # Evaluate similarity scores over every job, not just the top matches
+    similarity_metrics = evaluate_similarity(similarity_scores, threshold=0.5)
+    print("Similarity Metrics:", similarity_metrics)
 
-        # Define the maximum values for scaling
-        max_jobs = 2000  # Replace with actual maximum or dataset size
+    # Evaluate keyword recommendations
+    recommendation_metrics = evaluate_keyword_recommendations(
+        missing_keywords, top_n=10
+    )
+    print("Keyword Recommendation Metrics:", recommendation_metrics)
 
-        # Normalize metrics
-        normalized_metrics = {
-            key: (value / max_jobs) * 100 if key == "Total Jobs" else value
-            for key, value in all_metrics.items()
-        }
+    # Combine metrics and visualize
+    all_metrics = {**similarity_metrics, **recommendation_metrics}
 
-        plot_evaluation_metrics(normalized_metrics)
+    # Scale job counts by the size of the dataset
+    max_jobs = max(job_features.shape[0], 1)
+
+    # Normalize metrics
+    normalized_metrics = {
+        key: (value / max_jobs) * 100 if key == "Total Jobs" else value
+        for key, value in all_metrics.items()
+    }
+
+    plot_tasks.append(("plot_evaluation_metrics", (normalized_metrics,), {}))
+    return plot_tasks
+
+def run_plot(plot_tasks, plot_mode=None):
+    """
+    Render the plots collected by run_score.
+    Args:
+        plot_tasks (list): (plot function name, args, kwargs) triples.
+        plot_mode (str): "show" opens each chart, "export" writes them in parallel,
+            "none" skips plotting; defaults to CONFIG["PLOT_MODE"].
+    """
+    plot_mode = plot_mode or CONFIG["PLOT_MODE"]
+    if plot_mode == "none":
+        return
+
+    # matplotlib, seaborn and plotly are only imported when plots are requested
+    from visualizations.plotter import render_plots
+    output_dir = CONFIG["PLOT_DIR"] if plot_mode == "export" else None
+    render_plots(plot_tasks, output_dir, fmt=CONFIG["PLOT_FORMAT"])
+
+def main():
+    # Full pipeline: health check, featurize, score and plot
+    healthy, loaded = run_health()
+    if not healthy:
+        return
+
+    try:
+        log_event("Starting JATS application")
+        run_plot(run_score(loaded.get("cv")))
 
     except Exception as e:
         # log errors
         log_event(f"Unexpected error: {e}", level="critical")
         print("An unexpected error occurred. Check the logs for details.")
 
+def parse_import_times(stderr, top_n=10):
+    """
+    Summarize the output of `python -X importtime`.
+    Args:
+        stderr (str): Captured standard error of the child process.
+        top_n (int): Number of top-level imports to report.
+    Returns:
+        tuple: Total import seconds, the slowest top-level imports as (module, seconds)
+            pairs, and the remaining stderr lines that were not import timings.
+    """
+    top_level, other_lines = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            other_lines.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # column header
+        name = fields[2]
+        # Nested imports are indented; top-level cumulative times add up to the total
+        if name.startswith(" ") and not name.startswith("  "):
+            top_level.append((name.strip(), int(fields[1]) / 1e6))
+    total = sum(seconds for _, seconds in top_level)
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total, top_level[:top_n], other_lines
+
+def report_import_times(command_args, top_n=10):
+    """
+    Re-run a subcommand under `-X importtime` and report its cold-start import cost.
+    Args:
+        command_args (list): Subcommand and its arguments.
+        top_n (int): Number of slowest top-level imports to report.
+    Returns:
+        int: Exit code of the child process.
+    """
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", os.path.abspath(__file__), *command_args],
+        stderr=subprocess.PIPE, text=True
+    )
+    total, slowest, other_lines = parse_import_times(child.stderr, top_n)
+    if other_lines:
+        print("\n".join(other_lines), file=sys.stderr)
+
+    command = " ".join(command_args) or "(full pipeline)"
+    print(f"\nImport time for {command}: {total:.2f} seconds")
+    for module, seconds in slowest:
+        print(f"  {module:<40} {seconds:8.3f} s")
+    log_event(f"Import time for {command}: {total:.2f} seconds; slowest: {slowest}")
+    return child.returncode
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Job Application Tracking System")
+    parser.add_argument(
+        "--import-times", action="store_true",
+        help="run the command under -X importtime and report its cold-start import cost"
+    )
+    parser.add_argument(
+        "--metrics-out", metavar="PATH",
+        help="write the per-stage metrics registry to PATH as JSON when the command finishes"
+    )
+    subcommands = parser.add_subparsers(dest="command")
+    health = subcommands.add_parser("health", help="check the job CSV, the CV and logging")
+    health.add_argument(
+        "--deep", action="store_true", help="also verify the cached artifacts by checksum"
+    )
+    subcommands.add_parser("featurize", help="build or reuse the TF-IDF job artifacts")
+    subcommands.add_parser("score", help="rank jobs and find missing keywords for the CV")
+    plot = subcommands.add_parser("plot", help="score the CV and render the charts")
+    plot.add_argument(
+        "--mode", choices=["show", "export"],
+        help="open the charts or write them to CONFIG['PLOT_DIR'] (default: CONFIG['PLOT_MODE'])"
+    )
+    return parser
+
+def cli(argv=None):
+    """
+    Command-line entry point.
+    Args:
+        argv (list): Arguments; defaults to sys.argv[1:].
+    Returns:
+        int: Process exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser().parse_args(argv)
+
+    if args.import_times:
+        return report_import_times([arg for arg in argv if arg != "--import-times"])
+
+    exit_code = run_command(args)
+    if args.metrics_out:
+        from logs.metrics import registry
+
+        with open(args.metrics_out, "w") as file:
+            file.write(registry.to_json())
+        print(f"Stage metrics written to {args.metrics_out}")
+    return exit_code
+
+def run_command(args):
+    if args.command is None:
+        main()
+        return 0
+
+    try:
+        if args.command == "health":
+            return 0 if run_health(args.deep)[0] else 1
+        if args.command == "featurize":
+            run_featurize()
+        elif args.command == "score":
+            run_score()
+        elif args.command == "plot":
+            mode = args.mode or CONFIG["PLOT_MODE"]
+            run_plot(run_score(), "export" if mode == "none" else mode)
+        return 0
+    except Exception as e:
+        log_event(f"Unexpected error in {args.command}: {e}\n{traceback.format_exc()}", level="critical")
+        print("An unexpected error occurred. Check the logs for details.")
+        return 1
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(cli())
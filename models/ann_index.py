@@ -0,0 +1,298 @@
+# ann_index.py
+"""
+This module provides an approximate nearest-neighbour index for job retrieval.
+Job vectors are projected with truncated SVD and bucketed by random-hyperplane LSH,
+so a query only scores the jobs that share a bucket with the CV.
+"""
+import os
+import tempfile
+import threading
+import time
+import weakref
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from config import CONFIG
+from data.job_store import matrix_fingerprint
+from logs.log_config import log_event, log_execution_time
+from models.model import calculate_similarity, top_k_indices
+
+# TruncatedSVD needs two features to keep at least one component
+MIN_FEATURES = 2
+
+
+class AnnIndex:
+    """
+    Truncated-SVD projection plus multi-table random-projection LSH.
+    Each table stores the bucket code of every job sorted, so a bucket lookup is a
+    binary search rather than a scan.
+    """
+
+    def __init__(self, components, planes, vectors, codes, orders):
+        self.components = components  # (n_components, n_features)
+        self.planes = planes          # (n_tables, n_bits, n_components)
+        self.vectors = vectors        # (n_jobs, n_components), L2-normalized
+        self.codes = codes            # (n_tables, n_jobs), sorted bucket codes
+        self.orders = orders          # (n_tables, n_jobs), job index for each sorted code
+        self._bit_values = np.left_shift(1, np.arange(planes.shape[1], dtype=np.int64))
+
+    @classmethod
+    @log_execution_time
+    def build(cls, job_features, n_components=None, n_tables=None, n_bits=None, seed=0):
+        """
+        Build the index from the TF-IDF job matrix.
+        Args:
+            job_features (sparse matrix): TF-IDF matrix for job descriptions.
+            n_components (int): SVD dimensions; defaults to CONFIG["ANN_COMPONENTS"].
+            n_tables (int): Number of hash tables; defaults to CONFIG["ANN_TABLES"].
+            n_bits (int): Hyperplanes per table; defaults to CONFIG["ANN_BITS"].
+            seed (int): Random seed for the SVD and the hyperplanes.
+        Returns:
+            AnnIndex: Built index.
+        Raises:
+            ValueError: If the matrix has fewer than two features, too few for the SVD.
+        """
+        if job_features.shape[1] < MIN_FEATURES:
+            raise ValueError(f"An ANN index needs at least {MIN_FEATURES} features, got {job_features.shape[1]}")
+        n_components = max(1, min(n_components or CONFIG["ANN_COMPONENTS"], job_features.shape[1] - 1))
+        n_tables = n_tables or CONFIG["ANN_TABLES"]
+        n_bits = n_bits or CONFIG["ANN_BITS"]
+
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        svd.fit(job_features)
+        components = svd.components_.astype(np.float32)
+
+        rng = np.random.default_rng(seed)
+        planes = rng.standard_normal((n_tables, n_bits, n_components)).astype(np.float32)
+        index = cls(components, planes, None, None, None)
+        index.vectors = index.project(job_features)
+
+        codes = index._hash(index.vectors)
+        orders = np.argsort(codes, axis=1, kind="stable")
+        index.codes = np.take_along_axis(codes, orders, axis=1)
+        index.orders = orders
+        log_event(f"ANN index built: {job_features.shape[0]} jobs, {n_components} dims, {n_tables}x{n_bits} bits")
+        return index
+
+    def project(self, matrix):
+        """
+        Project TF-IDF rows into the normalized SVD space.
+        Args:
+            matrix (sparse matrix): TF-IDF rows.
+        Returns:
+            np.ndarray: Dense float32 vectors with unit length.
+        """
+        return normalize(np.asarray(matrix @ self.components.T, dtype=np.float32))
+
+    def _hash(self, vectors):
+        # (n_tables, n_vectors) integer bucket codes
+        bits = np.einsum("tbd,nd->tnb", self.planes, vectors) > 0
+        return bits.astype(np.int64) @ self._bit_values
+
+    def candidates(self, vector, n_probes=1):
+        """
+        Collect the jobs sharing a bucket with the query in any table.
+        Args:
+            vector (np.ndarray): Projected query of shape (n_components,).
+            n_probes (int): 0 looks up the exact bucket only; 1 also probes every bucket
+                one bit away (multi-probe LSH).
+        Returns:
+            np.ndarray: Unique candidate job indices.
+        """
+        query_codes = self._hash(vector[np.newaxis, :])[:, 0]
+        found = []
+        for table, code in enumerate(query_codes):
+            probes = [code]
+            if n_probes:
+                probes.extend(code ^ self._bit_values)
+            for probe in probes:
+                lo = np.searchsorted(self.codes[table], probe, side="left")
+                hi = np.searchsorted(self.codes[table], probe, side="right")
+                if hi > lo:
+                    found.append(self.orders[table, lo:hi])
+        if not found:
+            return np.array([], dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, cv_vector, top_k=5, job_features=None, n_probes=1):
+        """
+        Find the top K jobs for a CV among the LSH candidates.
+        When fewer than K jobs share a bucket with the CV (a sparse or out-of-vocabulary
+        CV), every job is scored instead, so a query never comes back short.
+        Args:
+            cv_vector (sparse matrix): TF-IDF vector for the CV.
+            top_k (int): Number of jobs to return.
+            job_features (sparse matrix): When given, candidates are re-scored with exact
+                cosine similarity; otherwise the SVD-space cosine is used.
+            n_probes (int): See candidates().
+        Returns:
+            tuple: Job indices and similarity scores, best first.
+        """
+        vector = self.project(cv_vector)[0]
+        candidates = self.candidates(vector, n_probes)
+        if len(candidates) < min(top_k, len(self.vectors)):
+            if job_features is not None:
+                scores = calculate_similarity(job_features, cv_vector)
+            else:
+                scores = self.vectors @ vector
+            best = top_k_indices(scores, top_k)
+            return best, scores[best]
+        if job_features is not None:
+            scores = calculate_similarity(job_features[candidates], cv_vector)
+        else:
+            scores = self.vectors[candidates] @ vector
+        best = top_k_indices(scores, top_k)
+        return candidates[best], scores[best]
+
+    def save(self, path):
+        """
+        Save the index to a .npz file.
+        The file is written next to the target and moved into place, so a concurrent
+        load() never opens a partially written index.
+        Args:
+            path (str): Target file path.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handle, staging = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                np.savez(
+                    file, components=self.components, planes=self.planes,
+                    vectors=self.vectors, codes=self.codes, orders=self.orders
+                )
+            os.replace(staging, path)
+        except BaseException:
+            os.unlink(staging)
+            raise
+        log_event(f"ANN index saved to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an index saved with save().
+        Args:
+            path (str): Index file path.
+        Returns:
+            AnnIndex: Loaded index.
+        """
+        with np.load(path) as stored:
+            return cls(
+                stored["components"], stored["planes"], stored["vectors"],
+                stored["codes"], stored["orders"]
+            )
+
+
+def ann_parameters():
+    """
+    Returns:
+        tuple: The configured (ANN_COMPONENTS, ANN_TABLES, ANN_BITS).
+    """
+    return CONFIG["ANN_COMPONENTS"], CONFIG["ANN_TABLES"], CONFIG["ANN_BITS"]
+
+
+def get_ann_index(job_features, index_dir=None):
+    """
+    Load the index built for this job matrix and the configured ANN parameters,
+    or build and persist it.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix in CSR format.
+        index_dir (str): Directory holding saved indexes; defaults to CONFIG["ARTIFACT_DIR"].
+    Returns:
+        AnnIndex: Index matching job_features, or None for a matrix with too few features
+            to project, which is searched exactly.
+    """
+    if job_features.shape[1] < MIN_FEATURES:
+        log_event(f"{job_features.shape[1]} features are too few for an ANN index, using exact search")
+        return None
+    n_components, n_tables, n_bits = ann_parameters()
+    # The parameters are part of the name, so changing them never loads a stale index
+    path = os.path.join(
+        index_dir or CONFIG["ARTIFACT_DIR"],
+        f"ann_{matrix_fingerprint(job_features)[:16]}_{n_components}x{n_tables}x{n_bits}.npz",
+    )
+    if os.path.isfile(path):
+        return AnnIndex.load(path)
+    index = AnnIndex.build(job_features, n_components, n_tables, n_bits)
+    index.save(path)
+    return index
+
+
+_cached_indexes = {}  # id(job_features) -> (weak reference, parameters, index)
+_cached_indexes_lock = threading.Lock()
+
+
+def _cached_ann_index(job_features):
+    # Fingerprinting hashes the whole matrix, so it is done once per matrix object
+    parameters = ann_parameters()
+    with _cached_indexes_lock:
+        cached = _cached_indexes.get(id(job_features))
+    if cached is not None and cached[0]() is job_features and cached[1] == parameters:
+        return cached[2]
+    index = get_ann_index(job_features)
+    with _cached_indexes_lock:
+        # Entries of collected matrices are dropped so their ids can be reused safely
+        for key in [key for key, entry in _cached_indexes.items() if entry[0]() is None]:
+            del _cached_indexes[key]
+        _cached_indexes[id(job_features)] = (weakref.ref(job_features), parameters, index)
+    return index
+
+
+def retrieve_top_jobs(job_features, cv_vector, top_k=5, index=None):
+    """
+    Retrieve the top K jobs for a CV through the configured retrieval path.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        cv_vector (sparse matrix): TF-IDF vector for the CV.
+        top_k (int): Number of jobs to return.
+        index (AnnIndex or ShardedIndex): Prebuilt index; when omitted, CONFIG["RETRIEVAL_INDEX"]
+            decides between exact brute force and the persisted ANN index.
+    Returns:
+        tuple: Job indices and similarity scores, best first.
+    """
+    if index is None and CONFIG.get("RETRIEVAL_INDEX") == "ann":
+        index = _cached_ann_index(job_features)
+    if index is not None:
+        return index.query(cv_vector, top_k, job_features)
+
+    scores = calculate_similarity(job_features, cv_vector)
+    best = top_k_indices(scores, top_k)
+    return best, scores[best]
+
+
+@log_execution_time
+def evaluate_recall(index, job_features, query_vectors, top_k=5, n_probes=1):
+    """
+    Measure recall@K of the index against exact brute-force retrieval.
+    Args:
+        index (AnnIndex): Index to evaluate.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        query_vectors (sparse matrix): TF-IDF rows to use as queries (e.g. CVs or sampled jobs).
+        top_k (int): K for recall@K.
+        n_probes (int): See AnnIndex.candidates().
+    Returns:
+        dict: Mean recall@K, mean candidate fraction and timings of both paths.
+    """
+    recalls, candidate_counts = [], []
+    exact_time = approx_time = 0.0
+    for row in range(query_vectors.shape[0]):
+        query = query_vectors[row]
+
+        start = time.perf_counter()
+        exact = set(top_k_indices(calculate_similarity(job_features, query), top_k).tolist())
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx, _ = index.query(query, top_k, job_features, n_probes)
+        approx_time += time.perf_counter() - start
+
+        candidate_counts.append(len(index.candidates(index.project(query)[0], n_probes)))
+        recalls.append(len(exact.intersection(approx.tolist())) / max(len(exact), 1))
+
+    metrics = {
+        f"Recall@{top_k}": float(np.mean(recalls)) if recalls else 0.0,
+        "Candidate Fraction": float(np.mean(candidate_counts)) / max(job_features.shape[0], 1),
+        "Exact Seconds": exact_time,
+        "ANN Seconds": approx_time,
+    }
+    log_event(f"ANN evaluation: {metrics}")
+    return metrics
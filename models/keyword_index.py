@@ -0,0 +1,113 @@
+# keyword_index.py
+"""
+This module precomputes keyword statistics once per featurization.
+Column sums, document frequencies and per-term postings lists answer the keyword
+queries with vectorized masks instead of re-summing the job matrix every time.
+"""
+import numpy as np
+from logs.log_config import log_execution_time
+from models.model import cv_terms, top_k_indices
+
+
+class KeywordIndex:
+    """
+    Keyword statistics over a TF-IDF job matrix.
+    """
+
+    def __init__(self, feature_names, job_features):
+        by_term = job_features.tocsc()
+        self.feature_names = np.asarray(feature_names)
+        self.job_features = job_features.tocsr()
+        self.column_sums = np.asarray(self.job_features.sum(axis=0)).ravel()
+        self.doc_freq = np.diff(by_term.indptr)
+        # postings[postings_indptr[t]:postings_indptr[t + 1]] are the jobs containing term t
+        self.postings_indptr = by_term.indptr
+        self.postings = by_term.indices
+        self.term_ids = {term: i for i, term in enumerate(self.feature_names.tolist())}
+
+    def postings_for(self, term):
+        """
+        Jobs whose description contains a term.
+        Args:
+            term (str): Feature name.
+        Returns:
+            np.ndarray: Sorted job indices (empty for unknown terms).
+        """
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.array([], dtype=self.postings.dtype)
+        jobs = self.postings[self.postings_indptr[term_id]:self.postings_indptr[term_id + 1]]
+        return np.sort(jobs)
+
+    def keyword_sums(self, job_rows=None):
+        """
+        TF-IDF column sums over all jobs or a subset of them.
+        Args:
+            job_rows (array-like): Job indices to restrict to; None uses every job.
+        Returns:
+            np.ndarray: Summed TF-IDF score per feature.
+        """
+        if job_rows is None:
+            return self.column_sums
+        return np.asarray(self.job_features[np.asarray(job_rows)].sum(axis=0)).ravel()
+
+    def top_keywords(self, top_n=10, job_rows=None):
+        """
+        Highest-scoring keywords.
+        Args:
+            top_n (int): Number of keywords to return.
+            job_rows (array-like): Optional subset of jobs.
+        Returns:
+            list: (keyword, score) pairs, best first.
+        """
+        sums = self.keyword_sums(job_rows)
+        return [(self.feature_names[i], sums[i]) for i in top_k_indices(sums, top_n)]
+
+    def missing_keywords(self, cv_vector, job_rows=None):
+        """
+        Keywords present in the jobs but absent from the CV.
+        Args:
+            cv_vector (sparse matrix): TF-IDF vector for the CV.
+            job_rows (array-like): Optional subset of jobs (e.g. one job or a filtered result).
+        Returns:
+            list: (keyword, score) pairs sorted by descending score.
+        """
+        sums = self.keyword_sums(job_rows)
+        mask = sums > 0
+        mask[cv_terms(cv_vector)] = False
+        missing = np.flatnonzero(mask)
+        missing = missing[np.argsort(-sums[missing], kind="stable")]
+        return [(self.feature_names[i], sums[i]) for i in missing]
+
+    def job_keyword_gaps(self, cv_vector, job_rows, top_n=10):
+        """
+        Top missing keywords for each job individually.
+        Args:
+            cv_vector (sparse matrix): TF-IDF vector for the CV.
+            job_rows (array-like): Job indices.
+            top_n (int): Number of missing keywords per job.
+        Returns:
+            dict: Job index mapped to its (keyword, score) gaps.
+        """
+        present = cv_terms(cv_vector)
+        gaps = {}
+        for row in np.asarray(job_rows).tolist():
+            job = self.job_features[row]
+            keep = ~np.isin(job.indices, present)
+            terms, scores = job.indices[keep], job.data[keep]
+            best = top_k_indices(scores, top_n)
+            gaps[row] = [(self.feature_names[terms[i]], scores[i]) for i in best]
+        return gaps
+
+
+@log_execution_time
+def build_keyword_index(feature_names, job_features):
+    """
+    Build the keyword statistics index for a featurization.
+    Args:
+        feature_names (list): Feature names from TF-IDF.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+    Returns:
+        KeywordIndex: Precomputed keyword statistics.
+    """
+    return KeywordIndex(feature_names, job_features)
@@ -2,8 +2,10 @@
 """
 This module handles keyword analysis and job-CV matching.
 """
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import row_norms
 import numpy as np
+import pandas as pd
 from logs.log_config import log_execution_time
 
 @log_execution_time
@@ -16,59 +18,171 @@ def calculate_similarity(job_features, cv_vector):
     Returns:
         list: List of similarity scores for each job description.
     """
-    similarities = cosine_similarity(job_features, cv_vector)
-    return similarities.flatten()
+    # Sparse dot products over precomputed norms: neither the job matrix nor the CV is
+    # densified or copied, and a float32 matrix is not upcast to float64
+    cv_vector = cv_vector.astype(job_features.dtype, copy=False)
+    dots = (job_features @ cv_vector.T).toarray().ravel()
+    norms = row_norms(job_features) * row_norms(cv_vector)[0]
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > 0)
+
+def top_k_indices(scores, top_k):
+    """
+    Indices of the K highest scores, best first, in O(n + K log K).
+    Args:
+        scores (np.ndarray): Score array.
+        top_k (int): Number of indices to select.
+    Returns:
+        np.ndarray: Indices of the top K scores sorted by descending score.
+    """
+    scores = np.asarray(scores)
+    if top_k <= 0:
+        return np.array([], dtype=np.intp)
+    if len(scores) > top_k:
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+@log_execution_time
+def calculate_similarity_batch(job_features, cv_matrix):
+    """
+    Calculate cosine similarity between every job description and every CV.
+    Computed as a single sparse product of L2-normalized rows, so the result stays sparse.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        cv_matrix (sparse matrix): TF-IDF matrix with one row per CV.
+    Returns:
+        sparse matrix: Jobs x CVs similarity scores in CSC format (one column per CV).
+    """
+    similarities = normalize(job_features) @ normalize(cv_matrix).T
+    return similarities.tocsc()
+
+@log_execution_time
+def top_k_per_cv(similarities, top_k=5):
+    """
+    Select the top K jobs for each CV without densifying the similarity matrix.
+    Only the stored (non-zero) scores of each column are partitioned.
+    Args:
+        similarities (sparse matrix): Jobs x CVs similarity scores in CSC format.
+        top_k (int): Number of jobs to keep per CV.
+    Returns:
+        list: For each CV, a list of (job index, similarity score) sorted by score.
+    """
+    rankings = []
+    for column in range(similarities.shape[1]):
+        start, end = similarities.indptr[column], similarities.indptr[column + 1]
+        scores = similarities.data[start:end]
+        rows = similarities.indices[start:end]
+        order = top_k_indices(scores, top_k)
+        rankings.append(list(zip(rows[order].tolist(), scores[order].tolist())))
+    return rankings
 
 @log_execution_time
-def rank_jobs_by_similarity(jobs_data, similarity_scores):
+def rank_cvs_batch(jobs_data, vectorizer, job_features, cv_tokens, top_k=5):
+    """
+    Score many preprocessed CVs against the job matrix in one call.
+    Args:
+        jobs_data (pd.DataFrame or JobStore): Job descriptions and metadata aligned with
+            job_features; only the ranked rows are materialized from a JobStore.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        cv_tokens (dict): CV names mapped to normalized tokens.
+        top_k (int): Number of jobs to return per CV.
+    Returns:
+        dict: CV names mapped to their top K jobs (pd.DataFrame with 'Similarity Score').
+    """
+    cv_matrix = vectorizer.transform(list(cv_tokens.values()))
+    rankings = top_k_per_cv(calculate_similarity_batch(job_features, cv_matrix), top_k)
+
+    results = {}
+    for name, ranking in zip(cv_tokens.keys(), rankings):
+        rows = [row for row, _ in ranking]
+        top_jobs = jobs_data.take(rows)
+        top_jobs['Similarity Score'] = [score for _, score in ranking]
+        results[name] = top_jobs
+    return results
+
+@log_execution_time
+def rank_jobs_by_similarity(jobs_data, similarity_scores, top_n=None):
     """
     Rank job descriptions based on similarity to the CV.
+    With top_n set, only the winning rows are selected (via argpartition) and copied,
+    instead of sorting the whole frame; from a memory-mapped JobStore only those rows
+    are decoded. The caller's frame is never modified.
     Args:
-        jobs_data (pd.DataFrame): Job descriptions and metadata.
+        jobs_data (pd.DataFrame or JobStore): Job descriptions and metadata.
         similarity_scores (list): Similarity scores for each job description.
+        top_n (int): Number of jobs to return; None ranks every job.
     Returns:
         pd.DataFrame: Jobs ranked by similarity score.
     """
-    jobs_data['Similarity Score'] = similarity_scores
-    ranked_jobs = jobs_data.sort_values(by='Similarity Score', ascending=False)
+    if top_n is None:
+        if not isinstance(jobs_data, pd.DataFrame):
+            jobs_data = jobs_data.to_frame()
+        ranked_jobs = jobs_data.assign(**{'Similarity Score': similarity_scores})
+        return ranked_jobs.sort_values(by='Similarity Score', ascending=False)
+
+    scores = np.asarray(similarity_scores)
+    top_indices = top_k_indices(scores, top_n)
+    # DataFrame.take and JobStore.take both return a new frame of just these rows
+    ranked_jobs = jobs_data.take(top_indices)
+    ranked_jobs['Similarity Score'] = scores[top_indices]
     return ranked_jobs
 
 @log_execution_time
-def extract_top_keywords(feature_names, job_features, top_n=10):
+def extract_top_keywords(feature_names, job_features, top_n=10, keyword_index=None):
     """
     Extract top keywords from job descriptions based on TF-IDF scores.
     Args:
         feature_names (list): Feature names from TF-IDF.
         job_features (sparse matrix): TF-IDF matrix for job descriptions.
         top_n (int): Number of top keywords to extract.
+        keyword_index (KeywordIndex): Precomputed statistics; avoids re-summing job_features.
     Returns:
         list: Top keywords and their scores.
     """
+    if keyword_index is not None:
+        return keyword_index.top_keywords(top_n)
+
     keyword_sums = np.array(job_features.sum(axis=0)).flatten()
     top_indices = np.argsort(keyword_sums)[-top_n:]
     top_keywords = [(feature_names[i], keyword_sums[i]) for i in reversed(top_indices)]
     return top_keywords
 
 @log_execution_time
-def find_missing_keywords(cv_vector, feature_names, job_features):
+def find_missing_keywords(cv_vector, feature_names, job_features, keyword_index=None, job_rows=None):
     """
     Identify keywords present in job descriptions but missing in the CV.
     Args:
         cv_vector (sparse matrix): TF-IDF vector for the CV.
         feature_names (list): Feature names from TF-IDF.
         job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        keyword_index (KeywordIndex): Precomputed statistics; answers with vectorized masks.
+        job_rows (array-like): Restrict the gap to a subset of jobs (requires keyword_index).
     Returns:
         list: Missing keywords with their importance scores.
     """
-    cv_keywords = cv_vector.toarray().flatten()
-    job_keywords = job_features.sum(axis=0).A1
+    if keyword_index is not None:
+        return keyword_index.missing_keywords(cv_vector, job_rows)
+
+    job_keywords = np.asarray(job_features.sum(axis=0)).ravel()
+    missing = job_keywords > 0
+    missing[cv_terms(cv_vector)] = False
 
-    missing_keywords = [
-        (feature_names[i], job_keywords[i])
-        for i in range(len(feature_names))
-        if cv_keywords[i] == 0 and job_keywords[i] > 0
-    ]
-    return sorted(missing_keywords, key=lambda x: x[1], reverse=True)
+    missing = np.flatnonzero(missing)
+    missing = missing[np.argsort(-job_keywords[missing], kind="stable")]
+    return [(feature_names[i], job_keywords[i]) for i in missing]
+
+def cv_terms(cv_vector):
+    """
+    Feature indices the CV actually contains, read from the sparse vector.
+    Args:
+        cv_vector (sparse matrix): TF-IDF vector for the CV.
+    Returns:
+        np.ndarray: Indices of the non-zero CV weights.
+    """
+    cv_vector = cv_vector.tocsr()
+    return cv_vector.indices[cv_vector.data != 0]
 
 
 @log_execution_time
@@ -76,14 +190,17 @@ def evaluate_similarity(ranked_jobs, threshold=0.5):
     """
     Evaluate the similarity scores to assess accuracy.
     Args:
-        ranked_jobs (pd.DataFrame): Ranked job data.
+        ranked_jobs (pd.DataFrame or array-like): Ranked job data, or the raw similarity
+            scores of every job (needed when only the top jobs were ranked).
         threshold (float): Minimum similarity score for a job to be considered relevant.
     Returns:
         dict: Evaluation metrics (precision, recall, etc.).
     """
-    relevant_jobs = ranked_jobs[ranked_jobs['Similarity Score'] >= threshold]
-    total_relevant = len(relevant_jobs)
-    total_jobs = len(ranked_jobs)
+    if hasattr(ranked_jobs, 'columns'):
+        ranked_jobs = ranked_jobs['Similarity Score']
+    scores = np.asarray(ranked_jobs)
+    total_relevant = int(np.count_nonzero(scores >= threshold))
+    total_jobs = len(scores)
 
     # Example metrics
     precision = total_relevant / total_jobs if total_jobs > 0 else 0
@@ -0,0 +1,307 @@
+# query.py
+"""
+This module answers filtered job searches from secondary indexes.
+Job title tokens and categorical columns (location, company) get postings lists of
+sorted job indices, date columns a sorted value array, and keywords reuse the TF-IDF
+postings of the KeywordIndex. A query intersects the postings of its criteria, smallest
+first, and only the surviving jobs are scored against the CV.
+"""
+import re
+import numpy as np
+import pandas as pd
+from config import CONFIG
+from logs.log_config import log_event, log_execution_time
+from models.model import calculate_similarity, top_k_indices
+
+TITLE_COLUMN = "Job Title"
+TITLE_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Columns whose lower-cased name contains one of these are indexed automatically
+CATEGORY_COLUMN_HINTS = ("location", "city", "company", "employer")
+DATE_COLUMN_HINTS = ("date", "posted")
+
+
+def field_name(column):
+    """
+    Query field for a column, e.g. "Date Posted" -> "date_posted".
+    Args:
+        column (str): Column name.
+    Returns:
+        str: Lower-case field name.
+    """
+    return re.sub(r"\W+", "_", column.strip().lower()).strip("_")
+
+
+def is_missing(value):
+    return value is None or (not isinstance(value, str) and bool(pd.isna(value)))
+
+
+def normalize_value(value):
+    return str(value).strip().lower()
+
+
+class Postings:
+    """
+    Sorted job indices per key, stored as one flat array plus offsets.
+    """
+
+    def __init__(self, keys, key_codes, rows):
+        """
+        Args:
+            keys (list): Distinct keys; a key's position is its code.
+            key_codes (np.ndarray): Code of each (key, job) pair.
+            rows (np.ndarray): Job index of each pair, ascending.
+        """
+        # A stable sort by key keeps each key's jobs in ascending order
+        order = np.argsort(key_codes, kind="stable")
+        self.key_ids = {key: code for code, key in enumerate(keys)}
+        self.rows = rows[order].astype(np.int32 if len(rows) < np.iinfo(np.int32).max else np.int64)
+        self.indptr = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(key_codes, minlength=len(keys)), out=self.indptr[1:])
+
+    def __len__(self):
+        return len(self.key_ids)
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Normalized key.
+        Returns:
+            np.ndarray: Sorted job indices (empty for unknown keys).
+        """
+        code = self.key_ids.get(key)
+        if code is None:
+            return self.rows[:0]
+        return self.rows[self.indptr[code]:self.indptr[code + 1]]
+
+
+def title_postings(titles):
+    """
+    Postings of the tokens of every job title.
+    Args:
+        titles (sequence): Job titles (None for missing).
+    Returns:
+        Postings: Title token -> jobs.
+    """
+    key_ids, key_codes, rows = {}, [], []
+    for row, title in enumerate(titles):
+        if is_missing(title):
+            continue
+        for token in set(TITLE_TOKEN_PATTERN.findall(str(title).lower())):
+            key_codes.append(key_ids.setdefault(token, len(key_ids)))
+            rows.append(row)
+    return Postings(list(key_ids), np.asarray(key_codes, dtype=np.int64), np.asarray(rows, dtype=np.int64))
+
+
+def value_postings(values):
+    """
+    Postings of a categorical column, keyed by the normalized value.
+    Args:
+        values (sequence): Column values (None for missing).
+    Returns:
+        Postings: Value -> jobs.
+    """
+    normalized = pd.Series([None if is_missing(value) else normalize_value(value) for value in values], dtype=object)
+    codes, keys = pd.factorize(normalized)
+    present = codes >= 0
+    return Postings(list(keys), codes[present].astype(np.int64), np.flatnonzero(present))
+
+
+class DateIndex:
+    """
+    Jobs sorted by a date column, so a date range is two binary searches.
+    """
+
+    def __init__(self, values):
+        dates = pd.to_datetime(pd.Series(list(values), dtype=object), errors="coerce", utc=True)
+        stamps = dates.to_numpy(dtype="datetime64[ns]")
+        valid = np.flatnonzero(~np.isnat(stamps))
+        order = np.argsort(stamps[valid], kind="stable")
+        self.rows = valid[order]
+        self.dates = stamps[valid][order]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def between(self, start=None, end=None):
+        """
+        Args:
+            start (str or datetime): Earliest date, inclusive; None leaves it open.
+            end (str or datetime): Latest date, inclusive; None leaves it open.
+        Returns:
+            np.ndarray: Sorted job indices.
+        """
+        low = 0 if start is None else np.searchsorted(self.dates, _as_datetime64(start), side="left")
+        high = len(self.dates) if end is None else np.searchsorted(self.dates, _as_datetime64(end), side="right")
+        return np.sort(self.rows[low:high])
+
+
+def _as_datetime64(value):
+    return pd.Timestamp(value, tz="UTC").to_datetime64()
+
+
+def indexed_columns(columns):
+    """
+    Columns to index besides the job title: CONFIG["QUERY_INDEX_COLUMNS"] when set,
+    otherwise every column whose name looks like a location, company or date.
+    Args:
+        columns (iterable): Available column names.
+    Returns:
+        tuple: Categorical column names and date column names.
+    """
+    configured = CONFIG.get("QUERY_INDEX_COLUMNS")
+    candidates = [column for column in columns if column != TITLE_COLUMN]
+    if configured is not None:
+        candidates = [column for column in candidates if column in configured]
+    dates = [column for column in candidates if any(hint in column.lower() for hint in DATE_COLUMN_HINTS)]
+    categories = [
+        column for column in candidates
+        if column not in dates
+        and (configured is not None or any(hint in column.lower() for hint in CATEGORY_COLUMN_HINTS))
+    ]
+    return categories, dates
+
+
+class JobQueryIndex:
+    """
+    Secondary indexes over the job store for filtered searches.
+    """
+
+    def __init__(self, n_jobs, keyword_index, titles=None, columns=None):
+        """
+        Args:
+            n_jobs (int): Number of jobs (rows of the TF-IDF matrix).
+            keyword_index (KeywordIndex): Keyword postings from the TF-IDF matrix.
+            titles (sequence): Job titles aligned with the matrix rows.
+            columns (dict): Column name mapped to its values, for the other indexed columns.
+        """
+        self.n_jobs = n_jobs
+        self.keyword_index = keyword_index
+        self.titles = titles
+        self.title_index = title_postings(titles) if titles is not None else None
+        self.columns = dict(columns or {})
+        categories, dates = indexed_columns(self.columns)
+        self.value_indexes = {field_name(column): value_postings(self.columns[column]) for column in categories}
+        self.date_indexes = {field_name(column): DateIndex(self.columns[column]) for column in dates}
+        self.fields = {field_name(column): column for column in categories + dates}
+
+    def describe(self):
+        """
+        Returns:
+            dict: Indexed fields and their number of distinct keys or dated jobs.
+        """
+        return {
+            "jobs": self.n_jobs,
+            "title_tokens": len(self.title_index) if self.title_index is not None else 0,
+            "keywords": len(self.keyword_index.term_ids),
+            **{field: len(index) for field, index in self.value_indexes.items()},
+            **{field: len(index) for field, index in self.date_indexes.items()},
+        }
+
+    def postings(self, title=None, keywords=(), filters=None, date_ranges=None):
+        """
+        Postings list of every criterion, without combining them.
+        Args:
+            title (str): Every token of it must appear in the job title.
+            keywords (iterable): TF-IDF features that must appear in the description.
+            filters (dict): Field mapped to a value or a list of values (any of them matches).
+            date_ranges (dict): Date field mapped to a (start, end) pair, either end optional.
+        Returns:
+            list: Sorted job index arrays.
+        Raises:
+            KeyError: For a field that is not indexed.
+        """
+        lists = []
+        if title:
+            if self.title_index is None:
+                raise KeyError("title")
+            lists.extend(self.title_index.get(token) for token in TITLE_TOKEN_PATTERN.findall(title.lower()))
+        lists.extend(self.keyword_index.postings_for(keyword.strip().lower()) for keyword in keywords)
+        for field, values in (filters or {}).items():
+            index = self.value_indexes[field]
+            values = [values] if isinstance(values, str) or not np.iterable(values) else values
+            matches = [index.get(normalize_value(value)) for value in values]
+            lists.append(matches[0] if len(matches) == 1 else np.unique(np.concatenate(matches)))
+        for field, (start, end) in (date_ranges or {}).items():
+            lists.append(self.date_indexes[field].between(start, end))
+        return lists
+
+    def matches(self, **criteria):
+        """
+        Jobs meeting every criterion (see postings for the arguments).
+        Returns:
+            np.ndarray: Sorted job indices; every job when no criterion is given.
+        """
+        lists = self.postings(**criteria)
+        if not lists:
+            return np.arange(self.n_jobs)
+        lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    @log_execution_time
+    def search(self, job_features=None, cv_vector=None, top_k=20, **criteria):
+        """
+        Filtered search, ranked by similarity to the CV when one is given.
+        Only the jobs that pass the filters are scored.
+        Args:
+            job_features (sparse matrix): TF-IDF matrix; needed with cv_vector.
+            cv_vector (sparse matrix): TF-IDF vector for the CV; None keeps index order.
+            top_k (int): Number of jobs to return.
+            **criteria: title, keywords, filters and date_ranges, as for postings.
+        Returns:
+            tuple: Job indices, similarity scores (None without a CV) and the number of
+                jobs that matched the filters.
+        """
+        rows = self.matches(**criteria)
+        if cv_vector is None or not len(rows):
+            return rows[:top_k], None, len(rows)
+        scores = calculate_similarity(job_features[rows], cv_vector)
+        best = top_k_indices(scores, top_k)
+        return rows[best], scores[best], len(rows)
+
+    def record(self, row):
+        """
+        Title and indexed column values of one job, for display.
+        Args:
+            row (int): Job index.
+        Returns:
+            dict: Field name mapped to the value.
+        """
+        record = {"index": int(row)}
+        if self.titles is not None:
+            record["title"] = self.titles[row]
+        for field, column in self.fields.items():
+            value = self.columns[column][row]
+            record[field] = None if is_missing(value) else str(value)
+        return record
+
+
+@log_execution_time
+def build_query_index(keyword_index, n_jobs, titles=None, jobs=None):
+    """
+    Build the search indexes for a featurization.
+    Args:
+        keyword_index (KeywordIndex): Keyword statistics of the same matrix.
+        n_jobs (int): Number of jobs.
+        titles (sequence): Job titles aligned with the matrix rows.
+        jobs (JobStore or pd.DataFrame): Job columns; location, company and date columns
+            found here are indexed too.
+    Returns:
+        JobQueryIndex: The indexes.
+    """
+    columns = {}
+    if jobs is not None:
+        names = list(jobs.columns)
+        categories, dates = indexed_columns(names)
+        for name in categories + dates:
+            columns[name] = jobs.column(name) if hasattr(jobs, "column") else jobs[name].tolist()
+        if titles is None and TITLE_COLUMN in names:
+            titles = jobs.column(TITLE_COLUMN) if hasattr(jobs, "column") else jobs[TITLE_COLUMN].tolist()
+    index = JobQueryIndex(n_jobs, keyword_index, titles, columns)
+    log_event(f"Query index built: {index.describe()}")
+    return index
@@ -0,0 +1,194 @@
+# result_cache.py
+"""
+This module memoizes scoring results for repeated CV submissions.
+A result is keyed by a hash of the normalized CV text (the words the vectorizer analyzes,
+so punctuation, whitespace and stop-word edits still hit; case edits hit only when they
+leave every lemma unchanged, because tokens are lemmatized before they are lower-cased)
+and the scoring parameters, together with the artifact version it was computed against.
+Lookups go to an in-memory LRU first and to an on-disk SQLite store second, so results
+survive restarts and are shared between the dashboard and the task workers. The dashboard
+and the workers may serve different versions at once, so results of older versions are
+never deleted eagerly; they age out of both levels as the least recently used.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import CONFIG
+from data.text_engine import TOKEN_PATTERN
+from logs.log_config import log_event
+from logs.metrics import registry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    version TEXT NOT NULL,
+    key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (version, key)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used_at);
+"""
+
+# Share of the disk budget the store may outgrow before the oldest rows are evicted
+EVICTION_MARGIN = 0.1
+
+
+def result_key(cv_tokens, **params):
+    """
+    Hash identifying one scoring request, independent of the artifact version.
+    Args:
+        cv_tokens (list): Normalized CV tokens, as returned by preprocess_cv.
+        **params: Scoring parameters that change the result (top_k, top_keywords, ...).
+    Returns:
+        str: Hex key.
+    """
+    # The same words analyze_tokens extracts; n-grams and TF-IDF weights follow from them
+    text = " ".join(word for token in cv_tokens for word in TOKEN_PATTERN.findall(token.lower()))
+    payload = json.dumps({"text": text, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Two-level (memory LRU, then SQLite) cache of JSON-serializable results.
+    Both levels hold encoded JSON, so every hit decodes a fresh copy that callers may
+    modify. Hits of each level, misses and disk evictions are counted in
+    logs.metrics.registry, and so appear on /metrics as jats_result_cache_*_total.
+    """
+
+    def __init__(self, max_entries=None, path=None, max_disk_entries=None):
+        self.max_entries = max_entries or CONFIG["RESULT_CACHE_SIZE"]
+        self.path = path if path is not None else CONFIG.get("RESULT_CACHE_PATH")
+        self.max_disk_entries = max_disk_entries or CONFIG["RESULT_CACHE_DISK_SIZE"]
+        self.eviction_margin = max(1, int(self.max_disk_entries * EVICTION_MARGIN))
+        self._entries = OrderedDict()  # (version, key) -> encoded result
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._disk_rows = 0  # rows on disk as of the last count, plus this process's stores since
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self._connect() as connection:
+                connection.executescript(SCHEMA)
+                self._disk_rows = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, version, key):
+        """
+        Args:
+            version (str): Artifact version the result must have been computed against.
+            key (str): Key from result_key().
+        Returns:
+            dict: A copy of the cached result, or None on a miss.
+        """
+        with self._lock:
+            encoded = self._entries.get((version, key))
+            if encoded is not None:
+                self._entries.move_to_end((version, key))
+        if encoded is not None:
+            registry.increment("result_cache_memory_hits")
+            return json.loads(encoded)
+
+        row = None
+        if self.path:
+            with self._connect() as connection:
+                row = connection.execute(
+                    "SELECT result FROM results WHERE version = ? AND key = ?", (version, key)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE results SET used_at = ? WHERE version = ? AND key = ?", (time.time(), version, key)
+                    )
+        if row is None:
+            registry.increment("result_cache_misses")
+            return None
+        self._remember(version, key, row[0])
+        registry.increment("result_cache_disk_hits")
+        return json.loads(row[0])
+
+    def put(self, version, key, result):
+        """
+        Store a result in both levels.
+        The disk level is trimmed back to its budget only once it has outgrown it by
+        EVICTION_MARGIN, so most stores are a single insert.
+        Args:
+            version (str): Artifact version the result was computed against.
+            key (str): Key from result_key().
+            result (dict): JSON-serializable result.
+        """
+        encoded = json.dumps(result)
+        self._remember(version, key, encoded)
+        if not self.path:
+            return
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO results (version, key, result, used_at) VALUES (?, ?, ?, ?)",
+                (version, key, encoded, time.time()),
+            )
+            with self._lock:
+                self._disk_rows += 1
+                due = self._disk_rows > self.max_disk_entries + self.eviction_margin
+            if due:
+                self._evict(connection)
+
+    def _evict(self, connection):
+        # Other processes store into the same file, so count before trimming
+        rows = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        evicted = 0
+        if rows > self.max_disk_entries:
+            # Least recently used rows go first, whatever their version (read off the used_at index)
+            evicted = connection.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY used_at LIMIT ?)",
+                (rows - self.max_disk_entries,),
+            ).rowcount
+            registry.increment("result_cache_evictions", evicted)
+        with self._lock:
+            self._disk_rows = rows - evicted
+
+    def _remember(self, version, key, encoded):
+        with self._lock:
+            self._entries[(version, key)] = encoded
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every cached result from both levels.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._disk_rows = 0
+        if self.path:
+            with self._connect() as connection:
+                connection.execute("DELETE FROM results")
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """
+    The process-wide cache, created on first use so that importing this module never
+    touches the disk when CONFIG["RESULT_CACHE"] is off.
+    Returns:
+        ResultCache: Shared cache.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache()
+            log_event(f"Result cache opened at {_shared_cache.path or 'memory only'}")
+        return _shared_cache
@@ -0,0 +1,223 @@
+# serving.py
+"""
+This module keeps a fitted model warm in memory for long-lived scoring processes.
+Readers grab the current snapshot with a single attribute read and never lock; a new
+artifact is loaded off to the side and swapped in with one assignment.
+"""
+import threading
+from collections import namedtuple
+import numpy as np
+from config import CONFIG
+from data.artifact_store import current_artifact, load_artifacts
+from data.data_loader import preprocess_cv, TFIDF_PARAMS
+from data.ingest import prepare_job_features
+from logs.log_config import log_event
+from models.ann_index import AnnIndex, get_ann_index, retrieve_top_jobs
+from models.keyword_index import build_keyword_index
+from models.query import build_query_index
+from models.result_cache import get_result_cache, result_key
+from models.sharded_index import get_sharded_index, shutdown_executors
+
+ModelSnapshot = namedtuple(
+    "ModelSnapshot",
+    [
+        "version", "vectorizer", "job_features", "job_titles", "feature_names",
+        "keyword_index", "retrieval_index", "query_index",
+    ],
+)
+
+
+def build_snapshot(version, vectorizer, job_features, job_titles, jobs=None):
+    """
+    Assemble an immutable snapshot with every structure a request needs.
+    Args:
+        version (str): Artifact key the snapshot was built from.
+        vectorizer (TfidfVectorizer): Fitted vectorizer.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        job_titles (sequence): Job titles aligned with the matrix rows (a memory-mapped
+            StringHeap when loaded from the artifact store).
+        jobs (JobStore): Stored job columns; their location, company and date columns
+            become searchable.
+    Returns:
+        ModelSnapshot: Ready-to-serve snapshot.
+    """
+    feature_names = vectorizer.get_feature_names_out()
+    retrieval = CONFIG.get("RETRIEVAL_INDEX")
+    if retrieval == "ann":
+        retrieval_index = get_ann_index(job_features)
+    elif retrieval == "sharded":
+        retrieval_index = get_sharded_index(job_features)
+    else:
+        retrieval_index = None
+    keyword_index = build_keyword_index(feature_names, job_features)
+    query_index = build_query_index(keyword_index, job_features.shape[0], job_titles, jobs)
+    return ModelSnapshot(
+        version, vectorizer, job_features, job_titles,
+        feature_names, keyword_index, retrieval_index, query_index
+    )
+
+
+def score_cv(snapshot, cv_content, top_k=None, top_keywords=None, cache=None):
+    """
+    Rank jobs and find missing keywords for one CV against a snapshot.
+    Results are memoized per normalized CV and artifact version (see models.result_cache),
+    so resubmitting a CV, or one that only differs in punctuation or stop words, skips
+    vectorizing and scoring. Case edits only hit when they leave every lemma unchanged.
+    Args:
+        snapshot (ModelSnapshot): Snapshot to score against.
+        cv_content (str): Raw CV text.
+        top_k (int): Number of jobs to return; defaults to CONFIG["TOP_N_JOBS"].
+        top_keywords (int): Number of missing keywords; defaults to CONFIG["TOP_N_KEYWORDS"].
+        cache (ResultCache): Defaults to the shared get_result_cache() when
+            CONFIG["RESULT_CACHE"] is on.
+    Returns:
+        dict: JSON-serializable ranking and keyword gaps.
+    """
+    top_k = top_k or CONFIG["TOP_N_JOBS"]
+    top_keywords = top_keywords or CONFIG["TOP_N_KEYWORDS"]
+    if cache is None and CONFIG.get("RESULT_CACHE"):
+        cache = get_result_cache()
+
+    cv_tokens = preprocess_cv(cv_content)
+    key = None
+    if cache is not None:
+        # Sharded scoring is exact, so it shares cached results with brute force
+        retrieval = "ann" if isinstance(snapshot.retrieval_index, AnnIndex) else "exact"
+        key = result_key(cv_tokens, top_k=top_k, top_keywords=top_keywords, retrieval=retrieval)
+        result = cache.get(snapshot.version, key)
+        if result is not None:
+            return result
+
+    cv_vector = snapshot.vectorizer.transform([cv_tokens])
+    indices, scores = retrieve_top_jobs(snapshot.job_features, cv_vector, top_k, index=snapshot.retrieval_index)
+    missing = snapshot.keyword_index.missing_keywords(cv_vector)[:top_keywords]
+    cv_scores = dict(zip(cv_vector.indices.tolist(), cv_vector.data.tolist()))
+    top_terms = snapshot.keyword_index.top_keywords(top_keywords)
+    result = {
+        "version": snapshot.version,
+        "jobs": [
+            {"index": int(i), "title": snapshot.job_titles[i], "score": float(score)}
+            for i, score in zip(np.asarray(indices).tolist(), np.asarray(scores).tolist())
+        ],
+        "missing_keywords": [
+            {"keyword": str(keyword), "score": float(score)} for keyword, score in missing
+        ],
+        "keyword_comparison": [
+            {
+                "keyword": str(keyword),
+                "job_score": float(score),
+                "cv_score": cv_scores.get(snapshot.keyword_index.term_ids[keyword], 0.0),
+            }
+            for keyword, score in top_terms
+        ],
+    }
+    if cache is not None:
+        cache.put(snapshot.version, key, result)
+    return result
+
+
+def search_jobs(snapshot, cv_content=None, top_k=None, **criteria):
+    """
+    Filtered job search against a snapshot, ranked by similarity when a CV is given.
+    Args:
+        snapshot (ModelSnapshot): Snapshot to search.
+        cv_content (str): Raw CV text; None returns matches in job order.
+        top_k (int): Number of jobs to return; defaults to CONFIG["TOP_N_JOBS"].
+        **criteria: title, keywords, filters and date_ranges (see JobQueryIndex.postings).
+    Returns:
+        dict: JSON-serializable matches.
+    """
+    top_k = top_k or CONFIG["TOP_N_JOBS"]
+    cv_vector = snapshot.vectorizer.transform([preprocess_cv(cv_content)]) if cv_content else None
+    rows, scores, matched = snapshot.query_index.search(snapshot.job_features, cv_vector, top_k, **criteria)
+
+    jobs = [snapshot.query_index.record(row) for row in np.asarray(rows).tolist()]
+    if scores is not None:
+        for job, score in zip(jobs, np.asarray(scores).tolist()):
+            job["score"] = float(score)
+    return {"version": snapshot.version, "matched": int(matched), "jobs": jobs}
+
+
+class ModelHolder:
+    """
+    Process-wide holder for the current ModelSnapshot.
+    """
+
+    def __init__(self, artifact_dir=None):
+        self.artifact_dir = artifact_dir
+        self._snapshot = None
+        self._swap_lock = threading.Lock()  # serializes writers only
+        self._stop = threading.Event()
+
+    @property
+    def current(self):
+        """
+        The snapshot to serve from; read it once per request and reuse it.
+        Returns:
+            ModelSnapshot: Current snapshot, or None before the first load.
+        """
+        return self._snapshot
+
+    def publish(self, snapshot):
+        """
+        Swap in a new snapshot; in-flight requests keep the one they already hold.
+        Args:
+            snapshot (ModelSnapshot): Snapshot to serve from now on.
+        """
+        self._snapshot = snapshot
+        log_event(f"Serving model version {snapshot.version}")
+
+    def refresh(self):
+        """
+        Load the published artifact if it differs from the one being served.
+        Returns:
+            bool: True if a new snapshot was swapped in.
+        """
+        with self._swap_lock:
+            key = current_artifact(self.artifact_dir)
+            if key is None or (self._snapshot is not None and self._snapshot.version == key):
+                return False
+            artifacts = load_artifacts(key, TFIDF_PARAMS, self.artifact_dir)
+            if artifacts is None or artifacts["job_titles"] is None:
+                log_event(f"Published artifact {key} cannot be served", level="warning")
+                return False
+            self.publish(build_snapshot(
+                key, artifacts["vectorizer"], artifacts["job_features"], artifacts["job_titles"],
+                artifacts["jobs"]
+            ))
+            return True
+
+    def start(self, interval=None):
+        """
+        Load the published artifact in a daemon thread and keep watching for newer ones.
+        Args:
+            interval (float): Seconds between checks; defaults to CONFIG["MODEL_RELOAD_INTERVAL"].
+        """
+        interval = interval or CONFIG["MODEL_RELOAD_INTERVAL"]
+
+        def watch():
+            # Nothing published yet: build the artifacts from the configured CSV first
+            if current_artifact(self.artifact_dir) is None:
+                try:
+                    prepare_job_features(CONFIG["CSV_PATH"])
+                except Exception as e:
+                    log_event(f"Initial featurization failed: {e}", level="error")
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    log_event(f"Model refresh failed: {e}", level="error")
+                if self._stop.wait(interval):
+                    return
+
+        threading.Thread(target=watch, name="model-holder", daemon=True).start()
+
+    def stop(self):
+        """
+        Stop watching for new artifacts and stop the sharded scoring processes.
+        """
+        self._stop.set()
+        shutdown_executors()
+
+
+model_holder = ModelHolder()
@@ -0,0 +1,209 @@
+# sharded_index.py
+"""
+This module scores a CV against very large job matrices across several processes.
+The TF-IDF matrix is split into row shards, each persisted as its own memory-mapped CSR
+arrays together with precomputed row norms. Worker processes open the shards by path,
+so no matrix is ever pickled between processes; each worker returns the top K of its
+shard, and the per-shard rankings are merged into the global top K.
+"""
+import atexit
+import heapq
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+import numpy as np
+from scipy import sparse
+from sklearn.utils.extmath import row_norms
+from config import CONFIG
+from data.job_store import load_csr, matrix_fingerprint, save_csr
+from logs.log_config import log_event, log_execution_time
+from models.model import top_k_indices
+
+SHARD_MANIFEST_FILE = "shards.json"
+NORMS_FILE = "norms.npy"
+
+
+def shard_bounds(n_rows, rows_per_shard):
+    """
+    Args:
+        n_rows (int): Rows of the matrix.
+        rows_per_shard (int): Maximum rows per shard.
+    Returns:
+        list: (start, stop) row range of every shard.
+    """
+    return [(start, min(start + rows_per_shard, n_rows)) for start in range(0, n_rows, rows_per_shard)]
+
+
+@log_execution_time
+def save_shards(directory, job_features, rows_per_shard):
+    """
+    Persist a job matrix as row shards, each in its own subdirectory.
+    Shards are written to a temporary directory first and moved into place.
+    Args:
+        directory (str): Target directory.
+        job_features (sparse matrix): TF-IDF matrix in CSR format.
+        rows_per_shard (int): Maximum rows per shard.
+    Returns:
+        dict: The shard manifest.
+    """
+    os.makedirs(os.path.dirname(directory) or ".", exist_ok=True)
+    staging = tempfile.mkdtemp(dir=os.path.dirname(directory) or ".")
+    shards = []
+    for number, (start, stop) in enumerate(shard_bounds(job_features.shape[0], rows_per_shard)):
+        name = f"shard_{number:04d}"
+        os.makedirs(os.path.join(staging, name))
+        shard = job_features[start:stop]
+        shape = save_csr(os.path.join(staging, name), shard)
+        np.save(os.path.join(staging, name, NORMS_FILE), row_norms(shard).astype(shard.dtype, copy=False))
+        shards.append({"name": name, "start": start, "shape": shape})
+    manifest = {"n_rows": job_features.shape[0], "rows_per_shard": rows_per_shard, "shards": shards}
+    with open(os.path.join(staging, SHARD_MANIFEST_FILE), "w") as file:
+        json.dump(manifest, file)
+
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+    os.replace(staging, directory)
+    log_event(f"Saved {len(shards)} shards of up to {rows_per_shard} rows to {directory}")
+    return manifest
+
+
+@lru_cache(maxsize=256)
+def _open_shard(path, shape):
+    # Opened once per process; the mapped pages are shared by every process reading them
+    return load_csr(path, list(shape)), np.load(os.path.join(path, NORMS_FILE), mmap_mode="r")
+
+
+def score_shard(path, shape, start, cv_vector, top_k):
+    """
+    Top K jobs of one shard; runs in a worker process.
+    Args:
+        path (str): Shard directory.
+        shape (tuple): Shard shape from the manifest.
+        start (int): Global index of the shard's first row.
+        cv_vector (sparse matrix): TF-IDF vector for the CV.
+        top_k (int): Number of jobs to return.
+    Returns:
+        list: (score, global job index) pairs, best first.
+    """
+    matrix, norms = _open_shard(path, tuple(shape))
+    cv_vector = cv_vector.astype(matrix.dtype, copy=False)
+    dots = (matrix @ cv_vector.T).toarray().ravel()
+    denominators = norms * row_norms(cv_vector)[0]
+    scores = np.divide(dots, denominators, out=np.zeros_like(dots), where=denominators > 0)
+    best = top_k_indices(scores, top_k)
+    return list(zip(scores[best].tolist(), (best + start).tolist()))
+
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _executor(workers):
+    # One long-lived pool per size: worker start-up and shard mapping are paid once
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            # Forking the threaded web server would copy locks held by its other threads
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            executor = _executors[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context(method)
+            )
+        return executor
+
+
+def shutdown_executors():
+    """
+    Stop the scoring processes; the next parallel query starts a new pool.
+    """
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_executors)
+
+
+class ShardedIndex:
+    """
+    Exact cosine retrieval over persisted row shards, scored in a process pool.
+    Offers the same query() as AnnIndex, so retrieve_top_jobs can use either.
+    """
+
+    def __init__(self, directory, manifest, workers=None):
+        self.directory = directory
+        self.manifest = manifest
+        workers = CONFIG.get("SHARD_WORKERS") if workers is None else workers
+        self.workers = min(workers or os.cpu_count() or 1, len(manifest["shards"]) or 1)
+
+    @classmethod
+    def load(cls, directory, workers=None):
+        """
+        Open shards saved with save_shards.
+        Args:
+            directory (str): Shard directory.
+            workers (int): Scoring processes; defaults to CONFIG["SHARD_WORKERS"] (0 means
+                one per CPU), never more than the number of shards.
+        Returns:
+            ShardedIndex: The index.
+        """
+        with open(os.path.join(directory, SHARD_MANIFEST_FILE)) as file:
+            return cls(directory, json.load(file), workers)
+
+    def __len__(self):
+        return self.manifest["n_rows"]
+
+    @log_execution_time
+    def query(self, cv_vector, top_k=5, job_features=None, n_probes=None):
+        """
+        Score every shard and merge the per-shard rankings.
+        Args:
+            cv_vector (sparse matrix): TF-IDF vector for the CV.
+            top_k (int): Number of jobs to return.
+            job_features: Unused; the shards hold the matrix.
+            n_probes: Unused; sharded scoring is exact.
+        Returns:
+            tuple: Job indices and similarity scores, best first.
+        """
+        cv_vector = sparse.csr_matrix(cv_vector)
+        tasks = [
+            (os.path.join(self.directory, shard["name"]), tuple(shard["shape"]), shard["start"], cv_vector, top_k)
+            for shard in self.manifest["shards"]
+        ]
+        if self.workers <= 1:
+            rankings = [score_shard(*task) for task in tasks]
+        else:
+            rankings = list(_executor(self.workers).map(score_shard, *zip(*tasks)))
+
+        # Each ranking is sorted best first, so a k-way merge stops after top_k pairs
+        best = list(islice(heapq.merge(*rankings, key=lambda pair: -pair[0]), top_k))
+        indices = np.array([index for _, index in best], dtype=np.intp)
+        scores = np.array([score for score, _ in best], dtype=np.float64)
+        return indices, scores
+
+
+def get_sharded_index(job_features, index_dir=None, rows_per_shard=None, workers=None):
+    """
+    Open the shards persisted for this job matrix, or write them first.
+    Args:
+        job_features (sparse matrix): TF-IDF matrix in CSR format.
+        index_dir (str): Directory holding saved shards; defaults to CONFIG["ARTIFACT_DIR"].
+        rows_per_shard (int): Defaults to CONFIG["SHARD_ROWS"].
+        workers (int): Scoring processes; defaults to CONFIG["SHARD_WORKERS"].
+    Returns:
+        ShardedIndex: Index matching job_features.
+    """
+    rows_per_shard = rows_per_shard or CONFIG["SHARD_ROWS"]
+    directory = os.path.join(
+        index_dir or CONFIG["ARTIFACT_DIR"], f"shards_{matrix_fingerprint(job_features)[:16]}_{rows_per_shard}"
+    )
+    if not os.path.isfile(os.path.join(directory, SHARD_MANIFEST_FILE)):
+        save_shards(directory, job_features, rows_per_shard)
+    return ShardedIndex.load(directory, workers)
@@ -0,0 +1,360 @@
+# task_queue.py
+"""
+This module runs pipeline jobs submitted from the dashboard in background processes.
+Tasks and their progress live in a SQLite database, so request threads only insert a
+row and read it back, any number of clients can submit work at once, and results
+survive a restart. Worker processes claim queued tasks one at a time; every
+log_execution_time stage a task runs is recorded as a progress event.
+
+Workers are started by the dashboard (TaskWorkers) or by hand, from the repository root:
+    python -m models.task_queue --db data/tasks.sqlite3
+"""
+import argparse
+import atexit
+import json
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+import uuid
+from config import BASE_DIR, CONFIG
+from logs.log_config import log_event, observe_stages
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker TEXT,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_queue ON tasks (status, created_at);
+CREATE TABLE IF NOT EXISTS task_events (
+    task_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    time REAL NOT NULL,
+    event TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    elapsed_ns INTEGER,
+    PRIMARY KEY (task_id, seq)
+);
+"""
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class TaskStore:
+    """
+    SQLite-backed task table shared by the dashboard and the worker processes.
+    Each thread gets its own connection; WAL mode lets readers poll while a worker writes.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or CONFIG["TASK_DB_PATH"]
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def submit(self, kind, payload):
+        """
+        Queue a task.
+        Args:
+            kind (str): Handler name (a key of TASK_HANDLERS).
+            payload (dict): JSON-serializable handler arguments.
+        Returns:
+            str: Task id.
+        """
+        task_id = uuid.uuid4().hex
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO tasks (id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (task_id, kind, json.dumps(payload), QUEUED, time.time()),
+            )
+        return task_id
+
+    def claim(self, worker):
+        """
+        Atomically take the oldest queued task.
+        Args:
+            worker (str): Identifier of the claiming worker ("host:pid").
+        Returns:
+            sqlite3.Row: The claimed task, or None when the queue is empty.
+        """
+        connection = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim one task
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            task = connection.execute(
+                "SELECT * FROM tasks WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if task is not None:
+                connection.execute(
+                    "UPDATE tasks SET status = ?, started_at = ?, worker = ? WHERE id = ?",
+                    (RUNNING, time.time(), worker, task["id"]),
+                )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return task
+
+    def add_event(self, task_id, event, stage, depth, elapsed_ns=None):
+        """
+        Record a stage boundary of a running task.
+        Args:
+            task_id (str): Task id.
+            event (str): "start", "end" or "failed".
+            stage (str): Stage (function) name.
+            depth (int): Nesting depth of the stage; 0 is outermost.
+            elapsed_ns (int): Stage duration, on "end" and "failed".
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO task_events (task_id, seq, time, event, stage, depth, elapsed_ns) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ?, ? FROM task_events WHERE task_id = ?",
+                (task_id, time.time(), event, stage, depth, elapsed_ns, task_id),
+            )
+
+    def finish(self, task_id, result=None, error=None):
+        """
+        Store the outcome of a task.
+        Args:
+            task_id (str): Task id.
+            result (dict): JSON-serializable result, on success.
+            error (str): Error description, on failure.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                (FAILED if error else DONE, time.time(), None if error else json.dumps(result), error, task_id),
+            )
+
+    def get(self, task_id):
+        """
+        Args:
+            task_id (str): Task id.
+        Returns:
+            dict: Status, timestamps, queue position and result, or None for unknown ids.
+        """
+        connection = self._connect()
+        task = connection.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        if task is None:
+            return None
+        info = {
+            "id": task["id"],
+            "kind": task["kind"],
+            "status": task["status"],
+            "created_at": task["created_at"],
+            "started_at": task["started_at"],
+            "finished_at": task["finished_at"],
+        }
+        if task["status"] == QUEUED:
+            info["queue_position"] = connection.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status = ? AND created_at < ?", (QUEUED, task["created_at"])
+            ).fetchone()[0]
+        if task["result"] is not None:
+            info["result"] = json.loads(task["result"])
+        if task["error"] is not None:
+            info["error"] = task["error"]
+        return info
+
+    def events(self, task_id, after=0):
+        """
+        Progress events of a task.
+        Args:
+            task_id (str): Task id.
+            after (int): Only events with a larger sequence number.
+        Returns:
+            list: Event dicts in order.
+        """
+        rows = self._connect().execute(
+            "SELECT seq, time, event, stage, depth, elapsed_ns FROM task_events "
+            "WHERE task_id = ? AND seq > ? ORDER BY seq",
+            (task_id, after),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def requeue_orphans(self):
+        """
+        Put back tasks left running by worker processes of this host that no longer exist.
+        Returns:
+            int: Number of requeued tasks.
+        """
+        host = socket.gethostname()
+        orphaned = []
+        with self._connect() as connection:
+            for task in connection.execute("SELECT id, worker FROM tasks WHERE status = ?", (RUNNING,)):
+                worker_host, _, pid = (task["worker"] or "").rpartition(":")
+                if worker_host == host and pid.isdigit() and not _process_alive(int(pid)):
+                    orphaned.append(task["id"])
+            connection.executemany(
+                "UPDATE tasks SET status = ?, started_at = NULL, worker = NULL WHERE id = ?",
+                [(QUEUED, task_id) for task_id in orphaned],
+            )
+        if orphaned:
+            log_event(f"Requeued {len(orphaned)} tasks of workers that exited", level="warning")
+        return len(orphaned)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_analysis(payload):
+    """
+    Featurize the job listings and score one CV, like `main.py score`.
+    Args:
+        payload (dict): {"cv": CV text, "top_k": number of jobs (optional)}.
+    Returns:
+        dict: Ranking and keyword gaps, as returned by serving.score_cv.
+    """
+    from main import run_featurize
+    from models.serving import build_snapshot, score_cv
+
+    # The key of the artifact just built or loaded; another publish may already have moved the pointer
+    jobs_data, vectorizer, job_features, version = run_featurize(return_key=True)
+    snapshot = build_snapshot(version, vectorizer, job_features, jobs_data['Job Title'].tolist())
+    return score_cv(snapshot, payload["cv"], top_k=payload.get("top_k"))
+
+
+TASK_HANDLERS = {"analyze": run_analysis}
+
+
+def run_task(store, task):
+    """
+    Run one claimed task, recording its stages and storing its outcome.
+    Args:
+        store (TaskStore): Task table.
+        task (sqlite3.Row): Task returned by TaskStore.claim.
+    """
+    task_id = task["id"]
+
+    def record(event, stage, depth, elapsed_ns):
+        store.add_event(task_id, event, stage, depth, elapsed_ns)
+
+    try:
+        handler = TASK_HANDLERS[task["kind"]]
+        with observe_stages(record):
+            result = handler(json.loads(task["payload"]))
+        store.finish(task_id, result=result)
+        log_event(f"Task {task_id} ({task['kind']}) finished")
+    except Exception as e:
+        store.finish(task_id, error=f"{type(e).__name__}: {e}")
+        log_event(f"Task {task_id} ({task['kind']}) failed: {traceback.format_exc()}", level="error")
+
+
+def worker_loop(db_path, stop, poll_interval):
+    """
+    Body of a worker process: claim and run tasks until stopped.
+    Args:
+        db_path (str): Task database path.
+        stop (threading.Event): Set to make the worker exit after its current task.
+        poll_interval (float): Seconds to wait when the queue is empty.
+    """
+    store = TaskStore(db_path)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while not stop.is_set():
+        try:
+            task = store.claim(worker)
+        except sqlite3.OperationalError as e:
+            log_event(f"Task worker {worker} could not poll the queue: {e}", level="warning")
+            task = None
+        if task is None:
+            stop.wait(poll_interval)
+            continue
+        run_task(store, task)
+
+
+class TaskWorkers:
+    """
+    Pool of worker processes serving a TaskStore.
+    Workers are separate interpreters (`python -m models.task_queue`), so CPU-bound
+    pipeline runs never compete with the web server for its interpreter, and a worker
+    never inherits the server's threads, locks or module-level start-up code.
+    """
+
+    def __init__(self, store, workers=None, poll_interval=None):
+        self.store = store
+        self.workers = workers or CONFIG["TASK_WORKERS"]
+        self.poll_interval = poll_interval or CONFIG["TASK_POLL_INTERVAL"]
+        self._processes = []
+
+    def start(self):
+        """
+        Requeue orphaned tasks and start the worker processes.
+        """
+        if self._processes:
+            return
+        self.store.requeue_orphans()
+        command = [
+            sys.executable, "-m", "models.task_queue",
+            "--db", self.store.path, "--poll-interval", str(self.poll_interval),
+        ]
+        self._processes = [subprocess.Popen(command, cwd=BASE_DIR) for _ in range(self.workers)]
+        atexit.register(self.stop)
+        log_event(f"Started {self.workers} task workers on {self.store.path}")
+
+    def stop(self, timeout=5):
+        """
+        Ask the workers to exit after their current task and wait for them; a task still
+        running after the timeout is killed and requeued by the next start().
+        Args:
+            timeout (float): Seconds to wait for each worker.
+        """
+        for process in self._processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._processes = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued JATS pipeline tasks")
+    parser.add_argument("--db", default=None, help="task database; defaults to CONFIG['TASK_DB_PATH']")
+    parser.add_argument("--poll-interval", type=float, default=None, help="seconds between queue checks")
+    args = parser.parse_args(argv)
+
+    stop = threading.Event()
+    # SIGTERM (TaskWorkers.stop) and Ctrl-C finish the current task, then exit cleanly
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    worker_loop(args.db or CONFIG["TASK_DB_PATH"], stop, args.poll_interval or CONFIG["TASK_POLL_INTERVAL"])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
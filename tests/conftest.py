@@ -0,0 +1,103 @@
+# conftest.py
+"""
+Shared fixtures. Tests run from the repository root (python -m pytest) and keep every
+artifact, cache and task database under a temporary directory.
+"""
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG  # noqa: E402
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class _PluralLemmatizer:
+    # Deterministic stand-in for WordNet: strips a plural "s"
+    def lemmatize(self, word, pos="n"):
+        return word[:-1] if word.endswith("s") and len(word) > 3 else word
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(tmp_path, monkeypatch):
+    """
+    Point every on-disk location at the test's temporary directory.
+    """
+    monkeypatch.setitem(CONFIG, "ARTIFACT_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setitem(CONFIG, "RESULT_CACHE_PATH", str(tmp_path / "result_cache.sqlite3"))
+    monkeypatch.setitem(CONFIG, "TASK_DB_PATH", str(tmp_path / "tasks.sqlite3"))
+    monkeypatch.setitem(CONFIG, "PREPROCESS_WORKERS", 1)
+    monkeypatch.setitem(CONFIG, "SHARD_WORKERS", 1)
+    return tmp_path
+
+
+@pytest.fixture
+def simple_text(monkeypatch):
+    """
+    Normalize text without the NLTK tokenizer models and WordNet corpus, which are
+    downloaded separately from the nltk package.
+    """
+    from data import text_engine
+
+    monkeypatch.setattr(text_engine, "_nltk", lambda: (_PluralLemmatizer(), WORD_PATTERN.findall))
+    text_engine.lemmatize_token.cache_clear()
+    yield
+    text_engine.lemmatize_token.cache_clear()
+
+
+TOPICS = [
+    "python developer building data pipelines with sql and spark",
+    "frontend engineer writing react typescript and css interfaces",
+    "nurse caring for patients in a busy hospital ward",
+    "accountant preparing tax returns and quarterly audits",
+    "mechanical engineer designing turbine parts in cad",
+    "chef running a kitchen and planning seasonal menus",
+    "teacher planning lessons for secondary school mathematics",
+    "sales manager growing regional accounts and pipeline revenue",
+]
+
+
+def synthetic_jobs(n_jobs, seed=0):
+    """
+    Synthetic job listings: each description mixes one topic with random filler words.
+    Args:
+        n_jobs (int): Number of listings.
+        seed (int): Random seed.
+    Returns:
+        pd.DataFrame: Job Title, Company, Location and Job Description columns.
+    """
+    rng = np.random.default_rng(seed)
+    filler = [f"word{i}" for i in range(400)]
+    rows = []
+    for i in range(n_jobs):
+        topic = TOPICS[i % len(TOPICS)]
+        extra = " ".join(rng.choice(filler, size=12))
+        rows.append({
+            "Job Title": f"{topic.split()[0].title()} {topic.split()[1].title()} {i}",
+            "Company": f"Company {i % 7}",
+            "Location": ["London", "Paris", "Berlin"][i % 3],
+            "Job Description": f"{topic} {extra}",
+        })
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def make_jobs():
+    return synthetic_jobs
+
+
+@pytest.fixture
+def jobs_csv(tmp_path):
+    """
+    Write synthetic listings to a CSV and return its path.
+    """
+    def write(jobs, name="jobs.csv"):
+        path = tmp_path / name
+        jobs.to_csv(path, index=False)
+        return str(path)
+    return write
@@ -0,0 +1,79 @@
+# test_ann_index.py
+import os
+import numpy as np
+import pytest
+from scipy import sparse
+from config import CONFIG
+from data.ingest import prepare_job_features
+from models import ann_index
+from models.ann_index import AnnIndex, evaluate_recall, get_ann_index, retrieve_top_jobs
+
+
+@pytest.fixture
+def job_features(simple_text, make_jobs, jobs_csv, monkeypatch):
+    monkeypatch.setitem(CONFIG, "ANN_COMPONENTS", 32)
+    monkeypatch.setitem(CONFIG, "ANN_TABLES", 8)
+    monkeypatch.setitem(CONFIG, "ANN_BITS", 6)
+    _, _, job_features = prepare_job_features(jobs_csv(make_jobs(400)))
+    return job_features
+
+
+def test_recall_against_exact_search(job_features):
+    index = AnnIndex.build(job_features)
+    metrics = evaluate_recall(index, job_features, job_features[::8], top_k=5)
+    assert metrics["Recall@5"] >= 0.8
+    assert metrics["Candidate Fraction"] < 1.0
+
+
+def test_index_file_is_keyed_by_the_ann_parameters(job_features, monkeypatch):
+    first = get_ann_index(job_features)
+    monkeypatch.setitem(CONFIG, "ANN_BITS", 8)
+    second = get_ann_index(job_features)
+
+    names = sorted(name for name in os.listdir(CONFIG["ARTIFACT_DIR"]) if name.startswith("ann_"))
+    assert [name.rsplit("_", 1)[1] for name in names] == ["32x8x6.npz", "32x8x8.npz"]
+    assert first.planes.shape[1] == 6 and second.planes.shape[1] == 8
+
+
+def test_save_leaves_no_partial_file_behind(job_features, tmp_path):
+    index = AnnIndex.build(job_features)
+    path = str(tmp_path / "index" / "ann.npz")
+    index.save(path)
+    assert os.listdir(os.path.dirname(path)) == ["ann.npz"]
+    assert np.array_equal(AnnIndex.load(path).orders, index.orders)
+
+
+def test_retrieve_top_jobs_fingerprints_each_matrix_once(job_features, monkeypatch):
+    monkeypatch.setitem(CONFIG, "RETRIEVAL_INDEX", "ann")
+    calls = []
+    monkeypatch.setattr(ann_index, "matrix_fingerprint", lambda matrix: calls.append(1) or "0" * 64)
+
+    first, _ = retrieve_top_jobs(job_features, job_features[0], top_k=3)
+    second, _ = retrieve_top_jobs(job_features, job_features[0], top_k=3)
+    assert len(calls) == 1
+    assert first.tolist() == second.tolist()
+    assert 0 in first.tolist()
+
+
+def test_query_falls_back_to_exact_search_without_enough_candidates(job_features, monkeypatch):
+    index = AnnIndex.build(job_features)
+    query = job_features[3]
+    exact, exact_scores = retrieve_top_jobs(job_features, query, top_k=5)
+
+    monkeypatch.setattr(index, "candidates", lambda vector, n_probes=1: np.array([3]))
+    found, scores = index.query(query, top_k=5, job_features=job_features)
+    assert found.tolist() == exact.tolist()
+    assert np.allclose(scores, exact_scores)
+    assert len(index.query(query, top_k=5)[0]) == 5
+
+
+def test_matrices_with_too_few_features_are_searched_exactly(monkeypatch):
+    monkeypatch.setitem(CONFIG, "RETRIEVAL_INDEX", "ann")
+    single = sparse.csr_matrix(np.array([[0.5], [1.0], [0.0]]))
+    with pytest.raises(ValueError):
+        AnnIndex.build(single)
+    assert get_ann_index(single) is None
+    assert retrieve_top_jobs(single, sparse.csr_matrix([[1.0]]), top_k=2)[0].tolist() == [0, 1]
+
+    pair = sparse.random(30, 2, density=0.8, format="csr", random_state=0)
+    assert AnnIndex.build(pair).components.shape == (1, 2)
@@ -0,0 +1,75 @@
+# test_artifact_store.py
+import os
+import shutil
+import numpy as np
+from config import CONFIG
+from data import artifact_store, ingest
+from data.artifact_store import artifact_key, current_artifact, load_artifacts, save_artifacts, verify_artifact
+from data.data_loader import TFIDF_PARAMS
+from data.ingest import prepare_job_features
+from data.job_store import JobStore
+
+
+def test_unchanged_csv_is_served_from_the_cache(simple_text, make_jobs, jobs_csv, monkeypatch):
+    path = jobs_csv(make_jobs(60))
+    jobs_data, vectorizer, job_features, key = prepare_job_features(path, return_key=True)
+
+    def refit(*args, **kwargs):
+        raise AssertionError("the cached artifact should have been used")
+
+    monkeypatch.setattr(ingest, "preprocess_csv", refit)
+    monkeypatch.setattr(ingest, "fit_vectorizer", refit)
+    cached_jobs, cached_vectorizer, cached_features, cached_key = prepare_job_features(path, return_key=True)
+
+    assert cached_key == key == current_artifact()
+    assert cached_vectorizer.vocabulary_ == vectorizer.vocabulary_
+    assert np.array_equal(cached_vectorizer.idf_, vectorizer.idf_)
+    assert (cached_features != job_features).nnz == 0
+    # The cached rows are handed out as the memory-mapped store, not parsed into a frame
+    assert isinstance(cached_jobs, JobStore)
+    assert cached_jobs["Job Title"].tolist() == jobs_data["Job Title"].tolist()
+    # The rebuilt vectorizer transforms new text exactly like the fitted one
+    tokens = ["python", "developer", "sql"]
+    assert (cached_vectorizer.transform([tokens]) != vectorizer.transform([tokens])).nnz == 0
+
+
+def test_key_depends_on_content_stop_words_and_parameters(make_jobs, jobs_csv):
+    path = jobs_csv(make_jobs(10))
+    stop_words = CONFIG["CUSTOM_STOP_WORDS"]
+    key = artifact_key(path, stop_words, TFIDF_PARAMS)
+
+    assert artifact_key(jobs_csv(make_jobs(10), "copy.csv"), stop_words, TFIDF_PARAMS) == key
+    assert artifact_key(jobs_csv(make_jobs(11), "more.csv"), stop_words, TFIDF_PARAMS) != key
+    assert artifact_key(path, stop_words | {"python"}, TFIDF_PARAMS) != key
+    assert artifact_key(path, stop_words, {**TFIDF_PARAMS, "max_features": 10}) != key
+
+
+def test_corrupted_artifacts_are_detected(simple_text, make_jobs, jobs_csv):
+    *_, key = prepare_job_features(jobs_csv(make_jobs(30)), return_key=True)
+    assert verify_artifact(key) == []
+
+    directory = os.path.join(CONFIG["ARTIFACT_DIR"], key)
+    name = next(name for name in sorted(os.listdir(directory)) if name.endswith(".npy"))
+    with open(os.path.join(directory, name), "ab") as file:
+        file.write(b"garbage")
+    assert verify_artifact(key) == [f"{name}: checksum mismatch"]
+    assert load_artifacts("missing", TFIDF_PARAMS) is None
+
+
+def test_resaving_never_leaves_the_key_missing(simple_text, make_jobs, jobs_csv, monkeypatch):
+    path = jobs_csv(make_jobs(20))
+    *_, key = prepare_job_features(path, return_key=True)
+    artifacts = load_artifacts(key, TFIDF_PARAMS)
+    manifest = os.path.join(CONFIG["ARTIFACT_DIR"], key, "manifest.json")
+
+    # Whatever is deleted, the key must still resolve afterwards
+    rmtree = shutil.rmtree
+
+    def checked_rmtree(path, *args, **kwargs):
+        rmtree(path, *args, **kwargs)
+        assert os.path.isfile(manifest)
+
+    monkeypatch.setattr(artifact_store.shutil, "rmtree", checked_rmtree)
+    assert save_artifacts(key, artifacts["vectorizer"], artifacts["job_features"], artifacts["row_index"])
+    assert sorted(os.listdir(CONFIG["ARTIFACT_DIR"])) == sorted(["CURRENT", key])
+    assert load_artifacts(key, TFIDF_PARAMS)["jobs"] is None
@@ -0,0 +1,34 @@
+# test_batch_scoring.py
+import numpy as np
+from data.data_loader import load_cvs, preprocess_cvs
+from data.ingest import prepare_job_features
+from models.model import calculate_similarity, rank_cvs_batch, top_k_indices
+
+CVS = {
+    "analyst": "Python developer building SQL data pipelines with Spark",
+    "carer": "Experienced nurse caring for patients on a hospital ward",
+    "cook": "Chef planning seasonal menus",
+    "blank": "zzz qqq",
+}
+
+
+def test_load_cvs_reads_text_files_in_order(tmp_path):
+    for name, text in CVS.items():
+        (tmp_path / f"{name}.txt").write_text(text)
+    (tmp_path / "notes.md").write_text("ignored")
+    assert load_cvs(str(tmp_path)) == dict(sorted(CVS.items()))
+
+
+def test_batch_ranking_matches_scoring_each_cv(simple_text, make_jobs, jobs_csv):
+    jobs_data, vectorizer, job_features = prepare_job_features(jobs_csv(make_jobs(80)))
+    cv_tokens = preprocess_cvs(CVS, workers=1)
+    results = rank_cvs_batch(jobs_data, vectorizer, job_features, cv_tokens, top_k=5)
+
+    assert list(results) == list(CVS)
+    for name, tokens in cv_tokens.items():
+        scores = calculate_similarity(job_features, vectorizer.transform([tokens]))
+        expected = top_k_indices(scores, 5)
+        expected = expected[scores[expected] > 0]  # only stored similarities are ranked
+        ranked = results[name]
+        assert np.allclose(ranked["Similarity Score"].to_numpy(), scores[expected], atol=1e-5)
+    assert results["blank"].empty
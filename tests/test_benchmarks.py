@@ -0,0 +1,57 @@
+# test_benchmarks.py
+import os
+import pandas as pd
+from benchmarks.corpus import build_vocabulary, generate_cv, generate_jobs, jobs_csv
+from benchmarks.run_benchmarks import compare, run_benchmarks
+
+
+def test_corpora_are_reproducible():
+    vocabulary = build_vocabulary(size=300, seed=1)
+    assert len(set(vocabulary)) == 300
+    first = generate_jobs(50, seed=1, vocabulary=vocabulary, missing_rate=0.2)
+    assert first.equals(generate_jobs(50, seed=1, vocabulary=vocabulary, missing_rate=0.2))
+    assert not first.equals(generate_jobs(50, seed=2, vocabulary=vocabulary, missing_rate=0.2))
+    assert list(first.columns) == ["Job Title", "Company", "Location", "Job Description"]
+    assert 0 < first["Job Description"].isna().sum() < 50
+    assert generate_cv(seed=1, vocabulary=vocabulary) == generate_cv(seed=1, vocabulary=vocabulary)
+
+
+def test_generated_csv_is_written_in_chunks_and_reused(tmp_path):
+    path = jobs_csv(25, seed=0, corpus_dir=str(tmp_path), chunk_size=10)
+    assert len(pd.read_csv(path)) == 25
+    modified = os.path.getmtime(path)
+    assert jobs_csv(25, seed=0, corpus_dir=str(tmp_path)) == path
+    assert os.path.getmtime(path) == modified
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+
+def test_chunks_of_neighbouring_seeds_do_not_repeat(tmp_path):
+    # Titles only depend on the random stream, so a shared chunk seed would show up here
+    first = pd.read_csv(jobs_csv(20, seed=0, corpus_dir=str(tmp_path), chunk_size=10))
+    second = pd.read_csv(jobs_csv(20, seed=1, corpus_dir=str(tmp_path), chunk_size=10))
+    assert first["Job Title"].iloc[10:].tolist() != second["Job Title"].iloc[:10].tolist()
+    assert first["Job Title"].iloc[10:].tolist() != first["Job Title"].iloc[:10].tolist()
+
+
+def test_benchmark_run_times_every_stage(simple_text, tmp_path):
+    results = run_benchmarks([40], corpus_dir=str(tmp_path), workers=1)
+    run = results["runs"]["40"]
+    assert set(run["stages"]) == {
+        "load_csv", "preprocess_csv", "preprocess_cv", "featurize_text",
+        "calculate_similarity", "rank_jobs_by_similarity", "keyword_analysis",
+    }
+    assert run["stages"]["load_csv"]["sizes"]["rows"] == 40
+    # The current RSS can shrink across a stage; the peak can only grow
+    assert all(isinstance(stage["rss_growth_bytes"], int) for stage in run["stages"].values())
+    assert all(stage["peak_rss_growth_bytes"] >= 0 for stage in run["stages"].values())
+    assert compare(results, results) == []
+
+
+def test_compare_flags_only_real_slowdowns():
+    def results(**seconds):
+        return {"runs": {"100": {"stages": {stage: {"seconds": value} for stage, value in seconds.items()}}}}
+
+    baseline = results(fit=1.0, rank=0.001, load=1.0)
+    regressions = compare(results(fit=1.5, rank=0.003, load=1.1, new=2.0), baseline, tolerance=0.2)
+    # rank tripled but by less than the noise floor; load is within tolerance; new has no baseline
+    assert [(item["stage"], item["ratio"]) for item in regressions] == [("fit", 1.5)]
@@ -0,0 +1,40 @@
+# test_cli.py
+import subprocess
+import sys
+import pytest
+from config import BASE_DIR
+from main import build_parser, parse_import_times
+
+HEAVY_MODULES = ("pandas", "sklearn", "nltk", "matplotlib", "seaborn", "plotly", "scipy")
+
+
+def test_importing_main_skips_the_heavy_libraries():
+    # A fresh interpreter; this one has imported everything already
+    probe = f"import sys, main; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    output = subprocess.run(
+        [sys.executable, "-c", probe], cwd=BASE_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_subcommands():
+    parser = build_parser()
+    assert parser.parse_args(["health", "--deep"]).deep
+    assert parser.parse_args(["plot", "--mode", "export"]).mode == "export"
+    assert parser.parse_args([]).command is None
+    with pytest.raises(SystemExit):
+        parser.parse_args(["plot", "--mode", "print"])
+
+
+def test_import_time_summary_keeps_top_level_modules():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        300 | json",
+        "import time:       200 |        200 |   json.decoder",
+        "import time:       500 |       1500 | pandas",
+        "a warning",
+    ])
+    total, slowest, other = parse_import_times(stderr, top_n=1)
+    assert total == pytest.approx(0.0018)
+    assert slowest == [("pandas", 0.0015)]
+    assert other == ["a warning"]
@@ -0,0 +1,61 @@
+# test_compaction.py
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from config import CONFIG
+import data.compaction
+from data.compaction import compact_features, compact_with_report, compaction_report, matrix_nbytes
+
+
+@pytest.fixture
+def features():
+    return normalize(sparse.random(60, 40, density=0.2, format="csr", random_state=0, dtype=np.float64))
+
+
+def test_float32_halves_the_weights_and_narrows_indices(features):
+    compact = compact_features(features, dtype="float32", prune_threshold=0)
+    assert compact.dtype == np.float32
+    assert compact.indices.dtype == np.int32 and compact.indptr.dtype == np.int32
+    assert compact.nnz == features.nnz
+    assert np.allclose(compact.toarray(), features.toarray(), atol=1e-7)
+    assert matrix_nbytes(compact) < matrix_nbytes(features)
+
+
+def test_pruning_drops_small_weights_row_by_row(features):
+    compact = compact_features(features, dtype="float64", prune_threshold=0.2)
+    expected = features.toarray()
+    expected[np.abs(expected) < 0.2] = 0
+    assert compact.nnz == np.count_nonzero(expected) < features.nnz
+    assert (compact.toarray() == expected).all()
+
+
+def test_unchanged_matrix_is_returned_as_is(features, monkeypatch):
+    features = sparse.csr_matrix(
+        (features.data, features.indices.astype(np.int32), features.indptr.astype(np.int32)), shape=features.shape
+    )
+    monkeypatch.setitem(CONFIG, "FEATURE_DTYPE", "float64")
+    monkeypatch.setitem(CONFIG, "PRUNE_THRESHOLD", 0.0)
+    compact, report = compact_with_report(features)
+    assert compact is features and report is None
+
+
+def test_report_measures_saving_and_drift(features, monkeypatch):
+    monkeypatch.setitem(CONFIG, "FEATURE_DTYPE", "float32")
+    assert compact_with_report(features)[1] is None
+    monkeypatch.setitem(CONFIG, "COMPACTION_REPORT", True)
+    compact, report = compact_with_report(features)
+    assert compact.dtype == np.float32
+    assert report["compact_nnz"] == report["original_nnz"] == features.nnz
+    assert report["saved_fraction"] > 0.2
+    assert report["max_score_drift"] < 1e-6 and report[f"top{CONFIG['TOP_N_JOBS']}_overlap"] == 1.0
+
+    pruned = compaction_report(features, compact_features(features, prune_threshold=0.3), top_k=3)
+    assert pruned["compact_nnz"] < pruned["original_nnz"] and pruned["max_score_drift"] > 1e-3
+
+
+def test_report_is_the_same_when_scored_in_blocks(features, monkeypatch):
+    compact = compact_features(features, prune_threshold=0.3)
+    whole = compaction_report(features, compact, top_k=3)
+    monkeypatch.setattr(data.compaction, "REPORT_BLOCK_ROWS", 7)
+    assert compaction_report(features, compact, top_k=3) == pytest.approx(whole)
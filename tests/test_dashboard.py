@@ -0,0 +1,109 @@
+# test_dashboard.py
+import threading
+import pytest
+from config import CONFIG
+from data.ingest import prepare_job_features
+from models.serving import build_snapshot, model_holder
+from models.task_queue import TaskStore
+from visualizations import render_cache
+
+
+@pytest.fixture
+def client(simple_text, make_jobs, jobs_csv, monkeypatch):
+    """
+    Test client serving a snapshot of synthetic jobs; no watcher or workers are started.
+    """
+    import dashboard_app
+
+    monkeypatch.setitem(CONFIG, "RESULT_CACHE", False)
+    monkeypatch.setattr(dashboard_app, "start_services", lambda: None)
+    monkeypatch.setattr(dashboard_app, "task_store", TaskStore())
+    jobs_data, vectorizer, job_features, key = prepare_job_features(jobs_csv(make_jobs(40)), return_key=True)
+    snapshot = build_snapshot(key, vectorizer, job_features, jobs_data["Job Title"].tolist(), jobs_data)
+    monkeypatch.setattr(model_holder, "_snapshot", snapshot)
+    return dashboard_app.app.test_client()
+
+
+def test_score_returns_top_k_jobs(client):
+    response = client.post("/score", json={"cv": "python developer sql spark", "top_k": "3"})
+    assert response.status_code == 200
+    assert len(response.get_json()["jobs"]) == 3
+
+    response = client.post("/score?top_k=2", json={"cv": "python developer"})
+    assert len(response.get_json()["jobs"]) == 2
+
+
+@pytest.mark.parametrize("top_k", ["three", -1, 0, 2.5, True, [3]])
+def test_score_rejects_invalid_top_k(client, top_k):
+    response = client.post("/score", json={"cv": "python developer", "top_k": top_k})
+    assert response.status_code == 400
+    assert "top_k" in response.get_json()["error"]
+
+
+def test_analyze_rejects_invalid_top_k(client):
+    assert client.post("/analyze?top_k=-1", json={"cv": "python developer"}).status_code == 400
+    assert client.post("/analyze?top_k=x", json={"cv": "python developer"}).status_code == 400
+
+    response = client.post("/analyze", json={"cv": "python developer", "top_k": "4"})
+    assert response.status_code == 202
+    task_id = response.get_json()["task_id"]
+    assert client.get(f"/analyze/{task_id}").get_json()["status"] == "queued"
+
+
+def test_search_filters_and_validates(client):
+    response = client.get("/search?title=python&location=London&top_k=50")
+    assert response.status_code == 200
+    jobs = response.get_json()["jobs"]
+    assert jobs and all(job["location"] == "London" and "Python" in job["title"] for job in jobs)
+
+    assert client.get("/search?title=python&top_k=0").status_code == 400
+    assert client.get("/search?title=python&top_k=abc").status_code == 400
+
+
+def test_search_rejects_filters_on_fields_that_are_not_indexed(client, monkeypatch):
+    assert client.get("/search?title=python&company=Company%201").status_code == 200
+    monkeypatch.delitem(model_holder.current.query_index.value_indexes, "company")
+
+    response = client.get("/search?title=python&company=Company%201")
+    assert response.status_code == 400
+    body = response.get_json()
+    assert "company" in body["error"] and "location" in body["fields"]
+    assert client.post("/search", json={"title": "python", "salary": 10}).status_code == 400
+
+
+def test_search_on_an_unindexed_field_is_a_client_error(client, monkeypatch):
+    # A snapshot whose jobs were stored without titles has no title index
+    monkeypatch.setattr(model_holder.current.query_index, "title_index", None)
+    response = client.get("/search?title=python")
+    assert response.status_code == 400
+    assert "title" in response.get_json()["error"]
+
+
+def test_results_page_shows_the_charts_of_its_own_ranking(client):
+    first = client.post("/score", json={"cv": "python developer sql spark", "top_k": 2}).get_json()
+    second = client.post("/score", json={"cv": "nurse caring for patients", "top_k": 3}).get_json()
+    assert first["results_url"] != second["results_url"]
+
+    first_page = client.get(first["results_url"]).get_data(as_text=True)
+    second_page = client.get(second["results_url"]).get_data(as_text=True)
+    # Each page draws its own ranking, whichever CV was scored last
+    assert first_page != second_page
+    assert client.get("/results").status_code == 200
+    assert client.get("/results?result=unknown").status_code == 404
+
+
+def test_chart_still_rendering_is_a_retryable_503(client, monkeypatch):
+    import dashboard_app
+
+    release = threading.Event()
+    monkeypatch.setattr(render_cache, "render_chart", lambda chart, data, params: release.wait() and b"png")
+    monkeypatch.setattr(dashboard_app, "render_cache", render_cache.RenderCache(workers=1))
+    monkeypatch.setitem(CONFIG, "RENDER_TIMEOUT", 0.05)
+    key = dashboard_app.render_cache.submit("top_matches", {"titles": ["a"], "scores": [1.0]})
+    try:
+        response = client.get(f"/plots/{key}.png")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"]
+    finally:
+        release.set()
+    assert client.get(f"/plots/{key}.png").status_code == 200
@@ -0,0 +1,87 @@
+# test_dedup.py
+import numpy as np
+import pandas as pd
+import pytest
+from config import CONFIG
+from data.dedup import DUPLICATE_COUNT_COLUMN, deduplicate_jobs, find_duplicates
+from data.ingest import prepare_job_features, row_fingerprints, skip_known_duplicates
+
+
+def posting(seed, n_words=100):
+    rng = np.random.default_rng(seed)
+    return [f"w{word}" for word in rng.integers(0, 5000, size=n_words)]
+
+
+def edited(tokens, positions):
+    tokens = list(tokens)
+    for position in positions:
+        tokens[position] = f"edit{position}"
+    return tokens
+
+
+def test_exact_duplicates_map_to_the_earliest_copy():
+    a, b = posting(1), posting(2)
+    representatives, exact = find_duplicates([a, b, list(a), list(b), list(a)], threshold=1.0)
+
+    assert representatives.tolist() == [0, 1, 0, 1, 0]
+    assert exact == 3
+
+
+def test_near_duplicates_cluster_above_the_threshold_only():
+    base = posting(3)
+    token_lists = [
+        base,
+        edited(base, [50]),             # 3 of 98 shingles differ: Jaccard ~0.94
+        posting(4),
+        edited(base, range(0, 100, 3)),  # every third word differs: unrelated shingles
+        edited(base, [10, 90]),         # Jaccard ~0.89, and 0.83 to the second posting
+    ]
+    representatives, exact = find_duplicates(token_lists, threshold=0.8, num_perm=128, bands=32)
+
+    assert exact == 0
+    assert representatives.tolist() == [0, 0, 2, 3, 0]
+
+
+def test_empty_and_short_postings():
+    representatives, _ = find_duplicates([[], ["a"], ["a"], ["b", "c"], []], threshold=0.8)
+
+    # Postings without tokens are exact copies of each other, never near-duplicates of others
+    assert representatives.tolist() == [0, 1, 1, 3, 0]
+
+
+def test_deduplicate_jobs_counts_copies_and_resets_the_index():
+    t = [posting(i) for i in range(5)]
+    jobs = pd.DataFrame({"Job Title": [f"job {i}" for i in range(8)],
+                         "Tokens": [t[0], t[1], t[1], t[2], t[3], t[3], t[4], t[1]]})
+    deduplicated, representatives, report = deduplicate_jobs(jobs, "Tokens")
+
+    assert deduplicated.index.equals(pd.RangeIndex(5))
+    assert deduplicated["Job Title"].tolist() == ["job 0", "job 1", "job 3", "job 4", "job 6"]
+    assert deduplicated[DUPLICATE_COUNT_COLUMN].tolist() == [0, 2, 0, 1, 0]
+    assert representatives.tolist() == [0, 1, 1, 3, 4, 4, 6, 1]
+    assert report["removed"] == report["exact_duplicates"] == 3
+
+
+def test_skip_known_duplicates_resets_the_index(make_jobs):
+    jobs = make_jobs(10)
+    jobs = pd.concat([jobs.iloc[:6], jobs.iloc[[2, 5]], jobs.iloc[6:]], ignore_index=True)
+    remaining, (keys, _), duplicates = skip_known_duplicates(jobs, row_fingerprints(jobs), None)
+
+    assert remaining.index.equals(pd.RangeIndex(10))
+    assert remaining["Job Title"].tolist() == make_jobs(10)["Job Title"].tolist()
+    assert len(keys) == 10
+    assert duplicates.shape == (3, 2)
+    assert remaining[DUPLICATE_COUNT_COLUMN].tolist() == [0, 0, 1, 0, 0, 1, 0, 0, 0, 0]
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_ingest_keeps_rows_aligned_with_the_matrix(simple_text, make_jobs, jobs_csv, monkeypatch, incremental):
+    monkeypatch.setitem(CONFIG, "REFIT_DRIFT_THRESHOLD", 1.0)
+    jobs = make_jobs(60)
+    if incremental:
+        prepare_job_features(jobs_csv(jobs, "base.csv"), incremental=True)
+    copies = pd.concat([jobs, jobs.iloc[::4], make_jobs(3, seed=9)], ignore_index=True)
+    jobs_data, _, job_features = prepare_job_features(jobs_csv(copies, "copies.csv"), incremental=incremental)
+
+    assert jobs_data.index.equals(pd.RangeIndex(job_features.shape[0]))
+    assert jobs_data[DUPLICATE_COUNT_COLUMN].sum() == 15
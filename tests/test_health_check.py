@@ -0,0 +1,43 @@
+# test_health_check.py
+import os
+from config import CONFIG
+from data.ingest import prepare_job_features
+from health_check.health_check import check_csv, check_cv, health_check
+
+
+def test_csv_check_reads_only_the_header(tmp_path):
+    path = tmp_path / "jobs.csv"
+    # A body that would fail to parse proves only the header is read
+    path.write_text('"Job\nTitle",Job Description,Company\n"unterminated')
+    assert check_csv(str(path), ("Job\nTitle", "Job Description")) == (True, True)
+    assert check_csv(str(path)) == (True, False)
+
+    (tmp_path / "empty.csv").write_text("")
+    assert check_csv(str(tmp_path / "empty.csv")) == (False, False)
+    assert check_csv(str(tmp_path / "missing.csv")) == (False, False)
+
+
+def test_cv_check(tmp_path):
+    (tmp_path / "cv.txt").write_text("Python developer")
+    (tmp_path / "blank.txt").write_text("  \n")
+    assert check_cv(str(tmp_path / "cv.txt")) == "Python developer"
+    assert check_cv(str(tmp_path / "blank.txt")) is None
+    assert check_cv(str(tmp_path / "missing.txt")) is None
+
+
+def test_deep_check_verifies_the_published_artifact(simple_text, make_jobs, jobs_csv, tmp_path, monkeypatch):
+    monkeypatch.setitem(CONFIG, "CSV_PATH", jobs_csv(make_jobs(20)))
+    (tmp_path / "cv.txt").write_text("Python developer")
+    monkeypatch.setitem(CONFIG, "CV_PATH", str(tmp_path / "cv.txt"))
+
+    checks, loaded = health_check()
+    assert all(checks.values()) and "Artifacts Intact" not in checks
+    assert loaded == {"cv": "Python developer"}
+    # Nothing published yet is not a failure
+    assert health_check(deep=True)[0]["Artifacts Intact"]
+
+    *_, key = prepare_job_features(CONFIG["CSV_PATH"], return_key=True)
+    assert health_check(deep=True)[0]["Artifacts Intact"]
+    directory = os.path.join(CONFIG["ARTIFACT_DIR"], key)
+    os.remove(os.path.join(directory, sorted(name for name in os.listdir(directory) if name.endswith(".npy"))[0]))
+    assert not health_check(deep=True)[0]["Artifacts Intact"]
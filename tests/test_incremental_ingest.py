@@ -0,0 +1,110 @@
+# test_incremental_ingest.py
+import json
+import os
+import numpy as np
+import pandas as pd
+from config import CONFIG
+from data.artifact_store import current_artifact, load_artifacts, prune_artifacts
+from data.compaction import compact_features
+from data.data_loader import TFIDF_PARAMS, TOKENS_COLUMN, preprocess_csv
+from data.ingest import prepare_job_features
+from data.streaming import prepare_job_features_streaming
+from models.ann_index import get_ann_index
+from models.sharded_index import get_sharded_index
+
+
+def manifest(key):
+    with open(os.path.join(CONFIG["ARTIFACT_DIR"], key, "manifest.json")) as file:
+        return json.load(file)
+
+
+def edit_feed(jobs, changed, removed, added):
+    jobs = jobs.copy()
+    jobs.loc[changed, "Job Description"] = jobs.loc[changed, "Job Description"] + " rust kubernetes"
+    return pd.concat([jobs.drop(index=removed), added], ignore_index=True)
+
+
+def test_incremental_update_matches_a_rebuild_with_the_stored_vocabulary(simple_text, make_jobs, jobs_csv):
+    base_jobs = make_jobs(100)
+    _, vectorizer, _ = prepare_job_features(jobs_csv(base_jobs, "base.csv"), incremental=True)
+    base_key = current_artifact()
+
+    feed = edit_feed(base_jobs, changed=[3, 40], removed=[7, 8], added=make_jobs(5, seed=1))
+    jobs_data, incremental_vectorizer, job_features = prepare_job_features(jobs_csv(feed, "feed.csv"), incremental=True)
+
+    # The fitted vocabulary and IDF weights are reused, not refitted
+    assert incremental_vectorizer.vocabulary_ == vectorizer.vocabulary_
+    assert np.array_equal(incremental_vectorizer.idf_, vectorizer.idf_)
+    assert jobs_data["Job Title"].tolist() == feed["Job Title"].tolist()
+
+    tokens = preprocess_csv(feed.copy())[TOKENS_COLUMN]
+    expected = compact_features(vectorizer.transform(tokens))
+    assert job_features.shape == expected.shape
+    assert abs(job_features - expected).max() < 1e-6
+    # Reused rows take their tokens from the store, so both paths save the same columns
+    assert jobs_data[TOKENS_COLUMN].tolist() == tokens.tolist()
+    stored_jobs = load_artifacts(current_artifact(), TFIDF_PARAMS)["jobs"]
+    assert stored_jobs.to_frame([TOKENS_COLUMN])[TOKENS_COLUMN].tolist() == tokens.tolist()
+
+    stored = manifest(current_artifact())
+    assert current_artifact() != base_key
+    assert stored["fit_rows"] == 100
+    # Without JOB_KEY_COLUMN rows are keyed by content, so an edit is a removal plus an addition
+    assert stored["rows_since_fit"] == 2 * 2 + 2 + 5
+
+
+def test_drift_beyond_the_threshold_refits(simple_text, make_jobs, jobs_csv, monkeypatch):
+    monkeypatch.setitem(CONFIG, "REFIT_DRIFT_THRESHOLD", 0.1)
+    base_jobs = make_jobs(50)
+    prepare_job_features(jobs_csv(base_jobs, "base.csv"), incremental=True)
+
+    feed = edit_feed(base_jobs, changed=[], removed=[], added=make_jobs(10, seed=2))
+    _, vectorizer, job_features = prepare_job_features(jobs_csv(feed, "feed.csv"), incremental=True)
+
+    stored = manifest(current_artifact())
+    assert stored["fit_rows"] == job_features.shape[0] == 60
+    assert stored["rows_since_fit"] == 0
+    full = build_reference(feed)
+    assert vectorizer.vocabulary_ == full.vocabulary_
+
+
+def build_reference(feed):
+    from data.data_loader import fit_vectorizer
+    vectorizer, _ = fit_vectorizer(preprocess_csv(feed.copy())[TOKENS_COLUMN])
+    return vectorizer
+
+
+def test_superseded_artifacts_and_indexes_are_pruned(simple_text, make_jobs, jobs_csv, monkeypatch):
+    monkeypatch.setitem(CONFIG, "REFIT_DRIFT_THRESHOLD", 1.0)
+    monkeypatch.setitem(CONFIG, "ARTIFACT_KEEP", 1)
+    monkeypatch.setitem(CONFIG, "ANN_COMPONENTS", 8)
+    root = CONFIG["ARTIFACT_DIR"]
+
+    jobs = make_jobs(40)
+    keys, derived = [], []
+    for night in range(4):
+        jobs = edit_feed(jobs, changed=[], removed=[0], added=make_jobs(2, seed=10 + night))
+        _, _, job_features = prepare_job_features(jobs_csv(jobs, f"night{night}.csv"), incremental=True)
+        keys.append(current_artifact())
+        loaded = load_artifacts(keys[-1], TFIDF_PARAMS)["job_features"]
+        get_ann_index(loaded)
+        derived.append(os.path.basename(get_sharded_index(loaded, rows_per_shard=16).directory))
+
+    entries = set(os.listdir(root))
+    # Only the published artifact survives the next publish, with its own indexes
+    assert keys[-1] in entries and not entries & set(keys[:2])
+    assert derived[-1] in entries and not entries & set(derived[:2])
+    assert len([entry for entry in entries if entry.startswith("ann_")]) <= 2
+
+    prepare_job_features(jobs_csv(jobs, "night3.csv"), incremental=True)
+    assert prune_artifacts() == 0
+    assert derived[-1] in os.listdir(root)
+
+
+def test_incremental_update_over_a_streamed_artifact_keeps_tokens(simple_text, make_jobs, jobs_csv):
+    base_jobs = make_jobs(50)
+    prepare_job_features_streaming(jobs_csv(base_jobs, "base.csv"), chunk_size=20)
+    feed = edit_feed(base_jobs, changed=[], removed=[0], added=make_jobs(2, seed=1))
+    jobs_data, _, _ = prepare_job_features(jobs_csv(feed, "feed.csv"), incremental=True)
+    assert manifest(current_artifact())["rows_since_fit"] == 3
+    assert jobs_data[TOKENS_COLUMN].tolist() == preprocess_csv(feed.copy())[TOKENS_COLUMN].tolist()
@@ -0,0 +1,58 @@
+# test_job_store.py
+import mmap
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from data.job_store import load_csr, open_job_store, save_csr, save_job_store
+
+
+def is_mapped(array):
+    # scipy keeps views of the loaded arrays, so follow the chain down to the file mapping
+    while array is not None and not isinstance(array, mmap.mmap):
+        array = getattr(array, "base", None)
+    return array is not None
+
+
+def test_columns_round_trip_through_the_store(tmp_path):
+    jobs = pd.DataFrame({
+        "Job Title": ["Data Engineer", "Café Barista", None],
+        "Score": [0.5, 1.5, 2.5],
+        "Remote": [True, False, True],
+        "Tokens": [["data", "engineer"], ["barista"], []],
+    })
+    save_job_store(str(tmp_path), jobs)
+    store = open_job_store(str(tmp_path))
+
+    assert len(store) == 3 and "Tokens" in store
+    titles = store.column("Job Title")
+    assert titles.tolist() == ["Data Engineer", "Café Barista", None]
+    assert titles[-2] == "Café Barista" and titles.take([1, 0]) == ["Café Barista", "Data Engineer"]
+    assert is_mapped(store.column("Score"))
+
+    # Token lists are left out unless asked for
+    frame = store.to_frame()
+    assert list(frame.columns) == ["Job Title", "Score", "Remote"]
+    assert frame["Score"].tolist() == [0.5, 1.5, 2.5] and frame["Remote"].tolist() == [True, False, True]
+    assert store.to_frame(["Tokens"])["Tokens"].tolist() == [["data", "engineer"], ["barista"], []]
+
+
+def test_missing_store_opens_as_none(tmp_path):
+    assert open_job_store(str(tmp_path)) is None
+
+
+def test_empty_string_columns_open(tmp_path):
+    save_job_store(str(tmp_path), pd.DataFrame({"Company": ["", ""]}))
+    store = open_job_store(str(tmp_path))
+    assert store.column("Company").tolist() == ["", ""]
+
+
+def test_csr_matrix_loads_as_mapped_views(tmp_path):
+    matrix = sparse.random(6, 5, density=0.4, format="csr", random_state=0)
+    shape = save_csr(str(tmp_path), matrix)
+    loaded = load_csr(str(tmp_path), shape)
+
+    assert shape == [6, 5]
+    assert all(is_mapped(getattr(loaded, part)) for part in ("data", "indices", "indptr"))
+    assert not loaded.data.flags.writeable
+    assert (loaded.toarray() == matrix.toarray()).all()
+    assert not is_mapped(load_csr(str(tmp_path), shape, mmap=False).data)
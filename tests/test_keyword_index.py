@@ -0,0 +1,37 @@
+# test_keyword_index.py
+import numpy as np
+import pytest
+from scipy import sparse
+from models.keyword_index import build_keyword_index
+from models.model import extract_top_keywords, find_missing_keywords
+
+FEATURES = ["cloud", "java", "python", "sql"]
+JOBS = sparse.csr_matrix(np.array([
+    [0.0, 0.2, 0.8, 0.0],
+    [0.5, 0.0, 0.4, 0.3],
+    [0.0, 0.0, 0.0, 0.9],
+], dtype=np.float32))
+
+
+@pytest.fixture
+def index():
+    return build_keyword_index(FEATURES, JOBS)
+
+
+def test_index_answers_like_the_matrix_scans(index):
+    cv_vector = sparse.csr_matrix(np.array([[0.0, 0.0, 1.0, 0.0]]))
+    assert index.top_keywords(2) == extract_top_keywords(FEATURES, JOBS, 2)
+    assert index.missing_keywords(cv_vector) == find_missing_keywords(cv_vector, FEATURES, JOBS)
+    assert [keyword for keyword, _ in index.missing_keywords(cv_vector)] == ["sql", "cloud", "java"]
+
+
+def test_postings_and_subsets(index):
+    assert index.postings_for("python").tolist() == [0, 1]
+    assert index.postings_for("unknown").tolist() == []
+    assert index.doc_freq.tolist() == [1, 1, 2, 2]
+    assert [keyword for keyword, _ in index.top_keywords(1, job_rows=[0])] == ["python"]
+
+    cv_vector = sparse.csr_matrix(np.array([[0.0, 0.0, 0.0, 1.0]]))
+    gaps = index.job_keyword_gaps(cv_vector, [1, 2], top_n=5)
+    assert [keyword for keyword, _ in gaps[1]] == ["cloud", "python"]
+    assert gaps[2] == []
@@ -0,0 +1,71 @@
+# test_logging.py
+import json
+import logging
+import multiprocessing
+import queue
+import pytest
+from logs.log_config import BatchingQueueListener, JsonLinesFormatter, SamplingFilter
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.batches = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+    def flush_batch(self):
+        self.batches.append(len(self.messages))
+
+
+def record(message, level=logging.INFO, **extra):
+    return logging.makeLogRecord({"msg": message, "levelno": level, "levelname": logging.getLevelName(level), **extra})
+
+
+def test_listener_writes_in_batches_and_drains_on_stop():
+    log_queue, handler = queue.Queue(), RecordingHandler()
+    for i in range(10):
+        log_queue.put(record(f"info {i}"))
+    log_queue.put(record("error", logging.ERROR))
+    log_queue.put(record("after"))
+
+    listener = BatchingQueueListener(log_queue, handler, batch_size=4, flush_interval=60)
+    listener.start()
+    listener.stop()
+
+    assert handler.messages == [f"info {i}" for i in range(10)] + ["error", "after"]
+    # Full batches of four, an error flushed at once, then the rest on stop
+    assert handler.batches == [4, 8, 11, 12]
+
+
+def test_json_lines_carry_extra_fields():
+    line = JsonLinesFormatter().format(record("stage done", stage="fit", elapsed_ns=5))
+    entry = json.loads(line)
+    assert entry["message"] == "stage done" and entry["level"] == "INFO"
+    assert entry["stage"] == "fit" and entry["elapsed_ns"] == 5
+
+
+def test_sampling_keeps_unsampled_levels():
+    sampler = SamplingFilter({"INFO": 0.0})
+    assert not sampler.filter(record("dropped"))
+    assert sampler.filter(record("kept", logging.WARNING))
+    assert SamplingFilter({"info": 1.0}).filter(record("kept"))
+
+
+def _handler_types(results):
+    results.put(sorted(type(handler).__name__ for handler in logging.getLogger().handlers))
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_worker_processes_append_without_rotating():
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    worker = context.Process(target=_handler_types, args=(results,))
+    worker.start()
+    handlers = results.get(timeout=30)
+    worker.join()
+    # The parent's listener is the only writer that rotates jats.log
+    assert handlers.count("WatchedFileHandler") == 2
+    assert not any("Rotating" in name or name == "QueueHandler" for name in handlers)
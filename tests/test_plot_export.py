@@ -0,0 +1,32 @@
+# test_plot_export.py
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from visualizations.plotter import render_plots
+
+RANKED = pd.DataFrame({"Job Title": ["Data Engineer", "Nurse", "Chef"], "Similarity Score": [0.9, 0.5, 0.1]})
+FEATURES = ["cloud", "python", "sql"]
+JOBS = sparse.csr_matrix(np.array([[0.1, 0.8, 0.0], [0.0, 0.4, 0.3]]))
+CV = sparse.csr_matrix(np.array([[0.0, 1.0, 0.0]]))
+
+TASKS = [
+    ("plot_top_matches", (RANKED,), {"top_n": 3}),
+    ("plot_missing_keywords", ([("sql", 0.3), ("cloud", 0.1)],), {}),
+    ("plot_evaluation_metrics", ({"Precision": 0.5, "Recall": 0.7},), {}),
+    ("plot_interactive_keyword_comparison", (FEATURES, CV, JOBS), {"top_n": 3}),
+]
+
+
+@pytest.mark.parametrize("fmt", ["png", "svg"])
+def test_export_writes_every_chart_headless(tmp_path, fmt):
+    paths = render_plots(TASKS, output_dir=str(tmp_path), fmt=fmt, workers=2)
+    assert [os.path.basename(path) for path in paths] == [
+        f"top_matches.{fmt}", f"missing_keywords.{fmt}", f"evaluation_metrics.{fmt}", "keyword_comparison.html"
+    ]
+    for path in paths:
+        assert os.path.getsize(path) > 0
+    with open(paths[0], "rb") as file:
+        header = file.read(64)
+    assert header.startswith(b"\x89PNG") if fmt == "png" else b"<?xml" in header
@@ -0,0 +1,58 @@
+# test_ranking.py
+import numpy as np
+import pandas as pd
+import pytest
+from data.job_store import StringHeap, open_job_store, save_job_store
+from models.model import rank_jobs_by_similarity, top_k_indices
+
+
+@pytest.mark.parametrize("top_k", [1, 5, 99, 100, 250])
+def test_top_k_matches_a_full_sort(top_k):
+    rng = np.random.default_rng(0)
+    scores = rng.integers(0, 20, size=100) / 20  # plenty of ties
+    selected = top_k_indices(scores, top_k)
+    assert len(selected) == min(top_k, len(scores))
+    assert len(set(selected.tolist())) == len(selected)
+    assert np.array_equal(scores[selected], np.sort(scores)[::-1][:top_k])
+
+
+def test_top_k_edge_cases():
+    assert top_k_indices(np.array([0.3, 0.9]), 0).tolist() == []
+    assert top_k_indices(np.array([]), 3).tolist() == []
+    # Equal scores keep their original order
+    assert top_k_indices(np.array([0.5, 0.5, 0.5]), 3).tolist() == [0, 1, 2]
+
+
+def test_ranking_selects_rows_without_touching_the_input():
+    jobs = pd.DataFrame({"Job Title": [f"Job {i}" for i in range(6)]})
+    scores = [0.1, 0.7, 0.3, 0.9, 0.0, 0.5]
+
+    top = rank_jobs_by_similarity(jobs, scores, top_n=3)
+    assert top["Job Title"].tolist() == ["Job 3", "Job 1", "Job 5"]
+    assert top["Similarity Score"].tolist() == [0.9, 0.7, 0.5]
+    assert list(jobs.columns) == ["Job Title"]
+
+    everything = rank_jobs_by_similarity(jobs, scores)
+    assert everything["Job Title"].tolist() == ["Job 3", "Job 1", "Job 5", "Job 2", "Job 0", "Job 4"]
+
+
+def test_ranking_a_job_store_decodes_only_the_ranked_rows(tmp_path, monkeypatch):
+    jobs = pd.DataFrame({
+        "Job Title": [f"Job {i}" for i in range(6)],
+        "Salary": [10.0 * i for i in range(6)],
+        "Tokens": [["job", str(i)] for i in range(6)],
+    })
+    save_job_store(str(tmp_path), jobs)
+    store = open_job_store(str(tmp_path))
+    scores = [0.1, 0.7, 0.3, 0.9, 0.0, 0.5]
+
+    decoded = []
+    read = StringHeap.__getitem__
+    monkeypatch.setattr(StringHeap, "__getitem__", lambda heap, position: decoded.append(position) or read(heap, position))
+    top = rank_jobs_by_similarity(store, scores, top_n=3)
+    assert sorted(decoded) == [1, 3, 5]
+    expected = rank_jobs_by_similarity(jobs[["Job Title", "Salary"]], scores, top_n=3)
+    pd.testing.assert_frame_equal(top, expected)
+
+    everything = rank_jobs_by_similarity(store, scores)
+    assert everything["Job Title"].tolist() == ["Job 3", "Job 1", "Job 5", "Job 2", "Job 0", "Job 4"]
@@ -0,0 +1,89 @@
+# test_result_cache.py
+import sqlite3
+from config import CONFIG
+from logs.metrics import registry
+from models import result_cache
+from models.result_cache import ResultCache, get_result_cache, result_key
+
+
+def counter(name):
+    return registry.counters().get(name, 0)
+
+
+def test_key_ignores_punctuation_and_whitespace_but_not_parameters():
+    key = result_key(["python", ",", "SQL"], top_k=5)
+    assert result_key(["python", "sql", "!"], top_k=5) == key
+    assert result_key(["python", "sql"], top_k=3) != key
+    assert result_key(["python", "spark"], top_k=5) != key
+
+
+def test_versions_served_side_by_side_keep_their_results():
+    dashboard, worker = ResultCache(), ResultCache()
+    dashboard.put("v1", "a", {"version": "v1"})
+    worker.put("v2", "a", {"version": "v2"})
+
+    # Neither process wipes the other's rows when it sees a different version
+    assert dashboard.get("v1", "a") == {"version": "v1"}
+    assert ResultCache().get("v1", "a") == {"version": "v1"}
+    assert ResultCache().get("v2", "a") == {"version": "v2"}
+
+
+def test_levels_and_counters():
+    memory_hits, disk_hits, misses = (
+        counter("result_cache_memory_hits"), counter("result_cache_disk_hits"), counter("result_cache_misses")
+    )
+    cache = ResultCache()
+    assert cache.get("v1", "a") is None
+    cache.put("v1", "a", {"score": 1.0})
+    assert cache.get("v1", "a") == {"score": 1.0}
+    # A fresh instance (e.g. after a restart) is served from disk, then from memory
+    restarted = ResultCache()
+    assert restarted.get("v1", "a") == {"score": 1.0}
+    assert restarted.get("v1", "a") == {"score": 1.0}
+
+    assert counter("result_cache_misses") - misses == 1
+    assert counter("result_cache_memory_hits") - memory_hits == 2
+    assert counter("result_cache_disk_hits") - disk_hits == 1
+
+
+def disk_rows():
+    with sqlite3.connect(CONFIG["RESULT_CACHE_PATH"]) as connection:
+        return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def test_least_recently_used_results_are_evicted_past_the_margin(monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(result_cache.time, "time", lambda: next(clock))
+    cache = ResultCache(max_entries=2, max_disk_entries=3)
+    for key in "abc":
+        cache.put("v1", key, {"key": key})
+    assert cache.get("v1", "a") == {"key": "a"}  # disk hit; "a" is now the most recent
+    # One row over the budget is within the margin; the second one trims back to it
+    cache.put("v2", "d", {"key": "d"})
+    assert disk_rows() == 4
+    cache.put("v2", "e", {"key": "e"})
+
+    restarted = ResultCache(max_entries=2, max_disk_entries=3)
+    assert [restarted.get("v1", key) for key in "bc"] == [None, None]
+    assert [restarted.get(version, key) for version, key in (("v1", "a"), ("v2", "d"), ("v2", "e"))] == [
+        {"key": "a"}, {"key": "d"}, {"key": "e"}
+    ]
+    assert len(cache._entries) == 2 and disk_rows() == 3
+
+
+def test_hits_are_copies():
+    cache = ResultCache(path="")
+    result = {"jobs": [{"title": "Data Engineer"}]}
+    cache.put("v1", "a", result)
+    result["jobs"].append({"title": "changed after put"})
+    cache.get("v1", "a")["jobs"][0]["title"] = "changed after get"
+    assert cache.get("v1", "a") == {"jobs": [{"title": "Data Engineer"}]}
+
+
+def test_shared_cache_is_created_on_first_use(monkeypatch, tmp_path):
+    monkeypatch.setattr(result_cache, "_shared_cache", None)
+    assert not (tmp_path / "result_cache.sqlite3").exists()
+    cache = get_result_cache()
+    assert cache is get_result_cache()
+    assert cache.path == CONFIG["RESULT_CACHE_PATH"]
+    assert (tmp_path / "result_cache.sqlite3").exists()
@@ -0,0 +1,59 @@
+# test_sharded_index.py
+import json
+import os
+import numpy as np
+import pytest
+from data.ingest import prepare_job_features
+from models import sharded_index
+from models.model import calculate_similarity, top_k_indices
+from models.sharded_index import SHARD_MANIFEST_FILE, get_sharded_index, shard_bounds, shutdown_executors
+
+
+@pytest.fixture
+def job_features(simple_text, make_jobs, jobs_csv):
+    _, _, job_features = prepare_job_features(jobs_csv(make_jobs(150)))
+    return job_features
+
+
+def test_shard_bounds_cover_every_row():
+    assert shard_bounds(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert shard_bounds(8, 4) == [(0, 4), (4, 8)]
+    assert shard_bounds(0, 4) == []
+
+
+def test_shards_are_persisted_with_a_manifest(job_features, tmp_path):
+    index = get_sharded_index(job_features, str(tmp_path), rows_per_shard=40, workers=1)
+    with open(os.path.join(index.directory, SHARD_MANIFEST_FILE)) as file:
+        manifest = json.load(file)
+    assert manifest["n_rows"] == len(index) == 150
+    assert [shard["start"] for shard in manifest["shards"]] == [0, 40, 80, 120]
+    assert [shard["shape"][0] for shard in manifest["shards"]] == [40, 40, 40, 30]
+    assert os.path.basename(index.directory).endswith("_40")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merged_shards_match_exact_top_k(job_features, tmp_path, workers):
+    index = get_sharded_index(job_features, str(tmp_path), rows_per_shard=32, workers=workers)
+    try:
+        for row in (0, 7, 75, 149):
+            cv_vector = job_features[row]
+            exact_scores = calculate_similarity(job_features, cv_vector)
+            exact = top_k_indices(exact_scores, 10)
+
+            indices, scores = index.query(cv_vector, top_k=10)
+            assert np.allclose(scores, exact_scores[exact], atol=1e-5)
+            # Ties may be ordered differently; the scores of the chosen jobs must agree
+            assert np.allclose(exact_scores[indices], scores, atol=1e-5)
+            assert indices[0] == row or np.isclose(scores[0], exact_scores[row], atol=1e-5)
+    finally:
+        shutdown_executors()
+
+
+def test_pools_do_not_fork_and_are_shut_down():
+    executor = sharded_index._executor(2)
+    assert sharded_index._executor(2) is executor
+    assert executor._mp_context.get_start_method() in ("forkserver", "spawn")
+    shutdown_executors()
+    assert sharded_index._executors == {}
+    with pytest.raises(RuntimeError):
+        executor.submit(int)
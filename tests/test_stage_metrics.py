@@ -0,0 +1,59 @@
+# test_stage_metrics.py
+import json
+import os
+import pytest
+from scipy import sparse
+from config import CONFIG
+from logs.log_config import log_execution_time
+from logs.metrics import describe_sizes, registry
+
+
+@log_execution_time
+def _densify(matrix, factor=1):
+    return [row * factor for row in matrix.toarray()]
+
+
+@log_execution_time
+def _explode():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def test_stages_record_calls_sizes_and_failures():
+    matrix = sparse.random(30, 8, density=0.25, format="csr", random_state=0)
+    _densify(matrix)
+    _densify(matrix, factor=2)
+    with pytest.raises(RuntimeError):
+        _explode()
+
+    stages = registry.snapshot()
+    densify = stages[_densify.__qualname__]
+    assert densify["calls"] == 2 and densify["errors"] == 0
+    assert densify["input_sizes"] == {"nnz": matrix.nnz, "rows": 30}
+    assert densify["output_sizes"] == {"rows": 30}
+    assert 0 < densify["max_seconds"] <= densify["total_seconds"]
+    assert stages[_explode.__qualname__]["errors"] == 1
+
+    prometheus = registry.to_prometheus()
+    assert f'jats_stage_calls_total{{stage="{_densify.__qualname__}"}} 2' in prometheus
+    assert json.loads(registry.to_json())["stages"][_densify.__qualname__]["calls"] == 2
+
+
+def test_describe_sizes_looks_one_level_into_containers():
+    matrix = sparse.eye(5, format="csr")
+    assert describe_sizes(([1, 2, 3], {"features": matrix})) == {"rows": 5, "nnz": 5}
+    assert describe_sizes(([[1, 2]],)) == {"rows": 1}
+
+
+def test_requested_stages_are_profiled(monkeypatch, tmp_path):
+    monkeypatch.setitem(CONFIG, "PROFILE_STAGES", ["_densify"])
+    monkeypatch.setitem(CONFIG, "PROFILE_DIR", str(tmp_path / "profiles"))
+    _densify(sparse.eye(3, format="csr"))
+    profiles = os.listdir(tmp_path / "profiles")
+    assert len(profiles) == 1 and profiles[0].startswith(_densify.__qualname__)
@@ -0,0 +1,89 @@
+# test_streaming.py
+import json
+import os
+import numpy as np
+from scipy import sparse
+from config import CONFIG
+from data import streaming
+from data.compaction import compact_features
+from data.data_loader import TFIDF_PARAMS
+from data.job_store import CsrFileWriter
+from data.streaming import fit_vectorizer_streaming, prepare_job_features_streaming
+from data.text_engine import build_vectorizer, normalize_documents
+
+
+def test_streamed_fit_does_not_depend_on_the_chunk_size(simple_text, make_jobs, jobs_csv):
+    jobs = make_jobs(60)
+    path = jobs_csv(jobs)
+    small = fit_vectorizer_streaming(path, chunk_size=7, workers=1)
+    whole = fit_vectorizer_streaming(path, chunk_size=1000, workers=1)
+    assert small.vocabulary_ == whole.vocabulary_
+    assert np.array_equal(small.idf_, whole.idf_)
+
+    # The IDF weights are the ones TfidfVectorizer fits for the same vocabulary
+    tokens = normalize_documents(jobs["Job Description"].tolist(), workers=1)
+    vocabulary = small.get_feature_names_out().tolist()
+    reference = build_vectorizer(TFIDF_PARAMS, vocabulary=vocabulary).fit(tokens)
+    assert np.allclose(small.idf_, reference.idf_)
+
+
+def test_streamed_matrix_matches_an_in_memory_transform(simple_text, make_jobs, jobs_csv, monkeypatch):
+    jobs = make_jobs(45)
+    path = jobs_csv(jobs)
+    titles, vectorizer, job_features, key = prepare_job_features_streaming(
+        path, chunk_size=10, workers=1, return_key=True
+    )
+    tokens = normalize_documents(jobs["Job Description"].tolist(), workers=1)
+    expected = compact_features(vectorizer.transform(tokens))
+    assert titles["Job Title"].tolist() == jobs["Job Title"].tolist()
+    assert job_features.shape == expected.shape
+    assert abs(job_features - expected).max() < 1e-6
+
+    # A second run over the same CSV is answered from the artifact store
+    def stream(*args, **kwargs):
+        raise AssertionError("the cached artifact should have been used")
+
+    monkeypatch.setattr(streaming, "stream_job_features", stream)
+    cached_titles, _, cached_features, cached_key = prepare_job_features_streaming(path, return_key=True)
+    assert cached_key == key
+    assert (cached_features != job_features).nnz == 0
+    assert cached_titles["Job Title"].tolist() == titles["Job Title"].tolist()
+
+
+def _manifest(key):
+    with open(os.path.join(CONFIG["ARTIFACT_DIR"], key, "manifest.json")) as file:
+        return json.load(file)
+
+
+def test_streamed_feeds_accumulate_drift_and_refit(simple_text, make_jobs, jobs_csv, monkeypatch):
+    monkeypatch.setitem(CONFIG, "REFIT_DRIFT_THRESHOLD", 0.3)
+    base_jobs = make_jobs(40)
+    *_, base_key = prepare_job_features_streaming(jobs_csv(base_jobs, "base.csv"), chunk_size=16, return_key=True)
+
+    # Four new rows: the base vocabulary is reused and the drift is recorded
+    feed = jobs_csv(base_jobs.tail(36).reset_index(drop=True), "feed.csv")
+    _, _, job_features, key = prepare_job_features_streaming(feed, chunk_size=16, return_key=True)
+    assert job_features.shape[0] == 36
+    assert _manifest(key)["vocabulary"] == _manifest(base_key)["vocabulary"]
+    assert _manifest(key)["fit_rows"] == 40 and _manifest(key)["rows_since_fit"] == 4
+
+    # An unrelated feed is refitted on its own rows
+    other = make_jobs(30, seed=5)
+    other["Job Description"] = "gardener " + other["Job Description"]
+    *_, other_key = prepare_job_features_streaming(jobs_csv(other, "other.csv"), chunk_size=16, return_key=True)
+    assert _manifest(other_key)["fit_rows"] == 30 and _manifest(other_key)["rows_since_fit"] == 0
+    assert "gardener" in _manifest(other_key)["vocabulary"]
+
+
+def test_csr_file_writer_matches_vstack(tmp_path):
+    blocks = [sparse.random(n, 9, density=0.3, format="csr", random_state=n, dtype=np.float32) for n in (4, 0, 7)]
+    writer = CsrFileWriter(str(tmp_path))
+    for block in blocks:
+        writer.append(block)
+    matrix = writer.finish()
+    assert matrix.shape == (11, 9) and matrix.dtype == np.float32
+    assert matrix.indices.dtype == matrix.indptr.dtype == np.int32
+    assert (matrix != sparse.vstack(blocks)).nnz == 0
+
+    (tmp_path / "empty").mkdir()
+    assert CsrFileWriter(str(tmp_path / "empty")).finish(5, np.float32).shape == (0, 5)
@@ -0,0 +1,112 @@
+# test_task_queue.py
+import socket
+import subprocess
+import sys
+import threading
+from config import CONFIG
+from data import ingest
+from data.artifact_store import current_artifact
+from logs.log_config import log_execution_time
+from models import serving, task_queue
+from models.task_queue import DONE, FAILED, QUEUED, RUNNING, TaskStore, run_analysis, run_task
+
+
+def test_concurrent_claims_never_share_a_task():
+    store = TaskStore()
+    submitted = {store.submit("analyze", {"cv": f"cv {i}"}) for i in range(40)}
+    claimed, errors = [], []
+
+    def worker(name):
+        try:
+            while (task := store.claim(name)) is not None:
+                claimed.append(task["id"])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(f"host:{i}",)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert sorted(claimed) == sorted(submitted)
+    assert all(store.get(task_id)["status"] == RUNNING for task_id in submitted)
+
+
+@log_execution_time
+def _outer_stage(payload):
+    return {"echo": _inner_stage(payload["cv"])}
+
+
+@log_execution_time
+def _inner_stage(text):
+    return text.upper()
+
+
+def test_run_task_records_stages_and_result(monkeypatch):
+    monkeypatch.setitem(task_queue.TASK_HANDLERS, "echo", _outer_stage)
+    store = TaskStore()
+    task_id = store.submit("echo", {"cv": "hello"})
+    run_task(store, store.claim("host:1"))
+
+    task = store.get(task_id)
+    assert task["status"] == DONE
+    assert task["result"] == {"echo": "HELLO"}
+    events = [(event["event"], event["stage"], event["depth"]) for event in store.events(task_id)]
+    assert events == [
+        ("start", "_outer_stage", 0), ("start", "_inner_stage", 1),
+        ("end", "_inner_stage", 1), ("end", "_outer_stage", 0),
+    ]
+    assert store.events(task_id, after=3)[0]["seq"] == 4
+
+
+def test_failed_task_stores_the_error(monkeypatch):
+    def broken(payload):
+        raise ValueError("bad payload")
+
+    monkeypatch.setitem(task_queue.TASK_HANDLERS, "broken", broken)
+    store = TaskStore()
+    task_id = store.submit("broken", {})
+    run_task(store, store.claim("host:1"))
+    task = store.get(task_id)
+    assert task["status"] == FAILED
+    assert task["error"] == "ValueError: bad payload"
+
+
+def test_tasks_of_exited_workers_are_requeued():
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    store = TaskStore()
+    orphan = store.submit("analyze", {})
+    alive = store.submit("analyze", {})
+    store.claim(f"{socket.gethostname()}:{exited.pid}")
+    store.claim(f"{socket.gethostname()}:{task_queue.os.getpid()}")
+
+    assert store.requeue_orphans() == 1
+    assert store.get(orphan)["status"] == QUEUED
+    assert store.get(alive)["status"] == RUNNING
+
+
+def test_run_analysis_serves_the_artifact_it_featurized(simple_text, make_jobs, jobs_csv, monkeypatch):
+    monkeypatch.setitem(CONFIG, "RESULT_CACHE", False)
+    monkeypatch.setitem(CONFIG, "CSV_PATH", jobs_csv(make_jobs(30), "published.csv"))
+    run_analysis({"cv": "python developer"})
+    published = current_artifact()
+
+    # Another publish wins the race: the pointer stays on the first artifact
+    monkeypatch.setattr(ingest, "publish_artifact", lambda key: None)
+    monkeypatch.setitem(CONFIG, "CSV_PATH", jobs_csv(make_jobs(40, seed=3), "newer.csv"))
+    versions = []
+    build_snapshot = serving.build_snapshot
+
+    def recording_build_snapshot(version, *args, **kwargs):
+        versions.append(version)
+        return build_snapshot(version, *args, **kwargs)
+
+    monkeypatch.setattr(serving, "build_snapshot", recording_build_snapshot)
+    result = run_analysis({"cv": "python developer", "top_k": 3})
+
+    assert current_artifact() == published
+    assert versions and versions[0] != published
+    assert len(result["jobs"]) == 3
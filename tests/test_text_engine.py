@@ -0,0 +1,90 @@
+# test_text_engine.py
+import multiprocessing
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+from config import CONFIG
+from data import text_engine
+from data.text_engine import (
+    analyze_tokens, build_vectorizer, lemmatize_documents, lemmatize_token, normalize_document,
+    normalize_documents, resolve_workers
+)
+
+DOCUMENTS = [
+    "Developers building pipelines and dashboards",
+    "Nurses caring for patients",
+    "Chefs planning menus",
+] * 5
+
+
+@pytest.fixture
+def forked_workers(monkeypatch):
+    # Worker processes only see the stand-in lemmatizer when they are forked from the test
+    if "fork" not in multiprocessing.get_all_start_methods():
+        pytest.skip("workers would need the NLTK corpora")
+    monkeypatch.setattr(text_engine, "_worker_context", lambda: multiprocessing.get_context("fork"))
+
+
+def _stop_word_chunk(texts):
+    return [sorted(CONFIG["CUSTOM_STOP_WORDS"]) for _ in texts]
+
+
+def test_lemmatize_documents_keeps_tokens_and_order(simple_text):
+    assert lemmatize_documents(DOCUMENTS[:3], workers=1) == [
+        "Developer building pipeline and dashboard",
+        "Nurse caring for patient",
+        "Chef planning menu",
+    ]
+
+
+def test_parallel_lemmatization_matches_serial(simple_text, forked_workers):
+    serial = lemmatize_documents(DOCUMENTS, workers=1)
+    assert lemmatize_documents(DOCUMENTS, workers=2, chunk_size=4) == serial
+    assert normalize_documents(DOCUMENTS, workers=2, chunk_size=4) == normalize_documents(DOCUMENTS, workers=1)
+
+
+def test_workers_are_not_forked_and_see_runtime_settings(monkeypatch):
+    assert text_engine._worker_context().get_start_method() in ("forkserver", "spawn")
+    monkeypatch.setitem(CONFIG, "CUSTOM_STOP_WORDS", {"changed", "at", "runtime"})
+    results = text_engine._map_chunked(_stop_word_chunk, ["a", "b", "c"], workers=2, chunk_size=2)
+    assert results == [["at", "changed", "runtime"]] * 3
+
+
+def test_repeated_tokens_are_lemmatized_once(simple_text, monkeypatch):
+    lemmatizer, tokenize = text_engine._nltk()
+    calls = []
+
+    class CountingLemmatizer:
+        def lemmatize(self, word, pos="n"):
+            calls.append(word)
+            return lemmatizer.lemmatize(word)
+
+    monkeypatch.setattr(text_engine, "_nltk", lambda: (CountingLemmatizer(), tokenize))
+    lemmatize_token.cache_clear()
+    lemmatize_documents(DOCUMENTS, workers=1)
+    assert sorted(calls) == sorted({word for text in DOCUMENTS for word in text.split()})
+    assert lemmatize_token.cache_info().hits > 0
+
+
+def test_worker_count_resolution(monkeypatch):
+    assert resolve_workers(3) == 3
+    monkeypatch.setitem(CONFIG, "PREPROCESS_WORKERS", 0)
+    assert resolve_workers() >= 1
+
+
+def test_normalization_drops_stop_words_in_any_case_then_lemmatizes(simple_text):
+    # "The" is an English stop word and "Team" a custom one; both are matched lower-cased
+    assert normalize_document("The Team builds Pipelines, fast.") == ["build", "Pipeline", ",", "fast", "."]
+
+
+def test_token_analyzer_matches_the_string_analyzer(simple_text):
+    params = {"stop_words": "english", "ngram_range": (1, 2)}
+    tokens = normalize_documents(DOCUMENTS, workers=1)
+    reference = TfidfVectorizer(**params).build_analyzer()
+    for document in tokens:
+        assert analyze_tokens(document, ENGLISH_STOP_WORDS, (1, 2)) == reference(" ".join(document))
+
+    fused = build_vectorizer(params).fit(tokens)
+    joined = TfidfVectorizer(**params).fit([" ".join(document) for document in tokens])
+    assert fused.vocabulary_ == joined.vocabulary_
+    assert np.allclose(fused.idf_, joined.idf_)
@@ -0,0 +1,68 @@
+# test_vocabulary.py
+import json
+import os
+from collections import Counter
+import numpy as np
+import pytest
+from config import CONFIG
+from data.artifact_store import current_artifact, load_artifacts
+from data.data_loader import TFIDF_PARAMS, fit_vectorizer
+from data.ingest import prepare_job_features
+from data.text_engine import build_vectorizer
+from data.vocabulary import fit_vectorizer_two_pass, select_terms
+
+
+def token_lists(make_jobs, n_jobs=200):
+    return [description.split() for description in make_jobs(n_jobs)["Job Description"]]
+
+
+@pytest.mark.parametrize("params", [
+    {"ngram_range": (1, 2), "max_features": 50},
+    {"ngram_range": (1, 1), "max_features": 30, "min_df": 3, "max_df": 0.5},
+    {"ngram_range": (1, 2), "max_features": None, "min_df": 0.05},
+])
+def test_two_pass_selects_the_exact_vocabulary(make_jobs, params):
+    documents = token_lists(make_jobs)
+    analyzer = build_vectorizer(params).build_analyzer()
+    term_counts, doc_counts = Counter(), Counter()
+    for document in documents:
+        features = analyzer(document)
+        term_counts.update(features)
+        doc_counts.update(set(features))
+
+    vectorizer, job_features, candidate_terms = fit_vectorizer_two_pass(documents, params)
+    vocabulary = vectorizer.get_feature_names_out().tolist()
+    # Hash pruning never drops a term that counting every n-gram would keep
+    assert vocabulary == select_terms(term_counts, doc_counts, len(documents), params)
+    assert job_features.shape == (len(documents), len(vocabulary))
+    assert candidate_terms >= len(vocabulary)
+
+    # Same frequency profile as TfidfVectorizer; only the order of ties at the cut-off differs
+    exact = build_vectorizer(params).fit(documents)
+    assert sorted(term_counts[term] for term in vocabulary) == sorted(term_counts[term] for term in exact.vocabulary_)
+    assert np.allclose(vectorizer.idf_, build_vectorizer(params, vocabulary=vocabulary).fit(documents).idf_)
+
+
+@pytest.mark.parametrize("mode", ["exact", "two_pass"])
+def test_fit_records_vocabulary_stats(make_jobs, monkeypatch, mode):
+    monkeypatch.setitem(CONFIG, "VOCABULARY_MODE", mode)
+    vectorizer, _ = fit_vectorizer(token_lists(make_jobs))
+
+    stats = vectorizer.vocabulary_stats_
+    assert stats["mode"] == mode
+    assert stats["vocabulary_size"] == len(vectorizer.vocabulary_) <= TFIDF_PARAMS["max_features"]
+    assert stats["build_seconds"] >= 0
+    assert "peak_rss_growth_bytes" in stats
+
+
+def test_manifest_keeps_vocabulary_stats(simple_text, make_jobs, jobs_csv):
+    prepare_job_features(jobs_csv(make_jobs(120)))
+    key = current_artifact()
+    with open(os.path.join(CONFIG["ARTIFACT_DIR"], key, "manifest.json")) as file:
+        manifest = json.load(file)
+
+    # The feature names and the build figures live side by side
+    assert isinstance(manifest["vocabulary"], list)
+    assert manifest["vocabulary_stats"]["vocabulary_size"] == len(manifest["vocabulary"])
+    assert manifest["vocabulary_stats"]["documents"] == manifest["n_jobs"]
+    assert load_artifacts(key, TFIDF_PARAMS)["vectorizer"].vocabulary_stats_ == manifest["vocabulary_stats"]
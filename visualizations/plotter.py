@@ -2,37 +2,69 @@
 """
 This module handles plots and charts.
 """
+import os
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import plotly.express as px
 import pandas as pd
-from logs.log_config import log_execution_time
+from logs.log_config import log_event, log_execution_time
+
+def _finish(fig, name, output_dir=None, fmt="png"):
+    """
+    Show a figure interactively, or write it to output_dir in export mode.
+    Args:
+        fig (Figure): Matplotlib figure.
+        name (str): File name without extension.
+        output_dir (str): Target directory; None shows the figure instead.
+        fmt (str): Image format ("png" or "svg").
+    Returns:
+        str: Path of the written file, or None when shown.
+    """
+    if output_dir is None:
+        plt.show()
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{name}.{fmt}")
+    fig.savefig(path, format=fmt)
+    plt.close(fig)
+    return path
 
 @log_execution_time
-def plot_keyword_frequency(feature_names, job_features, top_n=20):
+def plot_keyword_frequency(feature_names, job_features, top_n=20, keyword_sums=None, output_dir=None, fmt="png"):
     """
     Plot the top 20 keywords based on frequency.
     Args:
         feature_names (list): Feature names from TF-IDF.
-        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions (unused if keyword_sums is given).
+        keyword_sums (np.ndarray): Precomputed column sums (KeywordIndex.column_sums).
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Export image format.
+    Returns:
+        str: Exported file path, or None when shown.
     """
-    keyword_sums = np.array(job_features.sum(axis=0)).flatten()
+    if keyword_sums is None:
+        keyword_sums = np.array(job_features.sum(axis=0)).flatten()
     top_keywords = np.argsort(keyword_sums)[-top_n:]
-    plt.figure(figsize=(10, 6))  # Increase figure size
+    fig = plt.figure(figsize=(10, 6))  # Increase figure size
     plt.barh([feature_names[i] for i in top_keywords], keyword_sums[top_keywords])
     plt.xlabel("Frequency")
     plt.title("Top 20 Keywords in Job Descriptions")
     plt.tight_layout()  # Adjust layout to prevent cropping
-    plt.show()
+    return _finish(fig, "keyword_frequency", output_dir, fmt)
 
 @log_execution_time
-def plot_top_matches(ranked_jobs, top_n=5):
+def plot_top_matches(ranked_jobs, top_n=5, output_dir=None, fmt="png"):
     """
     Plot the top N job matches based on similarity score.
     Args:
         ranked_jobs (pd.DataFrame): Ranked job data.
         top_n (int): Number of top matches to display.
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Export image format.
+    Returns:
+        str: Exported file path, or None when shown.
     """
     top_jobs = ranked_jobs.head(top_n)
     # Create unique labels for jobs
@@ -40,41 +72,49 @@ def plot_top_matches(ranked_jobs, top_n=5):
         f"{title} ({score:.2f})"
         for title, score in zip(top_jobs['Job Title'], top_jobs['Similarity Score'])
     ]
-    plt.figure(figsize=(10, 6))  # Increase figure size
+    fig = plt.figure(figsize=(10, 6))  # Increase figure size
     plt.barh(labels, top_jobs['Similarity Score'])
     plt.xlabel("Similarity Score")
     plt.title(f"Top {top_n} Job Matches")
     plt.gca().invert_yaxis()  # Reverse order for better readability
     plt.tight_layout()  # Adjust layout to prevent cropping
-    plt.show()
+    return _finish(fig, "top_matches", output_dir, fmt)
 
 @log_execution_time
-def plot_missing_keywords(missing_keywords, top_n=10):
+def plot_missing_keywords(missing_keywords, top_n=10, output_dir=None, fmt="png"):
     """
     Plot the top N missing keywords from the CV.
     Args:
         missing_keywords (list): Missing keywords with their scores.
         top_n (int): Number of top missing keywords to display.
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Export image format.
+    Returns:
+        str: Exported file path, or None when shown.
     """
     keywords, scores = zip(*missing_keywords[:top_n])
-    plt.figure(figsize=(10, 6))  # Increase figure size
+    fig = plt.figure(figsize=(10, 6))  # Increase figure size
     plt.barh(keywords, scores)
     plt.xlabel("Importance Score")
     plt.title(f"Top {top_n} Missing Keywords in CV")
     plt.gca().invert_yaxis()
     plt.tight_layout()  # Adjust layout to prevent cropping
-    plt.show()
+    return _finish(fig, "missing_keywords", output_dir, fmt)
 
 @log_execution_time
-def plot_similarity_heatmap(ranked_jobs, top_n=10):
+def plot_similarity_heatmap(ranked_jobs, top_n=10, output_dir=None, fmt="png"):
     """
     Create a heatmap showing similarity scores between the CV and job descriptions.
     Args:
         ranked_jobs (pd.DataFrame): Ranked job data.
         top_n (int): Number of top jobs to include in the heatmap.
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Export image format.
+    Returns:
+        str: Exported file path, or None when shown.
     """
     top_jobs = ranked_jobs.head(top_n)
-    plt.figure(figsize=(12, 6))  # Increase figure size
+    fig = plt.figure(figsize=(12, 6))  # Increase figure size
     sns.heatmap(
         top_jobs[['Similarity Score']].transpose(),
         annot=True,
@@ -87,28 +127,35 @@ def plot_similarity_heatmap(ranked_jobs, top_n=10):
     plt.ylabel("Similarity")
     plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels
     plt.tight_layout()  # Adjust layout to prevent cropping
-    plt.show()
+    return _finish(fig, "similarity_heatmap", output_dir, fmt)
 
 @log_execution_time
-def plot_interactive_keyword_comparison(feature_names, cv_vector, job_features, top_n=10):
+def plot_interactive_keyword_comparison(feature_names, cv_vector, job_features, top_n=10, keyword_sums=None,
+                                        output_dir=None, fmt="html"):
     """
     Create an interactive plot comparing CV and job keywords.
     Args:
         feature_names (list): Feature names from TF-IDF.
         cv_vector (sparse matrix): TF-IDF vector for the CV.
-        job_features (sparse matrix): TF-IDF matrix for job descriptions.
+        job_features (sparse matrix): TF-IDF matrix for job descriptions (unused if keyword_sums is given).
         top_n (int): Number of top keywords to display.
+        keyword_sums (np.ndarray): Precomputed column sums (KeywordIndex.column_sums).
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Ignored; the interactive chart is always exported as HTML.
+    Returns:
+        str: Exported file path, or None when shown.
     """
-    job_keywords = job_features.sum(axis=0).A1
-    cv_keywords = cv_vector.toarray().flatten()
+    job_keywords = keyword_sums if keyword_sums is not None else job_features.sum(axis=0).A1
+    # Look the CV weights up in the sparse vector instead of densifying it
+    cv_vector = cv_vector.tocsr()
+    cv_keywords = dict(zip(cv_vector.indices.tolist(), cv_vector.data.tolist()))
 
-    # Combine into a DataFrame
-    keyword_scores = [
-        {"Keyword": feature_names[i], "Job Score": job_keywords[i], "CV Score": cv_keywords[i]}
-        for i in range(len(feature_names))
-    ]
-    sorted_keywords = sorted(keyword_scores, key=lambda x: x['Job Score'], reverse=True)[:top_n]
-    df = pd.DataFrame(sorted_keywords)
+    # Combine the top keywords into a DataFrame
+    top_indices = np.argsort(-np.asarray(job_keywords), kind="stable")[:top_n]
+    df = pd.DataFrame([
+        {"Keyword": feature_names[i], "Job Score": job_keywords[i], "CV Score": cv_keywords.get(i, 0.0)}
+        for i in top_indices.tolist()
+    ])
 
     # Create an interactive bar chart
     fig = px.bar(
@@ -119,20 +166,56 @@ def plot_interactive_keyword_comparison(feature_names, cv_vector, job_features,
         title="Keyword Comparison: CV vs. Job Descriptions",
         labels={"value": "TF-IDF Score", "Keyword": "Keyword"}
     )
-    fig.show()
+    if output_dir is None:
+        fig.show()
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "keyword_comparison.html")
+    fig.write_html(path, include_plotlyjs="cdn")
+    return path
 
 @log_execution_time
-def plot_evaluation_metrics(metrics):
+def plot_evaluation_metrics(metrics, output_dir=None, fmt="png"):
     """
     Plot evaluation metrics for similarity and recommendations.
     Args:
         metrics (dict): Metrics to visualize.
+        output_dir (str): Export directory; None shows the plot.
+        fmt (str): Export image format.
+    Returns:
+        str: Exported file path, or None when shown.
     """
     labels, values = zip(*metrics.items())
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     plt.bar(labels, values, color="skyblue")
     plt.ylabel("Metric Value (Normalized for Total Jobs)")
     plt.title("Evaluation Metrics (Normalized)")
     plt.xticks(rotation=45, ha='right')  # Rotate x-axis labels (no overlapping)
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, "evaluation_metrics", output_dir, fmt)
+
+def _run_plot_task(task):
+    name, args, kwargs = task
+    plt.switch_backend("Agg")  # headless workers never open windows
+    return globals()[name](*args, **kwargs)
+
+@log_execution_time
+def render_plots(plot_tasks, output_dir=None, fmt="png", workers=None):
+    """
+    Render a batch of plots, either interactively or exported in parallel.
+    Args:
+        plot_tasks (list): (plot function name, args tuple, kwargs dict) triples.
+        output_dir (str): Export directory; None shows every plot in turn.
+        fmt (str): Export image format for the matplotlib charts ("png" or "svg").
+        workers (int): Export processes; defaults to one per task.
+    Returns:
+        list: Exported file paths (None entries for shown plots).
+    """
+    if output_dir is None:
+        return [globals()[name](*args, **kwargs) for name, args, kwargs in plot_tasks]
+
+    tasks = [(name, args, {**kwargs, "output_dir": output_dir, "fmt": fmt}) for name, args, kwargs in plot_tasks]
+    with ProcessPoolExecutor(max_workers=workers or len(tasks) or 1) as executor:
+        paths = list(executor.map(_run_plot_task, tasks))
+    log_event(f"Exported {len(paths)} plots to {output_dir}")
+    return paths
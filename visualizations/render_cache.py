@@ -0,0 +1,180 @@
+# render_cache.py
+"""
+This module renders dashboard charts off the request path and caches the bytes.
+Charts are drawn with the object-oriented Figure API (no pyplot global state), keyed
+by a hash of their data and parameters, and rendered by a background worker pool.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from config import CONFIG
+from logs.log_config import log_event
+
+MIME_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+def _new_figure(params):
+    figure = Figure(figsize=tuple(params.get("figsize", (8, 6))))
+    FigureCanvasAgg(figure)
+    return figure, figure.add_subplot()
+
+
+def _draw_keyword_frequency(ax, data):
+    ax.barh(data["keywords"], data["scores"], color="skyblue")
+    ax.set_title("Keyword Frequency")
+    ax.set_xlabel("Frequency")
+    ax.invert_yaxis()
+
+
+def _draw_missing_keywords(ax, data):
+    ax.barh(data["keywords"], data["scores"], color="orange")
+    ax.set_title("Missing Keywords")
+    ax.set_xlabel("Importance Score")
+    ax.invert_yaxis()
+
+
+def _draw_similarity_heatmap(ax, data):
+    image = ax.imshow([data["scores"]], cmap="coolwarm", aspect="auto")
+    ax.figure.colorbar(image, ax=ax, label="Similarity Score")
+    ax.set_xticks(range(len(data["titles"])))
+    ax.set_xticklabels(data["titles"], rotation=45, ha="right")
+    ax.set_yticks([])
+    ax.set_title("Similarity Heatmap")
+
+
+def _draw_top_matches(ax, data):
+    ax.bar(data["titles"], data["scores"], color="green")
+    ax.set_title("Top Job Matches")
+    ax.set_ylabel("Similarity Score")
+    ax.tick_params(axis="x", labelrotation=45)
+
+
+def _draw_keyword_comparison(ax, data):
+    ax.bar(data["keywords"], data["job_scores"], color="purple", label="Job")
+    ax.bar(data["keywords"], data["cv_scores"], color="pink", label="CV", alpha=0.7)
+    ax.set_title("Keyword Comparison: CV vs Job")
+    ax.set_ylabel("TF-IDF Score")
+    ax.set_xlabel("Keywords")
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.legend()
+
+
+CHARTS = {
+    "keyword_frequency": _draw_keyword_frequency,
+    "missing_keywords": _draw_missing_keywords,
+    "similarity_heatmap": _draw_similarity_heatmap,
+    "top_matches": _draw_top_matches,
+    "keyword_comparison": _draw_keyword_comparison,
+}
+
+
+def chart_key(chart, data, params):
+    """
+    Content hash identifying one rendered chart.
+    Args:
+        chart (str): Chart name (a key of CHARTS).
+        data (dict): JSON-serializable chart data.
+        params (dict): Rendering parameters such as format and figure size.
+    Returns:
+        str: Hex key, also used as the ETag.
+    """
+    payload = json.dumps({"chart": chart, "data": data, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def render_chart(chart, data, params):
+    """
+    Render one chart to bytes without touching pyplot.
+    Args:
+        chart (str): Chart name (a key of CHARTS).
+        data (dict): Chart data.
+        params (dict): Rendering parameters; "fmt" is "png" or "svg".
+    Returns:
+        bytes: Encoded image.
+    """
+    figure, ax = _new_figure(params)
+    CHARTS[chart](ax, data)
+    figure.tight_layout()
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format=params.get("fmt", "png"))
+    return buffer.getvalue()
+
+
+class RenderCache:
+    """
+    Bounded LRU of rendered charts, filled by a background thread pool.
+    """
+
+    def __init__(self, max_entries=None, workers=None):
+        self.max_entries = max_entries or CONFIG["RENDER_CACHE_SIZE"]
+        self._entries = OrderedDict()  # key -> (chart, fmt, bytes)
+        self._pending = {}             # key -> Future
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or CONFIG["RENDER_WORKERS"], thread_name_prefix="render"
+        )
+
+    def submit(self, chart, data, fmt="png", **params):
+        """
+        Schedule a chart for rendering unless it is cached or already queued.
+        Args:
+            chart (str): Chart name (a key of CHARTS).
+            data (dict): JSON-serializable chart data.
+            fmt (str): "png" or "svg".
+            **params: Extra rendering parameters (e.g. figsize).
+        Returns:
+            str: Cache key to fetch the bytes with.
+        """
+        params = {"fmt": fmt, **params}
+        key = chart_key(chart, data, params)
+        with self._lock:
+            if key in self._entries or key in self._pending:
+                return key
+            self._pending[key] = self._executor.submit(self._render, key, chart, data, params)
+        return key
+
+    def _render(self, key, chart, data, params):
+        try:
+            content = render_chart(chart, data, params)
+        except Exception as e:
+            log_event(f"Rendering {chart} failed: {e}", level="error")
+            content = None
+        with self._lock:
+            self._pending.pop(key, None)
+            if content is not None:
+                self._entries[key] = (chart, params["fmt"], content)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return content
+
+    def get(self, key, timeout=None):
+        """
+        Fetch rendered bytes, waiting for an in-flight render if needed.
+        Args:
+            key (str): Key returned by submit().
+            timeout (float): Seconds to wait for a pending render.
+        Returns:
+            tuple: (fmt, bytes), or None if the key is unknown or rendering failed.
+        Raises:
+            concurrent.futures.TimeoutError: If the render is still running after timeout.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1], entry[2]
+            future = self._pending.get(key)
+        if future is None:
+            return None
+        future.result(timeout=timeout)
+        with self._lock:
+            entry = self._entries.get(key)
+        return (entry[1], entry[2]) if entry is not None else None
+
+
+render_cache = RenderCache()